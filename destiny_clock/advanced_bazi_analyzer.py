@@ -12,6 +12,7 @@ bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
 from lunar_python import Lunar, Solar
+from natal_analysis_cache import get_natal_cache, natal_key
 
 class AdvancedBaziAnalyzer:
     """专业八字分析器 - 基于专业库的深度分析"""
@@ -681,17 +682,14 @@ class AdvancedBaziAnalyzer:
             year, month, day = map(int, birth_date.split('-'))
             time_hour = 4 if '3-5' in birth_time or '寅' in birth_time else 10
             
-            solar = Solar.fromYmdHms(year, month, day, time_hour, 0, 0)
-            lunar = solar.getLunar()
-            ba = lunar.getEightChar()
+            natal_cache = get_natal_cache()
+            ba = natal_cache.get_eight_char(year, month, day, time_hour, gender)
             
-            # 基本八字信息
-            bazi_info = {
-                'year': f"{ba.getYearGan()}{ba.getYearZhi()}",
-                'month': f"{ba.getMonthGan()}{ba.getMonthZhi()}",
-                'day': f"{ba.getDayGan()}{ba.getDayZhi()}",
-                'time': f"{ba.getTimeGan()}{ba.getTimeZhi()}"
-            }
+            # 只取决于本命盘的部分走缓存；大运流年趋势与当前年份有关，每次重算
+            natal_sections = natal_cache.get_or_compute(
+                'comprehensive_destiny', natal_key(year, month, day, time_hour, gender),
+                lambda: self.analyze_natal_sections(ba, month)
+            )
             
             # 综合分析
             analysis_result = {
@@ -699,18 +697,18 @@ class AdvancedBaziAnalyzer:
                     'birth_date': birth_date,
                     'birth_time': birth_time,
                     'gender': gender,
-                    'bazi': bazi_info,
+                    'bazi': natal_sections['bazi'],
                     'day_master': ba.getDayGan(),
-                    'birth_season': self.get_birth_season(month)
+                    'birth_season': natal_sections['birth_season']
                 },
-                'shishen_analysis': self.analyze_shishen_comprehensive(ba),
-                'dizhi_relations': self.analyze_dizhi_relations(ba),
-                'personality_analysis': self.analyze_personality(ba),
-                'career_wealth_analysis': self.analyze_career_wealth(ba),
-                'health_analysis': self.analyze_health(ba),
-                'yongshen_analysis': self.analyze_tiaohou_comprehensive(ba),
+                'shishen_analysis': natal_sections['shishen_analysis'],
+                'dizhi_relations': natal_sections['dizhi_relations'],
+                'personality_analysis': natal_sections['personality_analysis'],
+                'career_wealth_analysis': natal_sections['career_wealth_analysis'],
+                'health_analysis': natal_sections['health_analysis'],
+                'yongshen_analysis': natal_sections['yongshen_analysis'],
                 'fortune_trends': self.analyze_fortune_trends(ba, year, month, day, gender),
-                'comprehensive_advice': self.generate_comprehensive_advice(ba),
+                'comprehensive_advice': natal_sections['comprehensive_advice'],
                 'analysis_timestamp': datetime.datetime.now().isoformat()
             }
             
@@ -720,6 +718,25 @@ class AdvancedBaziAnalyzer:
             print(f"完整命格分析失败: {str(e)}")
             return {'error': f'分析失败: {str(e)}'}
     
+    def analyze_natal_sections(self, ba, birth_month: int) -> Dict[str, Any]:
+        """完整命格分析中只取决于本命盘的部分"""
+        return {
+            'bazi': {
+                'year': f"{ba.getYearGan()}{ba.getYearZhi()}",
+                'month': f"{ba.getMonthGan()}{ba.getMonthZhi()}",
+                'day': f"{ba.getDayGan()}{ba.getDayZhi()}",
+                'time': f"{ba.getTimeGan()}{ba.getTimeZhi()}"
+            },
+            'birth_season': self.get_birth_season(birth_month),
+            'shishen_analysis': self.analyze_shishen_comprehensive(ba),
+            'dizhi_relations': self.analyze_dizhi_relations(ba),
+            'personality_analysis': self.analyze_personality(ba),
+            'career_wealth_analysis': self.analyze_career_wealth(ba),
+            'health_analysis': self.analyze_health(ba),
+            'yongshen_analysis': self.analyze_tiaohou_comprehensive(ba),
+            'comprehensive_advice': self.generate_comprehensive_advice(ba)
+        }
+    
     def get_birth_season(self, month: int) -> str:
         """获取出生季节"""
         if month in [3, 4, 5]:
@@ -4,105 +4,160 @@
 更多有趣的时间序列分析
 """
 
-import csv
 import os
+import math
 import datetime
 from collections import defaultdict, Counter
 import statistics
 import calendar
+import numpy as np
+from score_frame import ScoreFrame
+from score_groupby import group_rows, LAYER_NAMES
+from score_windows import DatedWindows, annual_anchor_days
+from score_cycles import analyze_cycles, MIN_DAYS
 
 class AdvancedFortuneAnalytics:
     
-    def __init__(self, csv_file_path=None):
+    def __init__(self, csv_file_path=None, birthday=None, frame=None):
+        self.is_default_data = csv_file_path is None
         if csv_file_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             csv_file_path = os.path.join(current_dir, "最终版一生每日分数_1995-2055.csv")
         
-        self.data = self.load_data(csv_file_path)
+        self.birthday = birthday
+        self.frame = frame
+        self.data = frame.rows() if frame is not None else self.load_data(csv_file_path)
+        self.ordinals = np.array([item['date_obj'].toordinal() for item in self.data], dtype=np.int64)
+        self.scores = np.array([item['final_score'] for item in self.data], dtype=np.float64)
+        self.windows = DatedWindows(self.ordinals, self.scores)
         print(f"🔮 高级分析器已加载 {len(self.data)} 天数据")
     
     def load_data(self, csv_file_path):
-        """加载CSV数据"""
+        """加载一生每日分数（优先内存映射二进制列式文件），同时保留列式的 self.frame"""
         data = []
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':
-                        continue
-                    try:
-                        date_obj = datetime.datetime.strptime(row['日期'], '%Y-%m-%d').date()
-                        data.append({
-                            'date': row['日期'],
-                            'date_obj': date_obj,
-                            'year': int(row['年份']),
-                            'dayun_ganzhi': row['大运干支'],
-                            'liunian_ganzhi': row['流年干支'],
-                            'liuyue_ganzhi': row['流月干支'],
-                            'liuri_ganzhi': row['流日干支'],
-                            'final_score': int(row['最终总分']),
-                            'month': date_obj.month,
-                            'day': date_obj.day,
-                            'weekday': date_obj.weekday()
-                        })
-                    except (ValueError, KeyError):
-                        continue
+            self.frame = ScoreFrame.load(csv_file_path)
+            data = self.frame.rows()
         except FileNotFoundError:
             print(f"❌ 数据文件不存在: {csv_file_path}")
         
         return data
     
-    def analyze_birthday_fortune_effect(self):
-        """分析生日效应：每年生日前后的运势变化"""
+    def analyze_birthday_fortune_effect(self, birthday=None, window_days=7):
+        """分析生日效应：每年生日前后的运势变化
+        
+        Args:
+            birthday: (月, 日)、date 或 BirthProfile，默认取分析对象的生日
+            window_days: 生日前后各统计多少天
+        """
         print("🎂 生日效应分析")
         print("=" * 60)
         
-        birthday_month, birthday_day = 6, 11  # 6月11日生日
-        
-        birthday_effects = []
-        
-        for item in self.data:
-            if item['month'] == birthday_month and item['day'] == birthday_day:
-                # 这是生日
-                birthday_score = item['final_score']
-                
-                # 找前7天和后7天
-                target_date = item['date_obj']
-                before_scores = []
-                after_scores = []
-                
-                for other_item in self.data:
-                    date_diff = (other_item['date_obj'] - target_date).days
-                    if -7 <= date_diff <= -1:
-                        before_scores.append(other_item['final_score'])
-                    elif 1 <= date_diff <= 7:
-                        after_scores.append(other_item['final_score'])
-                
-                if before_scores and after_scores:
-                    before_avg = statistics.mean(before_scores)
-                    after_avg = statistics.mean(after_scores)
-                    
-                    birthday_effects.append({
-                        'year': item['year'],
-                        'birthday_score': birthday_score,
-                        'before_avg': before_avg,
-                        'after_avg': after_avg,
-                        'birthday_boost': birthday_score - before_avg,
-                        'after_effect': after_avg - birthday_score
-                    })
+        if not self.data:
+            print("⚠️ 没有数据，跳过生日效应分析")
+            return []
+        birthday = self._resolve_birthday(birthday)
+        if birthday is None:
+            print("⚠️ 未指定生日，跳过生日效应分析")
+            return []
+        birthday_month, birthday_day = birthday
+        
+        first_year, last_year = self.data[0]['date_obj'].year, self.data[-1]['date_obj'].year
+        anchors = annual_anchor_days(birthday_month, birthday_day, first_year, last_year)
+        birthday_effects = [
+            {
+                'year': effect['year'],
+                'birthday_score': effect['score'],
+                'before_avg': effect['before_avg'],
+                'after_avg': effect['after_avg'],
+                'birthday_boost': effect['boost'],
+                'after_effect': effect['after_effect']
+            }
+            for effect in self.event_window_effects(anchors, window_days)
+        ]
         
         # 统计分析
         if birthday_effects:
             avg_birthday_boost = statistics.mean([effect['birthday_boost'] for effect in birthday_effects])
             avg_after_effect = statistics.mean([effect['after_effect'] for effect in birthday_effects])
             
-            print(f"📊 生日效应统计 (基于{len(birthday_effects)}年数据):")
+            print(f"📊 生日效应统计 ({birthday_month}月{birthday_day}日，基于{len(birthday_effects)}年数据):")
             print(f"   平均生日加成: {avg_birthday_boost:+.1f}分")
             print(f"   平均生日后效应: {avg_after_effect:+.1f}分")
             
             print(f"\n🎯 各年生日运势:")
             for effect in birthday_effects[-10:]:  # 显示最近10年
-                print(f"   {effect['year']}年: 生日{effect['birthday_score']}分 (前7天{effect['before_avg']:.1f}→后7天{effect['after_avg']:.1f})")
+                print(f"   {effect['year']}年: 生日{effect['birthday_score']}分 (前{window_days}天{effect['before_avg']:.1f}→后{window_days}天{effect['after_avg']:.1f})")
+        
+        return birthday_effects
+    
+    def _resolve_birthday(self, birthday):
+        """生日参数 → (月, 日)；未指定时用构造时传入的生日，默认数据文件则用用户档案的生日"""
+        if birthday is None:
+            birthday = self.birthday
+        if birthday is None and self.is_default_data:
+            from final_lifetime_calculator import USER_PROFILE
+            birthday = USER_PROFILE
+        if birthday is None:
+            return None
+        if hasattr(birthday, 'birth_month'):
+            return birthday.birth_month, birthday.birth_day
+        if isinstance(birthday, datetime.date):
+            return birthday.month, birthday.day
+        return tuple(birthday)
+    
+    def event_window_effects(self, anchor_dates, window_days=7):
+        """任意锚点日期前后 window_days 天（不含当天）的运势对比
+        
+        anchor_dates 为 date 或 toordinal 天数；当天没有数据或前后窗口为空的锚点跳过。
+        返回 [{date, year, score, before_avg, after_avg, boost, after_effect}, ...]
+        """
+        anchor_days = [d.toordinal() if isinstance(d, datetime.date) else int(d) for d in anchor_dates]
+        offsets, before_means, after_means = self.windows.around(anchor_days, window_days, window_days)
+        
+        effects = []
+        for offset, before_avg, after_avg in zip(offsets.tolist(), before_means.tolist(), after_means.tolist()):
+            if offset < 0 or math.isnan(before_avg) or math.isnan(after_avg):
+                continue
+            item = self.data[offset]
+            score = item['final_score']
+            effects.append({
+                'date': item['date_obj'],
+                'year': item['year'],
+                'score': score,
+                'before_avg': before_avg,
+                'after_avg': after_avg,
+                'boost': score - before_avg,
+                'after_effect': after_avg - score
+            })
+        return effects
+    
+    def analyze_event_windows(self, events, window_days=7):
+        """事件窗口分析：各类事件（节日、纪念日等）当天相对前后几天的运势变化
+        
+        Args:
+            events: {事件名: [date, ...]}
+        """
+        print(f"📌 事件窗口分析（前后各{window_days}天）")
+        print("=" * 60)
+        
+        results = {}
+        for name, dates in events.items():
+            effects = self.event_window_effects(dates, window_days)
+            if not effects:
+                print(f"   {name}: 数据范围内没有该事件")
+                continue
+            results[name] = {
+                'count': len(effects),
+                'avg_score': statistics.mean([effect['score'] for effect in effects]),
+                'avg_boost': statistics.mean([effect['boost'] for effect in effects]),
+                'avg_after_effect': statistics.mean([effect['after_effect'] for effect in effects]),
+                'effects': effects
+            }
+            stats = results[name]
+            print(f"   {name}: 当天平均{stats['avg_score']:.1f}分，较前{window_days}天{stats['avg_boost']:+.1f}分，"
+                  f"后{window_days}天{stats['avg_after_effect']:+.1f}分 (统计{stats['count']}次)")
+        return results
     
     def find_golden_time_windows(self, min_days=5, min_avg_score=55):
         """找出黄金时间窗口：连续高分的时段"""
@@ -198,38 +253,63 @@ class AdvancedFortuneAnalytics:
         for festival, stats in sorted_festivals:
             print(f"   {festival}: {stats['avg_score']:.1f}分 (统计{stats['count']}次，{stats['min_score']}-{stats['max_score']}分)")
     
-    def detect_fortune_cycles(self):
-        """检测运势周期性规律"""
+    def detect_fortune_cycles(self, method='spectral', start_date=None, end_date=None, top=8):
+        """检测运势周期性规律
+        
+        Args:
+            method: 'spectral' 用 FFT 计算整条序列的周期图和自相关，找出主导周期；
+                    'difference' 为原来的做法，只比较几个固定周期的平均差异
+            start_date, end_date: 只分析该日期范围（date，含两端）
+            top: 列出多少个主导周期
+        
+        method 不是这两种之一时抛出 ValueError
+        """
+        if method not in ('spectral', 'difference'):
+            raise ValueError(f"不支持的周期检测方法: {method}（可选 'spectral' 或 'difference'）")
         print("\n🔄 运势周期性分析")
         print("=" * 60)
         
-        scores = [item['final_score'] for item in self.data]
-        
-        # 简单的周期检测：看看是否有明显的重复模式
+        scores = self._scores_between(start_date, end_date)
+        if method == 'difference':
+            return self._detect_cycles_by_difference(scores)
+        
+        result = analyze_cycles(scores, top)
+        if len(scores) < MIN_DAYS:
+            print(f"⚠️ 只有{len(scores)}天数据（日期范围内没有数据或数据文件缺失），无法进行频谱分析")
+            return result
+        print(f"📈 频谱分析（{result['days']}天数据）")
+        print("🎵 主导周期（按功率占比）:")
+        for cycle in result['dominant']:
+            acf_text = f"，自相关{cycle['acf']:+.2f}" if cycle['acf'] is not None else ''
+            label = f" {cycle['label']}" if cycle['label'] else ''
+            print(f"   {cycle['period']:.1f}天{label}: 占波动{cycle['share'] * 100:.1f}%{acf_text}")
+        
+        print("\n📐 已知周期强度（自相关）:")
+        for cycle in result['known']:
+            strength = cycle['acf']
+            print(f"   {cycle['label']}（{cycle['period']:g}天）: {strength:+.2f} "
+                  f"({'强周期性' if strength >= 0.5 else '弱周期性' if strength >= 0.2 else '无周期性'})")
+        return result
+    
+    def _scores_between(self, start_date=None, end_date=None):
+        """日期范围内的分数数组（数据按日期升序，二分定位）"""
+        start = np.searchsorted(self.ordinals, start_date.toordinal()) if start_date else 0
+        end = np.searchsorted(self.ordinals, end_date.toordinal(), side='right') if end_date else len(self.ordinals)
+        return self.scores[start:end]
+    
+    def _detect_cycles_by_difference(self, scores):
+        """固定周期的平均差异：相隔 1-3 个周期的两天分数差的均值，差异越小周期性越强"""
         potential_cycles = [7, 10, 30, 60, 365]  # 周、旬、月、双月、年
         
+        results = {}
         for cycle_length in potential_cycles:
             if len(scores) > cycle_length * 3:  # 至少要有3个完整周期
-                correlations = []
-                
-                # 计算不同周期位移的相关性
-                for offset in range(1, 4):  # 检测1-3个周期的相关性
-                    corr_sum = 0
-                    count = 0
-                    
-                    for i in range(len(scores) - cycle_length * offset):
-                        score1 = scores[i]
-                        score2 = scores[i + cycle_length * offset]
-                        corr_sum += abs(score1 - score2)
-                        count += 1
-                    
-                    if count > 0:
-                        avg_diff = corr_sum / count
-                        correlations.append(avg_diff)
-                
-                if correlations:
-                    avg_correlation = statistics.mean(correlations)
-                    print(f"   {cycle_length}天周期: 平均差异{avg_correlation:.1f}分 ({'强周期性' if avg_correlation < 5 else '弱周期性' if avg_correlation < 8 else '无周期性'})")
+                correlations = [float(np.abs(scores[cycle_length * offset:] - scores[:-cycle_length * offset]).mean())
+                                for offset in range(1, 4)]  # 检测1-3个周期的相关性
+                avg_correlation = statistics.mean(correlations)
+                results[cycle_length] = avg_correlation
+                print(f"   {cycle_length}天周期: 平均差异{avg_correlation:.1f}分 ({'强周期性' if avg_correlation < 5 else '弱周期性' if avg_correlation < 8 else '无周期性'})")
+        return results
     
     def analyze_consecutive_extremes(self):
         """分析连续极端值现象"""
@@ -406,61 +486,25 @@ class AdvancedFortuneAnalytics:
         for day in terrible_days:
             print(f"   {day['date']} - {day['liuri_ganzhi']} (大运:{day['dayun_ganzhi']})")
     
-    def analyze_score_distribution_by_ganzhi(self):
-        """按干支分析分数分布"""
+    def analyze_score_distribution_by_ganzhi(self, layer='liuri'):
+        """按干支分析分数分布（layer 为 dayun/liunian/liuyue/liuri，默认流日）"""
         print("\n🎲 干支分数分布分析")
         print("=" * 60)
         
-        # 分析流日干支的分数分布
-        ganzhi_distributions = defaultdict(list)
-        
-        # 重新读取详细数据
-        try:
-            with open(os.path.join(os.path.dirname(__file__), "最终版一生每日分数_1995-2055.csv"), 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':
-                        continue
-                    try:
-                        liuri_ganzhi = row['流日干支']
-                        final_score = int(row['最终总分'])
-                        ganzhi_distributions[liuri_ganzhi].append(final_score)
-                    except (ValueError, KeyError):
-                        continue
-        except Exception as e:
-            print(f"读取数据出错: {e}")
-            return
-        
-        # 计算各干支的统计数据
-        ganzhi_stats = []
-        for ganzhi, scores in ganzhi_distributions.items():
-            if len(scores) >= 20:  # 至少出现20次
-                avg_score = statistics.mean(scores)
-                std_dev = statistics.stdev(scores) if len(scores) > 1 else 0
-                min_score = min(scores)
-                max_score = max(scores)
-                
-                ganzhi_stats.append({
-                    'ganzhi': ganzhi,
-                    'avg_score': avg_score,
-                    'std_dev': std_dev,
-                    'min_score': min_score,
-                    'max_score': max_score,
-                    'count': len(scores),
-                    'range': max_score - min_score
-                })
-        
-        # 按平均分排序
-        ganzhi_stats.sort(key=lambda x: x['avg_score'], reverse=True)
+        # 各干支至少出现20次，按平均分降序
+        ganzhi_stats = group_rows(self.frame, layer, min_count=20, order='-mean')
         
-        print("🏆 流日干支运势排行榜 (前10名):")
+        layer_name = LAYER_NAMES[layer]
+        print(f"🏆 {layer_name}干支运势排行榜 (前10名):")
         for i, stat in enumerate(ganzhi_stats[:10]):
-            print(f"   #{i+1}: {stat['ganzhi']} - 平均{stat['avg_score']:.1f}分 (标准差{stat['std_dev']:.1f}，范围{stat['range']}分)")
+            print(f"   #{i+1}: {stat['key']} - 平均{stat['avg_score']:.1f}分 (标准差{stat['std_dev']:.1f}，范围{stat['range']}分)")
         
-        print("\n⚠️ 流日干支运势排行榜 (后10名):")
+        print(f"\n⚠️ {layer_name}干支运势排行榜 (后10名):")
         for i, stat in enumerate(ganzhi_stats[-10:]):
             rank = len(ganzhi_stats) - 9 + i
-            print(f"   #{rank}: {stat['ganzhi']} - 平均{stat['avg_score']:.1f}分 (标准差{stat['std_dev']:.1f}，范围{stat['range']}分)")
+            print(f"   #{rank}: {stat['key']} - 平均{stat['avg_score']:.1f}分 (标准差{stat['std_dev']:.1f}，范围{stat['range']}分)")
+        
+        return ganzhi_stats
     
     def predict_next_month_pattern(self):
         """基于历史模式预测下个月的运势趋势"""
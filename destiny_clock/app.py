@@ -6,18 +6,20 @@
 支持命理分析API
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 import os
 import sys
+import threading
 
 # 将当前目录添加到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入命理分析API
-from mingli_analysis_api import create_api_handler
+from mingli_analysis_api import create_api_handler, preload as preload_mingli
 # 导入图表数据API
-from chart_data_api import get_dayun_chart_api, get_liunian_chart_api, get_liuyue_chart_api, get_liuri_chart_api
+from chart_data_api import chart_api
+from chart_response_cache import ChartResponseCache, etag_matches, DEFAULT_PROFILE
 
 # 创建Flask应用
 app = Flask(__name__, static_folder='static', static_url_path='/static')
@@ -26,6 +28,29 @@ CORS(app)  # 启用跨域支持
 # 注册命理分析API
 create_api_handler(app)
 
+# 图表接口响应缓存（按日期失效，支持ETag条件请求）
+chart_cache = ChartResponseCache({DEFAULT_PROFILE: chart_api})
+
+def chart_response(endpoint):
+    """返回缓存的图表JSON，If-None-Match命中时返回304"""
+    profile = request.args.get('profile', DEFAULT_PROFILE)
+    try:
+        body, etag = chart_cache.get_response(endpoint, profile)
+    except KeyError:
+        return jsonify({'success': False, 'error': '未知的图表档案'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
+
+def warm_up():
+    """启动后在后台加载图表数据和模型SDK"""
+    chart_api.store
+    preload_mingli()
+
 # 主页路由
 @app.route('/')
 def index():
@@ -49,19 +74,19 @@ def health():
 # 图表数据API路由
 @app.route('/api/chart/dayun')
 def dayun_chart():
-    return get_dayun_chart_api()
+    return chart_response('dayun')
 
 @app.route('/api/chart/liunian')
 def liunian_chart():
-    return get_liunian_chart_api()
+    return chart_response('liunian')
 
 @app.route('/api/chart/liuyue')
 def liuyue_chart():
-    return get_liuyue_chart_api()
+    return chart_response('liuyue')
 
 @app.route('/api/chart/liuri')
 def liuri_chart():
-    return get_liuri_chart_api()
+    return chart_response('liuri')
 
 if __name__ == '__main__':
     # 设置端口
@@ -77,5 +102,8 @@ if __name__ == '__main__':
     print(f"   - 命运时钟: http://localhost:{port}/destiny_clock.html")
     print(f"   - 命理分析: http://localhost:{port}/mingli_analysis.html\n")
     
+    # 后台预加载图表数据和模型SDK，第一个请求不必等待
+    threading.Thread(target=warm_up, daemon=True).start()
+    
     # 运行服务器
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+批量生成一生每日分数
+把出生信息列表分片到进程池中并行计算，每人写一个输出文件，
+定期汇报吞吐量，并通过检查点文件在中断后继续未完成的部分
+
+用法:
+    python batch_lifetime_generator.py profiles.json --output-dir output --workers 8
+
+profiles.json 为出生信息数组，每项字段同 BirthProfile.from_dict，
+另可带 id 字段作为输出文件名（缺省用 name）。
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 添加bazi_lib到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
+sys.path.insert(0, bazi_lib_path)
+
+from person_lifetime_calculator import BirthProfile, PersonLifetimeCalculator, save_daily_scores
+from lifetime_score_engine import arrays_to_rows
+from daily_score_series import write_daily_series
+
+CHECKPOINT_FILENAME = 'checkpoint.txt'
+
+
+def profile_id(data):
+    """出生信息的唯一标识（也用作输出文件名）"""
+    raw_id = str(data.get('id') or data['name'])
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', raw_id)
+
+
+def load_checkpoint(checkpoint_path):
+    """读取已完成的输出文件名集合（每行一个，追加写入，崩溃时最多丢最后一行）"""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def output_path_for(output_dir, pid, start_year, end_year, output_format='csv'):
+    return os.path.join(output_dir, f'{pid}_一生每日分数_{start_year}-{end_year}.{output_format}')
+
+
+def is_completed(completed, output_dir, pid, start_year, end_year, output_format='csv'):
+    """检查点按输出文件名记录（含id、年份范围和格式），换了年份或格式不算完成；文件被删掉的也重新计算"""
+    filepath = output_path_for(output_dir, pid, start_year, end_year, output_format)
+    return os.path.basename(filepath) in completed and os.path.exists(filepath)
+
+
+def process_shard(shard, output_dir, start_year, end_year, output_format='csv'):
+    """子进程：计算一个分片中的所有人并逐个写出文件
+
+    返回 [(id, 天数, 错误信息或None), ...]
+    """
+    calculator = PersonLifetimeCalculator()
+    results = []
+    for data in shard:
+        pid = profile_id(data)
+        try:
+            profile = BirthProfile.from_dict(data)
+            arrays = calculator.calculate_arrays(profile, start_year, end_year)
+            filepath = output_path_for(output_dir, pid, start_year, end_year, output_format)
+
+            if output_format == 'bin':
+                # 二进制列式文件直接由数组写出（内部同样先写临时文件再改名）
+                write_daily_series(filepath, arrays)
+            else:
+                # 先写临时文件再改名，避免中断时留下半个文件被当成已完成
+                tmp_path = filepath + '.tmp'
+                save_daily_scores(arrays_to_rows(arrays), tmp_path, verbose=False, binary=False)
+                os.replace(tmp_path, filepath)
+            results.append((pid, len(arrays['final_score']), None))
+        except Exception as e:
+            results.append((pid, 0, str(e)))
+    return results
+
+
+def split_shards(items, shard_size):
+    return [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+
+def run_batch(profiles, output_dir, start_year=1995, end_year=2055, workers=None,
+              shard_size=50, resume=True, report_interval=5.0, output_format='csv'):
+    """批量计算入口，返回统计字典"""
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    completed = load_checkpoint(checkpoint_path)
+
+    pending = [data for data in profiles
+               if not is_completed(completed, output_dir, profile_id(data), start_year, end_year, output_format)]
+    print(f"📋 共{len(profiles)}人，已完成{len(profiles) - len(pending)}人，待计算{len(pending)}人")
+    if not pending:
+        return {'total': len(profiles), 'processed': 0, 'failed': [], 'days': 0, 'seconds': 0.0}
+
+    shards = split_shards(pending, shard_size)
+    workers = workers or os.cpu_count() or 1
+    print(f"⚙️ {workers}个进程，{len(shards)}个分片（每片{shard_size}人）")
+
+    processed = 0
+    total_days = 0
+    failed = []
+    t0 = time.time()
+    last_report = t0
+
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_shard, shard, output_dir, start_year, end_year, output_format)
+                   for shard in shards]
+
+        for future in as_completed(futures):
+            try:
+                shard_results = future.result()
+            except Exception as e:
+                print(f"❌ 分片执行失败: {e}")
+                continue
+
+            for pid, days, error in shard_results:
+                if error:
+                    failed.append({'id': pid, 'error': error})
+                    print(f"❌ {pid} 计算失败: {error}")
+                    continue
+                filepath = output_path_for(output_dir, pid, start_year, end_year, output_format)
+                checkpoint.write(os.path.basename(filepath) + '\n')
+                processed += 1
+                total_days += days
+            checkpoint.flush()
+
+            now = time.time()
+            if now - last_report >= report_interval:
+                elapsed = now - t0
+                print(f"   📈 已完成 {processed}/{len(pending)} 人，"
+                      f"{processed / elapsed:.1f} 人/秒，{total_days / elapsed:,.0f} 天/秒")
+                last_report = now
+
+    elapsed = time.time() - t0
+    print(f"\n✅ 批量计算完成: {processed}人成功，{len(failed)}人失败，用时{elapsed:.1f}秒")
+    if elapsed > 0:
+        print(f"   ⚡ 吞吐量: {processed / elapsed:.1f} 人/秒，{total_days / elapsed:,.0f} 天/秒")
+
+    return {
+        'total': len(profiles),
+        'processed': processed,
+        'failed': failed,
+        'days': total_days,
+        'seconds': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量生成一生每日分数')
+    parser.add_argument('profiles', help='出生信息JSON文件')
+    parser.add_argument('--output-dir', default=os.path.join(current_dir, 'batch_output'), help='输出目录')
+    parser.add_argument('--start-year', type=int, default=1995)
+    parser.add_argument('--end-year', type=int, default=2055)
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认CPU核数）')
+    parser.add_argument('--shard-size', type=int, default=50, help='每个分片的人数')
+    parser.add_argument('--shard-index', type=int, default=0, help='多机分摊时本机负责的分段序号')
+    parser.add_argument('--shard-count', type=int, default=1, help='多机分摊时的总分段数')
+    parser.add_argument('--format', choices=['csv', 'bin'], default='csv', help='输出格式（bin为列式二进制）')
+    parser.add_argument('--no-resume', action='store_true', help='忽略检查点，全部重算')
+    args = parser.parse_args()
+
+    with open(args.profiles, 'r', encoding='utf-8') as f:
+        profiles = json.load(f)
+    profiles = profiles[args.shard_index::args.shard_count]
+
+    summary = run_batch(profiles, args.output_dir, args.start_year, args.end_year,
+                        workers=args.workers, shard_size=args.shard_size, resume=not args.no_resume,
+                        output_format=args.format)
+    if summary['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
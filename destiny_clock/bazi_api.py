@@ -10,6 +10,7 @@ from flask_cors import CORS
 import json
 import os
 from bazi_calculator import BaziCalculator
+from natal_analysis_cache import get_natal_cache
 
 app = Flask(__name__)
 # 更宽松的CORS设置以解决host验证问题
@@ -107,6 +108,14 @@ def health_check():
         'version': '1.0.0'
     })
 
+@app.route('/destiny_clock/api/cache_stats', methods=['GET'])
+def cache_stats():
+    """本命盘分析缓存命中统计"""
+    return jsonify({
+        'success': True,
+        'data': get_natal_cache().stats()
+    })
+
 @app.route('/destiny_clock/api/fortune_trends', methods=['POST'])
 def get_fortune_trends():
     """获取运势趋势数据（年度月份 + 月度日期）"""
@@ -207,7 +216,7 @@ def get_layered_analysis():
         
         # 使用分层叠加系统
         layered_result = calculator.layered_system.analyze_complete_fortune(
-            year, month, day, hour, 0, gender
+            year, month, day, hour, gender
         )
         
         return jsonify({
@@ -234,6 +243,8 @@ def api_info():
             '/fortune': '获取当前时运信息',
             '/fortune_trends': '获取运势趋势图表数据',
             '/comprehensive_analysis': '获取完整命格分析',
+            '/layered_analysis': '获取分层叠加分析',
+            '/cache_stats': '本命盘分析缓存统计',
             '/health': '服务健康检查',
             '/info': 'API信息'
         },
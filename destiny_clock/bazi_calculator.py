@@ -18,6 +18,8 @@ from datas import *
 from common import *
 from advanced_bazi_analyzer import AdvancedBaziAnalyzer
 from layered_scoring_system import LayeredScoringSystem
+from natal_analysis_cache import get_natal_cache
+from dayun_service import dayun_at_date
 
 class BaziCalculator:
     def __init__(self):
@@ -71,12 +73,10 @@ class BaziCalculator:
             # 解析时间
             hour = self.parse_birth_time(birth_time)
             
-            # 使用公历计算（专业库会自动处理农历转换）
-            solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
-            lunar = solar.getLunar()
-            
-            # 获取八字
-            ba = lunar.getEightChar()
+            # 获取八字（本命缓存，专业库会自动处理农历转换）
+            ba = get_natal_cache().get_eight_char(year, month, day, hour, gender)
+            lunar = ba.getLunar()
+            solar = lunar.getSolar()
             
             # 提取四柱
             year_pillar = {'gan': ba.getYearGan(), 'zhi': ba.getYearZhi()}
@@ -146,69 +146,8 @@ class BaziCalculator:
     
     def calculate_dayun(self, birth_year: int, birth_month: int, birth_day: int, 
                        current_date: datetime.date, gender: str = 'male') -> Dict[str, str]:
-        """使用标准大运序列计算精确的大运"""
-        try:
-            # 根据命令行专业库结果，手动定义正确的大运序列
-            # 1995年6月11日寅时男性的标准大运序列
-            if birth_year == 1995 and birth_month == 6 and birth_day == 11 and gender == 'male':
-                dayun_sequence = [
-                    {'ages': (2, 12), 'gan': '辛', 'zhi': '巳'},
-                    {'ages': (12, 22), 'gan': '庚', 'zhi': '辰'},
-                    {'ages': (22, 32), 'gan': '己', 'zhi': '卯'},
-                    {'ages': (32, 42), 'gan': '戊', 'zhi': '寅'},
-                    {'ages': (42, 52), 'gan': '丁', 'zhi': '丑'},
-                    {'ages': (52, 62), 'gan': '丙', 'zhi': '子'},
-                    {'ages': (62, 72), 'gan': '乙', 'zhi': '亥'},
-                    {'ages': (72, 82), 'gan': '甲', 'zhi': '戌'},
-                    {'ages': (82, 92), 'gan': '癸', 'zhi': '酉'},
-                ]
-                
-                # 计算当前年龄
-                current_age = current_date.year - birth_year
-                
-                # 找到对应的大运
-                for dayun in dayun_sequence:
-                    start_age, end_age = dayun['ages']
-                    if start_age <= current_age < end_age:
-                        return {
-                            'gan': dayun['gan'],
-                            'zhi': dayun['zhi']
-                        }
-            
-            # 对于其他生日，尝试使用专业库计算
-            solar = Solar.fromYmdHms(birth_year, birth_month, birth_day, 4, 0, 0)  # 使用寅时
-            lunar = solar.getLunar()
-            ba = lunar.getEightChar()
-            
-            # 0表示男性，1表示女性
-            gender_code = 0 if gender == 'male' else 1
-            yun = ba.getYun(gender_code)
-            
-            # 计算当前年龄
-            current_age = current_date.year - birth_year
-            
-            # 获取所有大运，找到当前年龄对应的大运
-            dayuns = yun.getDaYun()
-            current_dayun = None
-            
-            for dayun in dayuns:
-                if dayun.getStartAge() <= current_age < dayun.getEndAge():
-                    current_dayun = dayun
-                    break
-            
-            if current_dayun:
-                ganzhi = current_dayun.getGanZhi()
-                return {
-                    'gan': ganzhi[0],
-                    'zhi': ganzhi[1]
-                }
-            else:
-                # 默认返回
-                return {'gan': '甲', 'zhi': '子'}
-                    
-        except Exception as e:
-            # 如果专业库计算失败，使用默认值
-            return {'gan': '甲', 'zhi': '子'}
+        """使用标准大运序列计算精确的大运（时间线由大运服务缓存）"""
+        return dayun_at_date(birth_year, birth_month, birth_day, current_date, gender)
     
     def calculate_current_fortune(self, bazi_data: Dict[str, Any]) -> Dict[str, Any]:
         """计算当前大运流年流月流日"""
@@ -381,9 +320,8 @@ class BaziCalculator:
                 except:
                     hour = 4  # 默认寅时
             
-            # 使用增强版综合系统
-            from comprehensive_scoring_system import ComprehensiveScoringSystem
-            comprehensive_system = ComprehensiveScoringSystem()
+            # 使用增强版综合系统（复用分层系统中的实例及其本命缓存）
+            comprehensive_system = self.layered_system.comprehensive_system
             
             layered_result = comprehensive_system.analyze_comprehensive_fortune(
                 birth_year=year, birth_month=month, birth_day=day, 
@@ -6,52 +6,70 @@
 """
 
 from flask import Flask, render_template, request, jsonify, render_template_string
-import subprocess
 import sys
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 
-app = Flask(__name__)
-
 # 获取当前目录
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CURRENT_DIR)
+
+import bazi
+
+app = Flask(__name__)
+
+# 预热的分析进程数：0 表示直接在请求线程中分析；
+# 大于0时使用常驻进程池（各进程已导入全部数据表，互不干扰）
+BAZI_WORKERS = int(os.environ.get('BAZI_WORKERS', 0))
+ANALYSIS_TIMEOUT = 30   # 进程池中单次分析的最长等待（秒）
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def _warm_worker():
+    """进程池初始化：提前导入报告用到的大数据表"""
+    import yue   # noqa: F401
+    import sizi  # noqa: F401
+
+
+def get_worker_pool():
+    """常驻分析进程池，BAZI_WORKERS 为0时返回None"""
+    global _worker_pool
+    if BAZI_WORKERS <= 0:
+        return None
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = ProcessPoolExecutor(max_workers=BAZI_WORKERS, initializer=_warm_worker)
+            # 先提交空任务，让各进程立即启动并完成预热
+            for _ in range(BAZI_WORKERS):
+                _worker_pool.submit(_warm_worker)
+        return _worker_pool
+
 
 def run_bazi_analysis(year, month, day, hour, gender='male', calendar='solar'):
-    """运行八字分析"""
+    """运行八字分析：output 为文字报告，result 为结构化结果（四柱、十神、五行分数、大运等）"""
     try:
-        # 构建命令
-        cmd = [sys.executable, 'bazi.py', str(year), str(month), str(day), str(hour)]
-        
-        # 添加参数
-        if calendar == 'solar':
-            cmd.append('-g')  # 公历
-        if gender == 'female':
-            cmd.append('-n')  # 女性
-            
-        print(f"执行命令: {' '.join(cmd)}")
-        
-        # 运行命令并捕获输出
-        result = subprocess.run(
-            cmd,
-            cwd=CURRENT_DIR,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-        
-        if result.returncode == 0:
-            return {
-                'success': True,
-                'output': result.stdout,
-                'error': result.stderr if result.stderr else None
-            }
+        pool = get_worker_pool()
+        if pool is not None:
+            result = pool.submit(bazi.analyze, year, month, day, hour, gender, calendar).result(timeout=ANALYSIS_TIMEOUT)
         else:
-            return {
-                'success': False,
-                'error': f"分析失败: {result.stderr}",
-                'output': result.stdout
-            }
+            result = bazi.analyze(year, month, day, hour, gender, calendar)
+        
+        return {
+            'success': True,
+            'output': result.report,
+            'result': result.to_dict(include_report=False),
+            'error': None
+        }
             
+    except FutureTimeoutError:
+        return {
+            'success': False,
+            'error': f"分析超时（超过{ANALYSIS_TIMEOUT}秒）"
+        }
     except Exception as e:
         return {
             'success': False,
@@ -525,4 +543,8 @@ if __name__ == '__main__':
     print("💫 基于传统八字理论的专业分析系统")
     print("=" * 50)
     
+    if BAZI_WORKERS > 0:
+        print(f"🔥 预热 {BAZI_WORKERS} 个分析进程")
+        get_worker_pool()
+    
     app.run(host='0.0.0.0', port=3000, debug=True)
@@ -12,7 +12,6 @@ from bidict import bidict
 
 from datas import *
 from ganzhi import *
-from sizi import summarys
 
 def check_gan(gan, gans):
     result = ''
@@ -33,9 +32,10 @@ def yinyangs(zhis):
     for item in zhis:
         result.append(yinyang(item))
     if set(result) == set('＋'):
-        print("四柱全阳")
+        return "四柱全阳"
     if set(result) == set('－'):
-        print("四柱全阴")
+        return "四柱全阴"
+    return ''
     
     
     
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+八字反查出生时间（批量）
+在干支日历表上建立 年柱+月柱+日柱 → 日期 的倒排索引，一次加载后可以反查任意多个八字，
+不必像 bazi.py -b 那样每个八字调用一次 sxtwl.siZhu2Year 扫描整个年份范围。
+
+时辰按 lunar_python 的 EightChar（bazi.py -g 排盘所用）约定：
+子时 0 点算当天早子时；23 点为晚子时，日柱仍算当天，时干按次日推。
+输出时间为时辰起点（子 0 点、丑 1 点、寅 3 点……），与 bazi.py -b 一致；
+节气交接当天逐个时辰用 lunar_python 核对，交节落在时辰中间时取该时辰内符合的一端。
+
+用法:
+    python bazi_reverse_lookup.py "甲子 丙寅 戊辰 壬子" "庚午 戊子 甲子 甲子"
+    python bazi_reverse_lookup.py -f charts.txt --start 1950 --end 2010 --json
+"""
+
+import re
+import sys
+import json
+import time
+import datetime
+from collections import defaultdict
+from array import array
+
+from ganzhi_calendar import TIANGAN, DIZHI, GANZHI_60, GANZHI_INDEX, get_ganzhi_calendar
+
+_PILLAR_PATTERN = re.compile(f"[{''.join(TIANGAN)}][{''.join(DIZHI)}]")
+
+# 各时辰起点（小时），下标为地支序号
+SHICHEN_START_HOURS = [0, 1, 3, 5, 7, 9, 11, 13, 15, 17, 19, 21]
+LATE_ZI_HOUR = 23
+
+
+def parse_pillars(bazi):
+    """八字字符串 → (年, 月, 日, 时) 四个干支序号，识别不出恰好四柱时返回None"""
+    pillars = _PILLAR_PATTERN.findall(bazi)
+    # "甲丑"这类阴阳不配的组合不在六十甲子中
+    if len(pillars) != 4 or any(p not in GANZHI_INDEX for p in pillars):
+        return None
+    return tuple(GANZHI_INDEX[p] for p in pillars)
+
+
+def time_pillar_index(day_index, zhi):
+    """日上起时：由日柱序号和时支推出时柱序号"""
+    return ((day_index % 5) * 12 + zhi) % 60
+
+
+def _key(year_index, month_index, day_index):
+    return (year_index * 60 + month_index) * 60 + day_index
+
+
+def _exact_indices(moment):
+    """lunar_python 计算某时刻的 (年, 月, 日, 时) 干支序号"""
+    from lunar_python import Solar
+    ba = Solar.fromYmdHms(moment.year, moment.month, moment.day,
+                          moment.hour, moment.minute, 0).getLunar().getEightChar()
+    return (GANZHI_INDEX[ba.getYear()], GANZHI_INDEX[ba.getMonth()],
+            GANZHI_INDEX[ba.getDay()], GANZHI_INDEX[ba.getTime()])
+
+
+class BaziReverseIndex:
+    """年/月/日柱组合 → 日历下标的倒排索引
+
+    日历表记录的是每天正午的年柱、月柱；交节当天正午前后年、月柱不同，
+    这类日期会同时登记在前后两个组合下，并标记为需要逐时辰核对。
+    """
+
+    def __init__(self, calendar=None):
+        self.calendar = calendar or get_ganzhi_calendar()
+        self._index = {}
+        self._boundary = set()
+        self.build()
+
+    def build(self):
+        calendar = self.calendar
+        year_index, month_index, day_index = calendar.year_index, calendar.month_index, calendar.day_index
+        buckets = defaultdict(list)
+        boundary = set()
+        last = calendar.days - 1
+        for i in range(calendar.days):
+            y, m, d = year_index[i], month_index[i], day_index[i]
+            buckets[_key(y, m, d)].append(i)
+            # 前一天正午到今天正午之间交节：今天上午仍属上一个月（年）
+            if i > 0 and (year_index[i - 1] != y or month_index[i - 1] != m):
+                buckets[_key(year_index[i - 1], month_index[i - 1], d)].append(i)
+                boundary.add(i)
+            # 今天正午到明天正午之间交节：今天晚上已属下一个月（年）
+            if i < last and (year_index[i + 1] != y or month_index[i + 1] != m):
+                buckets[_key(year_index[i + 1], month_index[i + 1], d)].append(i)
+                boundary.add(i)
+        self._index = {key: array('I', sorted(offsets)) for key, offsets in buckets.items()}
+        self._boundary = boundary
+
+    def _day_candidates(self, pillars, start_year, end_year):
+        """符合年/月/日柱的 (日期, 是否交节日)，按日期升序"""
+        year_gz, month_gz, day_gz, _ = pillars
+        offsets = self._index.get(_key(year_gz, month_gz, day_gz), ())
+        start = self.calendar.start_ordinal
+        for offset in offsets:
+            date = datetime.date.fromordinal(start + offset)
+            if start_year <= date.year <= end_year:
+                yield date, offset in self._boundary
+
+    def lookup(self, bazi, start_year=None, end_year=None):
+        """反查一个八字（字符串或四个干支序号），返回可能的出生时间（datetime，按时间升序）
+
+        start_year/end_year 默认取干支日历的覆盖范围；八字格式不对时抛出ValueError
+        """
+        pillars = parse_pillars(bazi) if isinstance(bazi, str) else tuple(bazi)
+        if pillars is None or len(pillars) != 4:
+            raise ValueError(f"无法识别的八字: {bazi}")
+        start_year = max(start_year or self.calendar.start_year, self.calendar.start_year)
+        end_year = min(end_year or self.calendar.end_year, self.calendar.end_year)
+
+        year_gz, month_gz, day_gz, time_gz = pillars
+        zhi = time_gz % 12
+        results = []
+        for date, on_boundary in self._day_candidates(pillars, start_year, end_year):
+            hours = []
+            if time_pillar_index(day_gz, zhi) == time_gz:
+                hours.append(SHICHEN_START_HOURS[zhi])
+            if zhi == 0 and time_pillar_index(day_gz + 1, zhi) == time_gz:
+                hours.append(LATE_ZI_HOUR)
+            for hour in hours:
+                moment = datetime.datetime(date.year, date.month, date.day, hour)
+                if on_boundary:
+                    moment = self._verify_shichen(moment, pillars)
+                    if moment is None:
+                        continue
+                results.append(moment)
+        return results
+
+    @staticmethod
+    def _verify_shichen(moment, pillars):
+        """交节日：核对时辰起点和结尾，返回符合的时刻，都不符合返回None"""
+        span = 59 if moment.hour in (0, LATE_ZI_HOUR) else 119
+        for candidate in (moment, moment + datetime.timedelta(minutes=span)):
+            if _exact_indices(candidate) == tuple(pillars):
+                return candidate
+        return None
+
+    def lookup_many(self, charts, start_year=None, end_year=None):
+        """批量反查，返回 {八字字符串: [datetime, ...]}；无法识别的八字对应None"""
+        results = {}
+        for bazi in charts:
+            if bazi in results:
+                continue
+            try:
+                results[bazi] = self.lookup(bazi, start_year, end_year)
+            except ValueError:
+                results[bazi] = None
+        return results
+
+
+_reverse_index = None
+
+
+def get_reverse_index():
+    """获取全局共享的反查索引（首次调用时构建）"""
+    global _reverse_index
+    if _reverse_index is None:
+        _reverse_index = BaziReverseIndex()
+    return _reverse_index
+
+
+def lookup_birth_times(charts, start_year=None, end_year=None):
+    """便捷函数：批量反查八字的可能出生时间"""
+    return get_reverse_index().lookup_many(charts, start_year, end_year)
+
+
+def validate(samples=200, seed=0):
+    """随机取日历范围内的时刻排盘再反查，返回反查结果中缺少原时刻的样本"""
+    import random
+    rng = random.Random(seed)
+    index = get_reverse_index()
+    calendar = index.calendar
+    failures = []
+    for _ in range(samples):
+        date = datetime.date.fromordinal(calendar.start_ordinal + rng.randrange(calendar.days))
+        hour = rng.randrange(24)
+        moment = datetime.datetime(date.year, date.month, date.day, hour)
+        pillars = _exact_indices(moment)
+        found = index.lookup(pillars)
+        # 反查给出的是时辰起点（交节时辰可能是结尾），只比较是否同一天同一时辰
+        if not any(abs((t - moment).total_seconds()) < 2 * 3600 and _exact_indices(t) == pillars for t in found):
+            failures.append({'moment': moment.strftime('%Y-%m-%d %H:00'),
+                             'bazi': ' '.join(GANZHI_60[i] for i in pillars),
+                             'found': [t.strftime('%Y-%m-%d %H:%M') for t in found]})
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='八字批量反查出生时间')
+    parser.add_argument('charts', nargs='*', help='八字，如 "甲子 丙寅 戊辰 壬子"')
+    parser.add_argument('-f', '--file', help='从文件读取八字，每行一个（"-" 表示标准输入）')
+    parser.add_argument('--start', type=int, help='起始年份（默认干支日历起点）')
+    parser.add_argument('--end', type=int, help='结束年份（默认干支日历终点）')
+    parser.add_argument('--json', action='store_true', help='输出JSON')
+    parser.add_argument('--validate', type=int, metavar='N', help='随机排盘N次再反查，核对结果')
+    args = parser.parse_args()
+
+    if args.validate:
+        t0 = time.time()
+        failures = validate(args.validate)
+        print(f"⏱️ 核对{args.validate}个样本耗时: {time.time() - t0:.1f}秒")
+        if failures:
+            print(f"❌ {len(failures)}个样本反查结果不含原时刻:")
+            for item in failures[:20]:
+                print(f"   {item}")
+            sys.exit(1)
+        print("✅ 全部一致")
+        sys.exit(0)
+
+    charts = list(args.charts)
+    if args.file:
+        stream = sys.stdin if args.file == '-' else open(args.file, 'r', encoding='utf-8')
+        with stream:
+            charts.extend(line.strip() for line in stream if line.strip())
+    if not charts:
+        parser.error('请提供八字或 --file')
+
+    t0 = time.time()
+    index = get_reverse_index()
+    t1 = time.time()
+    results = index.lookup_many(charts, args.start, args.end)
+    t2 = time.time()
+
+    if args.json:
+        print(json.dumps({bazi: None if found is None else [t.strftime('%Y-%m-%d %H:%M') for t in found]
+                          for bazi, found in results.items()}, ensure_ascii=False, indent=2))
+    else:
+        for bazi, found in results.items():
+            if found is None:
+                print(f"❌ {bazi}: 无法识别的八字")
+                continue
+            print(f"🔍 {bazi}: {len(found)}个可能的出生时间")
+            for t in found:
+                print(f"   可能出生时间: python bazi.py -g {t.year} {t.month} {t.day} {t.hour} :{t.minute}:0")
+        print(f"⚡ 索引构建 {t1 - t0:.3f}秒，反查{len(results)}个八字 {t2 - t1:.3f}秒", file=sys.stderr)
@@ -15,6 +15,7 @@ bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
 from lunar_python import Solar, Lunar
+from ganzhi_calendar import get_ganzhi_calendar
 
 # 用户专属计分规则
 TIANGAN_SCORES = {
@@ -34,6 +35,14 @@ def get_ganzhi_score(gan, zhi):
 def get_ganzhi_from_date(year, month, day, hour=12):
     """获取指定日期的干支"""
     try:
+        if hour == 12:
+            # 正午干支直接查表
+            pillars = get_ganzhi_calendar().get_pillars(year, month, day)
+            return {
+                'year': {'gan': pillars['year_gan'], 'zhi': pillars['year_zhi']},
+                'month': {'gan': pillars['month_gan'], 'zhi': pillars['month_zhi']},
+                'day': {'gan': pillars['day_gan'], 'zhi': pillars['day_zhi']}
+            }
         solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
         lunar = solar.getLunar()
         ba = lunar.getEightChar()
@@ -6,8 +6,6 @@
 
 import sys
 import os
-import datetime
-import csv
 from collections import defaultdict
 
 # 添加bazi_lib到Python路径
@@ -15,7 +13,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
-from lunar_python import Solar, Lunar
+from ganzhi_calendar import get_ganzhi_calendar
+from person_lifetime_calculator import BirthProfile, PersonLifetimeCalculator, save_daily_scores
 
 # 爱人专属计分规则
 LOVER_TIANGAN_SCORES = {
@@ -39,6 +38,16 @@ LOVER_DAYUN_SEQUENCE = [
     {'ganzhi': '丙寅', 'start_year': 2058, 'end_year': 2068},
 ]
 
+# 只知道出生年份和起运年份，因此直接给定大运序列而不是按出生时刻推算
+LOVER_PROFILE = BirthProfile(
+    name='爱人',
+    birth_year=1994,
+    gender='female',
+    tiangan_scores=LOVER_TIANGAN_SCORES,
+    dizhi_scores=LOVER_DIZHI_SCORES,
+    dayun_sequence=LOVER_DAYUN_SEQUENCE
+)
+
 def get_lover_ganzhi_score(gan, zhi):
     """计算爱人的干支分数"""
     return LOVER_TIANGAN_SCORES[gan] + LOVER_DIZHI_SCORES[zhi]
@@ -57,18 +66,8 @@ def get_lover_dayun_for_year(year):
 def get_accurate_ganzhi_for_date(year, month, day):
     """获取指定日期的准确干支（考虑节气分界）"""
     try:
-        solar = Solar.fromYmdHms(year, month, day, 12, 0, 0)
-        lunar = solar.getLunar()
-        ba = lunar.getEightChar()
-        
-        return {
-            'year_gan': ba.getYearGan(),
-            'year_zhi': ba.getYearZhi(),
-            'month_gan': ba.getMonthGan(),
-            'month_zhi': ba.getMonthZhi(),
-            'day_gan': ba.getDayGan(),
-            'day_zhi': ba.getDayZhi()
-        }
+        # 查预先计算的干支日历表，避免每天构造Solar→Lunar→EightChar
+        return get_ganzhi_calendar().get_pillars(year, month, day)
     except Exception as e:
         print(f"获取{year}-{month}-{day}干支时出错: {e}")
         return None
@@ -90,72 +89,9 @@ def calculate_lover_lifetime_scores(start_year=1998, end_year=2055):
     
     print(f"\n📊 开始逐日计算...")
     
-    # 存储结果
-    daily_scores = []
-    processed_days = 0
+    daily_scores = PersonLifetimeCalculator().calculate_daily_scores(LOVER_PROFILE, start_year, end_year)
     
-    # 按年计算
-    for year in range(start_year, end_year + 1):
-        print(f"   正在计算 {year}年...", end="")
-        
-        year_count = 0
-        
-        # 获取当年大运
-        current_dayun = get_lover_dayun_for_year(year)
-        dayun_gan, dayun_zhi = current_dayun[0], current_dayun[1]
-        dayun_score = get_lover_ganzhi_score(dayun_gan, dayun_zhi)
-        
-        # 计算当年每一天
-        current_date = datetime.date(year, 1, 1)
-        end_date = datetime.date(year, 12, 31)
-        
-        while current_date <= end_date:
-            try:
-                # 获取当天的准确干支（考虑节气分界）
-                ganzhi = get_accurate_ganzhi_for_date(current_date.year, current_date.month, current_date.day)
-                
-                if ganzhi:
-                    # 计算各层分数
-                    liunian_score = get_lover_ganzhi_score(ganzhi['year_gan'], ganzhi['year_zhi'])
-                    liuyue_score = get_lover_ganzhi_score(ganzhi['month_gan'], ganzhi['month_zhi'])
-                    liuri_score = get_lover_ganzhi_score(ganzhi['day_gan'], ganzhi['day_zhi'])
-                    
-                    # 最终总分
-                    final_score = dayun_score + liunian_score + liuyue_score + liuri_score
-                    
-                    # 记录数据
-                    daily_data = {
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'year': year,
-                        'dayun_ganzhi': current_dayun,
-                        'liunian_ganzhi': f"{ganzhi['year_gan']}{ganzhi['year_zhi']}",
-                        'liuyue_ganzhi': f"{ganzhi['month_gan']}{ganzhi['month_zhi']}",
-                        'liuri_ganzhi': f"{ganzhi['day_gan']}{ganzhi['day_zhi']}",
-                        'dayun_score': dayun_score,
-                        'liunian_score': liunian_score,
-                        'liuyue_score': liuyue_score,
-                        'liuri_score': liuri_score,
-                        'final_score': final_score
-                    }
-                    
-                    daily_scores.append(daily_data)
-                    year_count += 1
-                
-                current_date += datetime.timedelta(days=1)
-                processed_days += 1
-                
-            except Exception as e:
-                print(f"计算{current_date}时出错: {e}")
-                current_date += datetime.timedelta(days=1)
-                continue
-        
-        print(f" 完成({year_count}天)")
-        
-        # 每10年显示进度
-        if year % 10 == 0:
-            print(f"     📈 已处理 {processed_days} 天")
-    
-    print(f"\n✅ 计算完成！共处理了 {processed_days} 天的数据")
+    print(f"\n✅ 计算完成！共处理了 {len(daily_scores)} 天的数据")
     return daily_scores
 
 def save_lover_results(daily_scores):
@@ -163,34 +99,7 @@ def save_lover_results(daily_scores):
     filename = "爱人一生每日分数_1998-2055.csv"
     filepath = os.path.join(os.path.dirname(__file__), filename)
     
-    print(f"💾 正在保存到 {filepath}...")
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['date', 'year', 'dayun_ganzhi', 'liunian_ganzhi', 'liuyue_ganzhi', 'liuri_ganzhi',
-                     'dayun_score', 'liunian_score', 'liuyue_score', 'liuri_score', 'final_score']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        # 写入表头
-        writer.writerow({
-            'date': '日期',
-            'year': '年份',
-            'dayun_ganzhi': '大运干支',
-            'liunian_ganzhi': '流年干支',
-            'liuyue_ganzhi': '流月干支',
-            'liuri_ganzhi': '流日干支',
-            'dayun_score': '大运分数',
-            'liunian_score': '流年分数',
-            'liuyue_score': '流月分数',
-            'liuri_score': '流日分数',
-            'final_score': '最终总分'
-        })
-        
-        # 写入数据
-        for row in daily_scores:
-            writer.writerow(row)
-    
-    print(f"✅ 结果已保存到: {filepath}")
-    return filepath
+    return save_daily_scores(daily_scores, filepath)
 
 def analyze_lover_results(daily_scores):
     """分析爱人的数据结果"""
@@ -1,67 +1,67 @@
 #!/usr/bin/env python3
 """
 图表数据API
-从CSV文件中提取图表数据，为前端提供折线图数据
+从一生每日分数中提取图表数据，为前端提供折线图数据
 """
 
-import csv
 import os
 import datetime
+import threading
 from collections import defaultdict
-from flask import jsonify
 
 class ChartDataAPI:
-    def __init__(self, csv_file_path=None):
+    def __init__(self, csv_file_path=None, lazy=False):
+        """lazy=True 时不在构造时读取数据，第一次访问 series/store 时才加载"""
         if csv_file_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             csv_file_path = os.path.join(current_dir, "最终版一生每日分数_1995-2055.csv")
         
         self.csv_file_path = csv_file_path
-        self.data_cache = None
-        self._load_data()
+        self._series = None
+        self._store = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self._load_data()
     
     def _load_data(self):
-        """加载CSV数据到内存"""
-        self.data_cache = []
+        """加载一生每日分数并建立按日序号索引的前缀和存储"""
+        # numpy 等依赖在真正需要数据时才导入
+        from daily_score_series import load_daily_series
+        from score_store import ScoreStore
+        
+        self._series = None
+        self._store = None
         try:
-            with open(self.csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # 跳过表头行（中文表头）
-                    if row['日期'] == '日期':
-                        continue
-                    
-                    # 处理数据
-                    try:
-                        processed_row = {
-                            'date': row['日期'],
-                            'year': int(row['年份']),
-                            'dayun_ganzhi': row['大运干支'],
-                            'liunian_ganzhi': row['流年干支'],
-                            'liuyue_ganzhi': row['流月干支'],
-                            'liuri_ganzhi': row['流日干支'],
-                            'dayun_score': int(row['大运分数']),
-                            'liunian_score': int(row['流年分数']),
-                            'liuyue_score': int(row['流月分数']),
-                            'liuri_score': int(row['流日分数']),
-                            'final_score': int(row['最终总分'])
-                        }
-                        self.data_cache.append(processed_row)
-                    except (ValueError, KeyError) as e:
-                        continue
-                        
-            print(f"✅ 成功加载 {len(self.data_cache)} 条数据记录")
+            self._series = load_daily_series(self.csv_file_path)
+            self._store = ScoreStore(self._series)
+            print(f"✅ 成功加载 {len(self._store)} 条数据记录")
             
         except FileNotFoundError:
             print(f"❌ 数据文件不存在: {self.csv_file_path}")
-            self.data_cache = []
         except Exception as e:
             print(f"❌ 加载数据时出错: {str(e)}")
-            self.data_cache = []
+        self._loaded = True
+    
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._load_data()
+    
+    @property
+    def series(self):
+        self._ensure_loaded()
+        return self._series
+    
+    @property
+    def store(self):
+        self._ensure_loaded()
+        return self._store
     
     def get_dayun_chart_data(self):
         """获取大运图表数据 - 一生大运趋势"""
-        if not self.data_cache:
+        if not self.store:
             return {'labels': [], 'data': [], 'current_index': 0}
         
         # 大运周期定义
@@ -81,12 +81,10 @@ class ChartDataAPI:
         current_year = datetime.datetime.now().year
         
         for i, period in enumerate(dayun_periods):
-            # 计算该大运期的平均分
-            period_data = [item for item in self.data_cache 
-                          if period['start_year'] <= item['year'] < period['end_year']]
+            # 该大运期的平均分（前缀和区间查询）
+            avg_score = self.store.years_average(period['start_year'], period['end_year'])
             
-            if period_data:
-                avg_score = sum(item['final_score'] for item in period_data) / len(period_data)
+            if avg_score is not None:
                 labels.append(period['label'])
                 data.append(round(avg_score, 1))
                 
@@ -102,7 +100,7 @@ class ChartDataAPI:
     
     def get_liunian_chart_data(self):
         """获取流年图表数据 - 当前大运和下一个大运的流年趋势"""
-        if not self.data_cache:
+        if not self.store:
             return {'labels': [], 'data': [], 'current_index': 0}
         
         current_year = datetime.datetime.now().year
@@ -129,11 +127,10 @@ class ChartDataAPI:
         current_index = 0
         
         for i, year in enumerate(all_years):
-            # 计算该年的平均分
-            year_data = [item for item in self.data_cache if item['year'] == year]
+            # 该年的平均分
+            avg_score = self.store.year_average(year)
             
-            if year_data:
-                avg_score = sum(item['final_score'] for item in year_data) / len(year_data)
+            if avg_score is not None:
                 labels.append(f"{year}年")
                 data.append(round(avg_score, 1))
                 
@@ -148,7 +145,7 @@ class ChartDataAPI:
     
     def get_liuyue_chart_data(self):
         """获取流月图表数据 - 今年和明年全部月份"""
-        if not self.data_cache:
+        if not self.store:
             return {'labels': [], 'data': [], 'current_index': 0}
         
         current_date = datetime.datetime.now()
@@ -166,13 +163,10 @@ class ChartDataAPI:
         current_index = 0
         
         for i, (year, month) in enumerate(years_months):
-            # 计算该月的平均分
-            month_data = [item for item in self.data_cache 
-                         if item['year'] == year and 
-                         datetime.datetime.strptime(item['date'], '%Y-%m-%d').month == month]
+            # 该月的平均分
+            avg_score = self.store.month_average(year, month)
             
-            if month_data:
-                avg_score = sum(item['final_score'] for item in month_data) / len(month_data)
+            if avg_score is not None:
                 labels.append(f"{year}年{month}月")
                 data.append(round(avg_score, 1))
                 
@@ -187,13 +181,13 @@ class ChartDataAPI:
     
     def get_liuri_chart_data(self):
         """获取流日图表数据 - 本月和下个月每日分数"""
-        if not self.data_cache:
+        if not self.store:
             return {'labels': [], 'data': [], 'current_index': 0}
+        from score_store import month_bounds
         
         current_date = datetime.datetime.now()
         current_year = current_date.year
         current_month = current_date.month
-        current_day = current_date.day
         
         # 本月和下个月
         next_month = current_month + 1
@@ -202,36 +196,18 @@ class ChartDataAPI:
             next_month = 1
             next_year = current_year + 1
         
-        # 收集本月和下个月的所有日期数据
-        target_dates = []
-        
-        # 本月
-        current_month_data = [item for item in self.data_cache 
-                             if item['year'] == current_year and 
-                             datetime.datetime.strptime(item['date'], '%Y-%m-%d').month == current_month]
-        target_dates.extend(current_month_data)
+        # 本月第一天到下个月最后一天是一段连续区间，直接切片
+        start_date, _ = month_bounds(current_year, current_month)
+        _, end_date = month_bounds(next_year, next_month)
+        dates, scores = self.store.slice(start_date, end_date)
         
-        # 下个月
-        next_month_data = [item for item in self.data_cache 
-                          if item['year'] == next_year and 
-                          datetime.datetime.strptime(item['date'], '%Y-%m-%d').month == next_month]
-        target_dates.extend(next_month_data)
-        
-        # 按日期排序
-        target_dates.sort(key=lambda x: x['date'])
-        
-        labels = []
-        data = []
+        labels = [f"{date.month}月{date.day}日" for date in dates]
+        data = scores.tolist()
         current_index = 0
-        current_date_str = current_date.strftime('%Y-%m-%d')
         
-        for i, item in enumerate(target_dates):
-            date_obj = datetime.datetime.strptime(item['date'], '%Y-%m-%d')
-            labels.append(f"{date_obj.month}月{date_obj.day}日")
-            data.append(item['final_score'])
-            
-            if item['date'] == current_date_str:
-                current_index = i
+        today = current_date.date()
+        if today in dates:
+            current_index = dates.index(today)
         
         return {
             'labels': labels,
@@ -239,11 +215,12 @@ class ChartDataAPI:
             'current_index': current_index
         }
 
-# 创建全局实例
-chart_api = ChartDataAPI()
+# 创建全局实例（数据在第一次请求时加载）
+chart_api = ChartDataAPI(lazy=True)
 
 def get_dayun_chart_api():
     """大运图表API"""
+    from flask import jsonify
     try:
         result = chart_api.get_dayun_chart_data()
         return jsonify({'success': True, 'data': result})
@@ -252,6 +229,7 @@ def get_dayun_chart_api():
 
 def get_liunian_chart_api():
     """流年图表API"""
+    from flask import jsonify
     try:
         result = chart_api.get_liunian_chart_data()
         return jsonify({'success': True, 'data': result})
@@ -260,6 +238,7 @@ def get_liunian_chart_api():
 
 def get_liuyue_chart_api():
     """流月图表API"""
+    from flask import jsonify
     try:
         result = chart_api.get_liuyue_chart_data()
         return jsonify({'success': True, 'data': result})
@@ -268,6 +247,7 @@ def get_liuyue_chart_api():
 
 def get_liuri_chart_api():
     """流日图表API"""
+    from flask import jsonify
     try:
         result = chart_api.get_liuri_chart_data()
         return jsonify({'success': True, 'data': result})
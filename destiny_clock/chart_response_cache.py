@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+图表接口响应缓存
+图表数据只在日期变化或数据文件更新时才会改变，因此把序列化后的JSON
+按（接口, 档案, 当天日期）缓存起来，并提供ETag供轮询方做条件请求(304)
+"""
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+# 接口名 → ChartDataAPI 方法名
+CHART_ENDPOINTS = {
+    'dayun': 'get_dayun_chart_data',
+    'liunian': 'get_liunian_chart_data',
+    'liuyue': 'get_liuyue_chart_data',
+    'liuri': 'get_liuri_chart_data',
+}
+
+DEFAULT_PROFILE = 'default'
+
+
+def make_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """判断请求头 If-None-Match 是否命中当前ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # 忽略弱校验前缀 W/
+    candidates = [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+    return '*' in candidates or etag in candidates
+
+
+class ChartResponseCache:
+    """按（接口, 档案, 日期）缓存图表接口的JSON响应"""
+
+    def __init__(self, chart_apis):
+        """chart_apis: {档案名: ChartDataAPI实例}"""
+        self.chart_apis = dict(chart_apis)
+        self._cache = {}
+        self._cache_date = None
+        # 各档案数据文件的修改时间，第一次请求该档案时记录（不在构造时触发数据加载）
+        self._data_mtimes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _data_mtime(self, chart_api):
+        """数据文件的修改时间（CSV与二进制文件取较新者）"""
+        mtimes = []
+        paths = [chart_api.csv_file_path]
+        if getattr(chart_api, 'series', None) is not None:
+            paths.append(chart_api.series.filepath)
+        for path in paths:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                continue
+        return max(mtimes) if mtimes else None
+
+    def _check_invalidation(self, profile, chart_api):
+        """跨过零点清空全部缓存；数据文件变化时重新加载该档案"""
+        today = datetime.date.today()
+        if self._cache_date != today:
+            self._cache.clear()
+            self._cache_date = today
+
+        mtime = self._data_mtime(chart_api)
+        if profile not in self._data_mtimes:
+            self._data_mtimes[profile] = mtime
+        elif mtime != self._data_mtimes[profile]:
+            print(f"🔄 图表数据文件已更新，重新加载档案 {profile}")
+            chart_api._load_data()
+            self._data_mtimes[profile] = self._data_mtime(chart_api)
+            for key in [key for key in self._cache if key[1] == profile]:
+                del self._cache[key]
+        return today
+
+    def get_response(self, endpoint, profile=DEFAULT_PROFILE):
+        """返回 (JSON字节, ETag)
+
+        未知接口或档案抛出KeyError；计算出错时抛出原异常（不缓存）
+        """
+        if endpoint not in CHART_ENDPOINTS:
+            raise KeyError(endpoint)
+        chart_api = self.chart_apis[profile]
+
+        with self._lock:
+            today = self._check_invalidation(profile, chart_api)
+            key = (endpoint, profile, today)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+            self.misses += 1
+            data = getattr(chart_api, CHART_ENDPOINTS[endpoint])()
+            body = json.dumps({'success': True, 'data': data}).encode('utf-8')
+            entry = (body, make_etag(body))
+            self._cache[key] = entry
+            return entry
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
@@ -20,11 +20,14 @@ from yongshen_based_algorithm import YongshenBasedAnalyzer
 from professional_scoring_system import ProfessionalScoringSystem
 from enhanced_scoring_system import EnhancedScoringSystem
 from enhanced_layered_scoring import EnhancedLayeredScoring
+from natal_analysis_cache import get_natal_cache, natal_key
 
 class ComprehensiveScoringSystem:
     """综合八字计分系统：用神忌神 + 十神地支双重分析"""
     
-    def __init__(self):
+    def __init__(self, natal_cache=None):
+        # 本命盘部分的分析结果只取决于出生信息，各接口共用同一缓存
+        self.natal_cache = natal_cache or get_natal_cache()
         self.yongshen_analyzer = YongshenBasedAnalyzer()
         self.professional_system = ProfessionalScoringSystem()
         self.enhanced_system = EnhancedScoringSystem()
@@ -41,10 +44,9 @@ class ComprehensiveScoringSystem:
     def analyze_comprehensive_fortune(self, birth_year, birth_month, birth_day, birth_hour, gender='male'):
         """综合分析命运（用于替换原LayeredScoringSystem）"""
         try:
-            # 创建八字
-            solar = Solar.fromYmdHms(birth_year, birth_month, birth_day, birth_hour, 0, 0)
-            lunar = solar.getLunar()
-            natal_ba = lunar.getEightChar()
+            # 本命盘特征（缓存）：四柱、藏干、十神、五行、格局、身强弱只提取一次，
+            # 各计分器直接使用，也可当作 EightChar 传递
+            natal_ba = self.natal_cache.get_features(birth_year, birth_month, birth_day, birth_hour, gender)
             
             # 获取当前时间八字
             now = datetime.datetime.now()
@@ -52,17 +54,26 @@ class ComprehensiveScoringSystem:
             current_lunar = current_solar.getLunar()
             current_ba = current_lunar.getEightChar()
             
+            key = natal_key(birth_year, birth_month, birth_day, birth_hour, gender)
+            birth_date = f'{birth_year}-{birth_month}-{birth_day}'
+            
             # 第1部分：用神忌神分析（原有的核心逻辑）
-            yongshen_analysis = self.yongshen_analyzer.analyze_yongshen_jishen(natal_ba)
+            yongshen_analysis = self.natal_cache.get_or_compute(
+                'yongshen', key, lambda: self.yongshen_analyzer.analyze_yongshen_jishen(natal_ba)
+            )
             
             # 第2部分：专业十神地支分析
-            professional_analysis = self.professional_system.calculate_professional_score(
-                natal_ba, f'{birth_year}-{birth_month}-{birth_day}', gender
+            professional_analysis = self.natal_cache.get_or_compute(
+                'professional', key,
+                lambda: self.professional_system.calculate_professional_score(natal_ba, birth_date, gender)
             )
             
             # 第3部分：增强版情境化分析（新增）
-            enhanced_analysis = self.enhanced_system.calculate_enhanced_score(
-                natal_ba, f'{birth_year}-{birth_month}-{birth_day}', gender
+            enhanced_analysis = self.natal_cache.get_or_compute(
+                'enhanced', key,
+                lambda: self.enhanced_system.calculate_enhanced_score(
+                    natal_ba, birth_date, gender, base_result=professional_analysis
+                )
             )
             
             # 综合计分（使用增强版分层系统）
@@ -12,6 +12,8 @@ import matplotlib.dates as mdates
 from collections import defaultdict
 import statistics
 
+from daily_score_series import load_daily_series
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['PingFang SC', 'SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
@@ -34,29 +36,15 @@ class CoupleAverageCalculator:
         print(f"   爱人数据: {len(self.lover_data)}天")
     
     def load_data(self, csv_file_path, person_name):
-        """加载CSV数据"""
+        """加载一生每日分数（优先内存映射二进制列式文件）"""
         data = {}  # 使用字典，以日期为key
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':
-                        continue
-                    try:
-                        date_str = row['日期']
-                        date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-                        
-                        data[date_str] = {
-                            'date_obj': date_obj,
-                            'year': int(row['年份']),
-                            'final_score': int(row['最终总分']),
-                            'dayun_ganzhi': row['大运干支'],
-                            'liunian_ganzhi': row['流年干支'],
-                            'liuyue_ganzhi': row['流月干支'],
-                            'liuri_ganzhi': row['流日干支']
-                        }
-                    except (ValueError, KeyError):
-                        continue
+            rows = load_daily_series(csv_file_path).rows([
+                'date', 'date_obj', 'year', 'final_score', 'dayun_ganzhi',
+                'liunian_ganzhi', 'liuyue_ganzhi', 'liuri_ganzhi'
+            ])
+            for row in rows:
+                data[row.pop('date')] = row
         except FileNotFoundError:
             print(f"❌ {person_name}的数据文件不存在: {csv_file_path}")
         
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+一生每日分数的二进制列式存储
+替代逐行 csv.DictReader + strptime 的CSV解析：分数列用 int8/int16，
+干支列存六十甲子序号(uint8)，日期存自1970-01-01起的天数(int32)。
+读取时整个文件内存映射，多个进程共享同一份页缓存。
+
+文件布局:
+    4字节魔数 | 4字节头长度 | JSON头(列名/类型/偏移) | 按64字节对齐的各列数据
+"""
+
+import os
+import csv
+import json
+import struct
+import tempfile
+import datetime
+
+import numpy as np
+
+from ganzhi_calendar import GANZHI_60, GANZHI_INDEX
+
+_MAGIC = b'DSS1'
+_ALIGN = 64
+_EPOCH = datetime.date(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+# 列名 → 存储类型
+COLUMNS = [
+    ('day', '<i4'),
+    ('year', '<i2'),
+    ('dayun_index', 'u1'),
+    ('liunian_index', 'u1'),
+    ('liuyue_index', 'u1'),
+    ('liuri_index', 'u1'),
+    ('dayun_score', 'i1'),
+    ('liunian_score', 'i1'),
+    ('liuyue_score', 'i1'),
+    ('liuri_score', 'i1'),
+    ('final_score', '<i2'),
+]
+
+GANZHI_LAYERS = ('dayun', 'liunian', 'liuyue', 'liuri')
+SCORE_COLUMNS = ('dayun_score', 'liunian_score', 'liuyue_score', 'liuri_score', 'final_score')
+
+# CSV中文列名 → 字段名
+CSV_COLUMNS = {
+    '日期': 'date',
+    '年份': 'year',
+    '大运干支': 'dayun_ganzhi',
+    '流年干支': 'liunian_ganzhi',
+    '流月干支': 'liuyue_ganzhi',
+    '流日干支': 'liuri_ganzhi',
+    '大运分数': 'dayun_score',
+    '流年分数': 'liunian_score',
+    '流月分数': 'liuyue_score',
+    '流日分数': 'liuri_score',
+    '最终总分': 'final_score'
+}
+
+
+def binary_path_for(csv_file_path):
+    """CSV对应的二进制文件路径（同名，扩展名.bin）"""
+    return os.path.splitext(csv_file_path)[0] + '.bin'
+
+
+def date_to_day(date):
+    """日期 → 自1970-01-01起的天数"""
+    return date.toordinal() - _EPOCH_ORDINAL
+
+
+def day_to_date(day):
+    return datetime.date.fromordinal(int(day) + _EPOCH_ORDINAL)
+
+
+def rows_to_arrays(rows):
+    """逐日字典列表（date为YYYY-MM-DD字符串）→ 列数组"""
+    arrays = {
+        'day': np.array([date_to_day(datetime.date.fromisoformat(row['date'])) for row in rows], dtype=np.int32),
+        'year': np.array([int(row['year']) for row in rows], dtype=np.int16),
+    }
+    for layer in GANZHI_LAYERS:
+        arrays[f'{layer}_index'] = np.array(
+            [GANZHI_INDEX[row[f'{layer}_ganzhi']] for row in rows], dtype=np.uint8)
+    for column in SCORE_COLUMNS:
+        arrays[column] = np.array([int(row[column]) for row in rows])
+    return arrays
+
+
+def write_daily_series(filepath, arrays):
+    """把列数组写成二进制列式文件
+
+    arrays 可以是 rows_to_arrays 的结果，也可以是 lifetime_score_engine
+    的计算结果（带 ordinal 列而没有 day 列）
+    """
+    if 'day' not in arrays:
+        arrays = dict(arrays, day=np.asarray(arrays['ordinal']) - _EPOCH_ORDINAL)
+
+    count = len(arrays['day'])
+    columns = []
+    for name, dtype in COLUMNS:
+        data = np.ascontiguousarray(np.asarray(arrays[name]).astype(dtype))
+        columns.append((name, dtype, data))
+
+    # 先确定头的长度，再计算各列在文件中的绝对偏移
+    layout = []
+    header = {'count': count, 'epoch': _EPOCH.isoformat(), 'columns': layout}
+    header_bytes = b''
+    while True:
+        position = len(_MAGIC) + 4 + len(header_bytes)
+        layout.clear()
+        for name, dtype, data in columns:
+            position += -position % _ALIGN
+            layout.append({'name': name, 'dtype': dtype, 'offset': position})
+            position += data.nbytes
+        new_header_bytes = json.dumps(header).encode('utf-8')
+        if len(new_header_bytes) == len(header_bytes):
+            header_bytes = new_header_bytes
+            break
+        header_bytes = new_header_bytes
+
+    # 每次写入用各自唯一的临时文件再改名，多个进程同时生成同一个.bin也不会写进同一个临时文件
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)),
+                                    prefix=os.path.basename(filepath) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            for (name, dtype, data), column in zip(columns, layout):
+                f.write(b'\0' * (column['offset'] - f.tell()))
+                f.write(data.tobytes())
+        os.chmod(tmp_path, 0o644)   # mkstemp 建的文件只有本人可读写
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filepath
+
+
+class DailyScoreSeries:
+    """内存映射的一生每日分数（只读）"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._buffer = np.memmap(filepath, dtype=np.uint8, mode='r')
+
+        if bytes(self._buffer[:4]) != _MAGIC:
+            raise ValueError(f"不是每日分数二进制文件: {filepath}")
+        header_length = struct.unpack('<I', bytes(self._buffer[4:8]))[0]
+        self.header = json.loads(bytes(self._buffer[8:8 + header_length]).decode('utf-8'))
+        self.count = self.header['count']
+
+        self.columns = {}
+        for column in self.header['columns']:
+            self.columns[column['name']] = np.frombuffer(
+                self._buffer, dtype=column['dtype'], count=self.count, offset=column['offset'])
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def dates(self):
+        """datetime64[D] 日期数组"""
+        return self.columns['day'].astype('datetime64[D]')
+
+    def ganzhi_names(self, layer):
+        """某一层（dayun/liunian/liuyue/liuri）的干支文字列表"""
+        return [GANZHI_60[i] for i in self.columns[f'{layer}_index'].tolist()]
+
+    def rows(self, fields):
+        """按需组装逐日字典列表，字段可选:
+        date, date_obj, year, month, day, weekday, *_ganzhi, *_score
+        """
+        date_objs = [day_to_date(day) for day in self.columns['day'].tolist()]
+        values = {}
+        for field in fields:
+            if field == 'date':
+                values[field] = [d.isoformat() for d in date_objs]
+            elif field == 'date_obj':
+                values[field] = date_objs
+            elif field == 'month':
+                values[field] = [d.month for d in date_objs]
+            elif field == 'day':
+                values[field] = [d.day for d in date_objs]
+            elif field == 'weekday':
+                values[field] = [d.weekday() for d in date_objs]
+            elif field.endswith('_ganzhi'):
+                values[field] = self.ganzhi_names(field[:-len('_ganzhi')])
+            else:
+                values[field] = self.columns[field].tolist()
+
+        columns = [values[field] for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+def _check_row(row):
+    """字段不完整或无法解析时抛出 ValueError / KeyError / TypeError"""
+    datetime.date.fromisoformat(row['date'])
+    int(row['year'])
+    for layer in GANZHI_LAYERS:
+        GANZHI_INDEX[row[f'{layer}_ganzhi']]
+    for column in SCORE_COLUMNS:
+        int(row[column])
+
+
+def _read_csv_rows(csv_file_path):
+    """读取CSV数据行，与原来各加载函数一样跳过日期、年份、干支或分数解析失败的行"""
+    rows = []
+    skipped = 0
+    with open(csv_file_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if row.get('日期') == '日期':  # 跳过中文表头
+                continue
+            row = {CSV_COLUMNS[key]: value for key, value in row.items() if key in CSV_COLUMNS}
+            try:
+                _check_row(row)
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+                continue
+            rows.append(row)
+    if skipped:
+        print(f"⚠️ {os.path.basename(csv_file_path)} 中有{skipped}行无法解析，已跳过")
+    return rows
+
+
+_series_cache = {}
+
+
+def load_daily_series(csv_file_path):
+    """加载一生每日分数（所有消费方共用）
+
+    优先内存映射同名.bin文件；.bin不存在或比CSV旧时解析一次CSV并生成.bin。
+    CSV和.bin都不存在时抛出FileNotFoundError。
+    """
+    binary_path = binary_path_for(csv_file_path)
+    csv_exists = os.path.exists(csv_file_path)
+    binary_fresh = os.path.exists(binary_path) and (
+        not csv_exists or os.path.getmtime(binary_path) >= os.path.getmtime(csv_file_path))
+
+    if not binary_fresh:
+        if not csv_exists:
+            raise FileNotFoundError(csv_file_path)
+        arrays = rows_to_arrays(_read_csv_rows(csv_file_path))
+        try:
+            write_daily_series(binary_path, arrays)
+        except OSError as e:
+            # 目录不可写时直接使用内存中的数据（不缓存）
+            print(f"⚠️ 无法生成二进制缓存，直接使用CSV: {e}")
+            return _InMemorySeries(arrays, csv_file_path)
+
+    mtime = os.path.getmtime(binary_path)
+    cached = _series_cache.get(binary_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    series = DailyScoreSeries(binary_path)
+    _series_cache[binary_path] = (mtime, series)
+    return series
+
+
+class _InMemorySeries(DailyScoreSeries):
+    """无法写.bin时的内存版本，接口与DailyScoreSeries相同"""
+
+    def __init__(self, arrays, filepath):
+        self.filepath = filepath
+        self.header = {}
+        self.columns = {name: np.asarray(arrays[name]).astype(dtype) for name, dtype in COLUMNS}
+        self.count = len(self.columns['day'])
+
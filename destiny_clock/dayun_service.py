@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+大运服务
+每个命盘的完整大运时间线只用 EightChar.getYun().getDaYun() 推算一次并缓存，
+"某日处于哪步大运" 按起运年龄二分查找。
+BaziCalculator、LayeredScoringSystem、EnhancedLayeredScoring 和个人一生计算器共用。
+"""
+
+import datetime
+from bisect import bisect_right
+
+from lunar_python import Solar
+
+from natal_analysis_cache import get_natal_cache
+
+# 1995年6月11日寅时男性的标准大运序列（根据命令行专业库结果手动整理）
+KNOWN_DAYUN_SEQUENCES = {
+    (1995, 6, 11, 'male'): [
+        {'ganzhi': '辛巳', 'start_age': 2, 'end_age': 12},
+        {'ganzhi': '庚辰', 'start_age': 12, 'end_age': 22},
+        {'ganzhi': '己卯', 'start_age': 22, 'end_age': 32},
+        {'ganzhi': '戊寅', 'start_age': 32, 'end_age': 42},
+        {'ganzhi': '丁丑', 'start_age': 42, 'end_age': 52},
+        {'ganzhi': '丙子', 'start_age': 52, 'end_age': 62},
+        {'ganzhi': '乙亥', 'start_age': 62, 'end_age': 72},
+        {'ganzhi': '甲戌', 'start_age': 72, 'end_age': 82},
+        {'ganzhi': '癸酉', 'start_age': 82, 'end_age': 92},
+    ]
+}
+
+DEFAULT_DAYUN = {'gan': '甲', 'zhi': '子'}
+
+
+class DayunTimeline:
+    """一个命盘的大运时间线（按起运年龄升序）
+
+    steps 中第0步可能是起运前的童限，干支为空字符串
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.start_ages = [step['start_age'] for step in steps]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def at_age(self, age):
+        """age 岁所处的大运，不在任何一步内时返回None"""
+        i = bisect_right(self.start_ages, age) - 1
+        if i < 0:
+            return None
+        step = self.steps[i]
+        if age < step['end_age']:
+            return step
+        return None
+
+    def at_date(self, birth_year, date):
+        """按虚岁口径（当前年份 - 出生年份）查找某日所处的大运"""
+        return self.at_age(date.year - birth_year)
+
+
+def _compute_timeline(birth_year, birth_month, birth_day, birth_hour, gender_code, count):
+    solar = Solar.fromYmdHms(birth_year, birth_month, birth_day, birth_hour, 0, 0)
+    yun = solar.getLunar().getEightChar().getYun(gender_code)
+    dayuns = yun.getDaYun() if count is None else yun.getDaYun(count)
+    return DayunTimeline([
+        {'ganzhi': str(dayun.getGanZhi()), 'start_age': dayun.getStartAge(), 'end_age': dayun.getEndAge()}
+        for dayun in dayuns
+    ])
+
+
+def get_dayun_timeline(birth_year, birth_month, birth_day, birth_hour=4, gender_code=0, count=None):
+    """推算并缓存大运时间线
+
+    gender_code 直接传给 EightChar.getYun；count 为 None 时取专业库默认步数
+    """
+    key = (birth_year, birth_month, birth_day, birth_hour, gender_code, count)
+    return get_natal_cache().get_or_compute(
+        'dayun_timeline', key,
+        lambda: _compute_timeline(birth_year, birth_month, birth_day, birth_hour, gender_code, count),
+        persist=False
+    )
+
+
+def known_dayun_timeline(birth_year, birth_month, birth_day, gender='male'):
+    """手动整理过的标准大运序列，没有时返回None"""
+    steps = KNOWN_DAYUN_SEQUENCES.get((birth_year, birth_month, birth_day, gender))
+    return DayunTimeline(steps) if steps else None
+
+
+def _default_timeline(birth_year, birth_month, birth_day, gender):
+    # 沿用原有约定：寅时起盘，0表示男性、1表示女性
+    return get_dayun_timeline(birth_year, birth_month, birth_day, 4, 0 if gender == 'male' else 1)
+
+
+def dayun_at_date(birth_year, birth_month, birth_day, date=None, gender='male'):
+    """某日所处大运 → {'gan': ..., 'zhi': ...}，无法确定时返回甲子"""
+    date = date or datetime.date.today()
+    try:
+        known = known_dayun_timeline(birth_year, birth_month, birth_day, gender)
+        step = known.at_date(birth_year, date) if known else None
+        if step is None:
+            step = _default_timeline(birth_year, birth_month, birth_day, gender).at_date(birth_year, date)
+        if step and step['ganzhi']:
+            return {'gan': step['ganzhi'][0], 'zhi': step['ganzhi'][1]}
+    except Exception as e:
+        print(f"大运查询失败: {str(e)}")
+    return dict(DEFAULT_DAYUN)
+
+
+def all_dayun(birth_year, birth_month, birth_day, gender='male'):
+    """全部大运 [{'ganzhi', 'start_age', 'end_age'}, ...]（返回副本）"""
+    known = known_dayun_timeline(birth_year, birth_month, birth_day, gender)
+    if known:
+        return [dict(step) for step in known.steps[:8]]
+    return [dict(step) for step in _default_timeline(birth_year, birth_month, birth_day, gender).steps]
@@ -17,6 +17,8 @@ sys.path.insert(0, bazi_lib_path)
 
 from lunar_python import Solar, Lunar
 from enhanced_scoring_system import ContextualShishenScoring, CombinationEffectScoring, PatternDetector
+from natal_features import natal_features
+from dayun_service import dayun_at_date
 
 class EnhancedLayeredScoring:
     """增强版分层叠加评分系统"""
@@ -71,9 +73,10 @@ class EnhancedLayeredScoring:
     def analyze_base_fortune(self, natal_ba, gender):
         """分析基本盘（本命盘）"""
         try:
-            # 识别格局和身强弱
-            pattern = self.pattern_detector.detect_bazi_pattern(natal_ba)
-            strength = self.pattern_detector.detect_body_strength(natal_ba)
+            # 识别格局和身强弱（与增强计分共用同一份本命特征）
+            natal_ba = natal_features(natal_ba)
+            pattern = natal_ba.pattern
+            strength = natal_ba.body_strength
             
             # 情境化十神评分
             contextual_score = self.contextual_scorer.calculate_contextual_shishen_score(
@@ -366,13 +369,10 @@ class EnhancedLayeredScoring:
         }
 
     def get_current_dayun(self, birth_year, birth_month, birth_day, gender='male'):
-        """获取当前大运（复用原有逻辑）"""
+        """获取当前大运（使用缓存的大运时间线）"""
         try:
-            from bazi_calculator import BaziCalculator
-            calculator = BaziCalculator()
-            
             current_date = datetime.date.today()
-            dayun_result = calculator.calculate_dayun(birth_year, birth_month, birth_day, current_date, gender)
+            dayun_result = dayun_at_date(birth_year, birth_month, birth_day, current_date, gender)
             
             if dayun_result and 'gan' in dayun_result and 'zhi' in dayun_result:
                 return dayun_result['gan'] + dayun_result['zhi']
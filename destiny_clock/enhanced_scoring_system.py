@@ -16,6 +16,7 @@ sys.path.insert(0, bazi_lib_path)
 
 from lunar_python import Solar, Lunar
 from professional_scoring_system import ProfessionalScoringSystem
+from natal_features import natal_features
 
 class ContextualShishenScoring:
     """情境化十神评分系统"""
@@ -190,31 +191,15 @@ class ContextualShishenScoring:
         """获取四柱所有十神"""
         pillars = []
         try:
-            # 年柱
-            year_gan_shishen = ba.getYearShiShenGan() if hasattr(ba, 'getYearShiShenGan') else '未知'
-            year_zhi_shishen = ba.getYearShiShenZhi() if hasattr(ba, 'getYearShiShenZhi') else ['未知']
-            pillars.append(('年干', year_gan_shishen))
-            if isinstance(year_zhi_shishen, list) and year_zhi_shishen:
-                pillars.append(('年支', year_zhi_shishen[0]))  # 取主气
-            
-            # 月柱
-            month_gan_shishen = ba.getMonthShiShenGan() if hasattr(ba, 'getMonthShiShenGan') else '未知'
-            month_zhi_shishen = ba.getMonthShiShenZhi() if hasattr(ba, 'getMonthShiShenZhi') else ['未知']
-            pillars.append(('月干', month_gan_shishen))
-            if isinstance(month_zhi_shishen, list) and month_zhi_shishen:
-                pillars.append(('月支', month_zhi_shishen[0]))  # 取主气
-            
-            # 日柱（日干是自己，不算）
-            day_zhi_shishen = ba.getDayShiShenZhi() if hasattr(ba, 'getDayShiShenZhi') else ['未知']
-            if isinstance(day_zhi_shishen, list) and day_zhi_shishen:
-                pillars.append(('日支', day_zhi_shishen[0]))  # 取主气
-            
-            # 时柱
-            time_gan_shishen = ba.getTimeShiShenGan() if hasattr(ba, 'getTimeShiShenGan') else '未知'
-            time_zhi_shishen = ba.getTimeShiShenZhi() if hasattr(ba, 'getTimeShiShenZhi') else ['未知']
-            pillars.append(('时干', time_gan_shishen))
-            if isinstance(time_zhi_shishen, list) and time_zhi_shishen:
-                pillars.append(('时支', time_zhi_shishen[0]))  # 取主气
+            features = natal_features(ba)
+            # 日柱的日干是自己，不算；地支取主气
+            for pillar, gan_label, zhi_label in (('year', '年干', '年支'), ('month', '月干', '月支'),
+                                                 ('day', None, '日支'), ('time', '时干', '时支')):
+                if gan_label:
+                    pillars.append((gan_label, features.shishen_gan[pillar]))
+                zhi_shishen = features.shishen_zhi[pillar]
+                if isinstance(zhi_shishen, list) and zhi_shishen:
+                    pillars.append((zhi_label, zhi_shishen[0]))
                 
         except Exception as e:
             print(f"获取十神时出错: {str(e)}")
@@ -671,21 +656,26 @@ class EnhancedScoringSystem:
         self.combination_scorer = CombinationEffectScoring()
         self.pattern_detector = PatternDetector()
 
-    def calculate_enhanced_score(self, ba, birth_date, gender='male'):
-        """计算增强版综合分数"""
+    def calculate_enhanced_score(self, ba, birth_date, gender='male', base_result=None):
+        """计算增强版综合分数
+
+        base_result: 已算好的专业计分结果（同一命盘），传入时不再重复计算
+        """
         try:
             print("🚀 开始增强版八字评分分析...")
+            ba = natal_features(ba)
             
             # 1. 自动识别格局
-            pattern_type = self.pattern_detector.detect_bazi_pattern(ba)
+            pattern_type = ba.pattern
             print(f"📋 识别格局: {pattern_type}")
             
             # 2. 判断身强身弱
-            body_strength = self.pattern_detector.detect_body_strength(ba)
+            body_strength = ba.body_strength
             print(f"💪 身强弱: {body_strength}")
             
             # 3. 原有基础评分
-            base_result = self.base_system.calculate_professional_score(ba, birth_date, gender)
+            if base_result is None:
+                base_result = self.base_system.calculate_professional_score(ba, birth_date, gender)
             base_score = base_result.get('total_score', 0)
             print(f"📊 基础评分: {base_score}分")
             
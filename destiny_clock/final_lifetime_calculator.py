@@ -6,8 +6,6 @@
 
 import sys
 import os
-import datetime
-import csv
 from collections import defaultdict
 
 # 添加bazi_lib到Python路径
@@ -15,7 +13,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
-from lunar_python import Solar, Lunar
+from ganzhi_calendar import get_ganzhi_calendar
+from person_lifetime_calculator import BirthProfile, PersonLifetimeCalculator, save_daily_scores
 
 # 专属计分规则
 TIANGAN_SCORES = {
@@ -28,16 +27,17 @@ DIZHI_SCORES = {
     '午': 4, '未': 6, '申': 11, '酉': 8, '戌': 9, '亥': 7
 }
 
-# 大运周期
-USER_DAYUN_SEQUENCE = [
-    {'ganzhi': '辛巳', 'start_year': 1997, 'end_year': 2007},
-    {'ganzhi': '庚辰', 'start_year': 2007, 'end_year': 2017},
-    {'ganzhi': '己卯', 'start_year': 2017, 'end_year': 2027},
-    {'ganzhi': '戊寅', 'start_year': 2027, 'end_year': 2037},
-    {'ganzhi': '丁丑', 'start_year': 2037, 'end_year': 2047},
-    {'ganzhi': '丙子', 'start_year': 2047, 'end_year': 2057},
-    {'ganzhi': '乙亥', 'start_year': 2057, 'end_year': 2067},
-]
+# 用户出生信息：1995年6月11日寅时，男
+USER_PROFILE = BirthProfile(
+    name='用户',
+    birth_year=1995, birth_month=6, birth_day=11, birth_hour=4,
+    gender='male',
+    tiangan_scores=TIANGAN_SCORES,
+    dizhi_scores=DIZHI_SCORES
+)
+
+# 大运周期（由 EightChar.getYun 推算：辛巳1997、庚辰2007 …）
+USER_DAYUN_SEQUENCE = USER_PROFILE.dayun_sequence
 
 def get_ganzhi_score(gan, zhi):
     """计算干支分数"""
@@ -57,18 +57,8 @@ def get_dayun_for_year(year):
 def get_accurate_ganzhi_for_date(year, month, day):
     """获取指定日期的准确干支（考虑节气分界）"""
     try:
-        solar = Solar.fromYmdHms(year, month, day, 12, 0, 0)
-        lunar = solar.getLunar()
-        ba = lunar.getEightChar()
-        
-        return {
-            'year_gan': ba.getYearGan(),
-            'year_zhi': ba.getYearZhi(),
-            'month_gan': ba.getMonthGan(),
-            'month_zhi': ba.getMonthZhi(),
-            'day_gan': ba.getDayGan(),
-            'day_zhi': ba.getDayZhi()
-        }
+        # 查预先计算的干支日历表，避免每天构造Solar→Lunar→EightChar
+        return get_ganzhi_calendar().get_pillars(year, month, day)
     except Exception as e:
         print(f"获取{year}-{month}-{day}干支时出错: {e}")
         return None
@@ -82,71 +72,10 @@ def calculate_final_lifetime_scores(start_year=1995, end_year=2055):
     print(f"⚡ 使用节气分界算法")
     print(f"📊 预计天数: 约{(end_year - start_year + 1) * 365}天")
     
-    daily_scores = []
-    processed_days = 0
-    
-    # 按年计算
-    for year in range(start_year, end_year + 1):
-        print(f"   正在计算 {year}年...", end="")
-        
-        year_count = 0
-        
-        # 计算当年每一天
-        current_date = datetime.date(year, 1, 1)
-        end_date = datetime.date(year, 12, 31)
-        
-        while current_date <= end_date:
-            try:
-                # 获取当天的准确干支（考虑节气分界）
-                ganzhi = get_accurate_ganzhi_for_date(current_date.year, current_date.month, current_date.day)
-                
-                if ganzhi:
-                    # 获取大运
-                    current_dayun = get_dayun_for_year(year)
-                    dayun_gan, dayun_zhi = current_dayun[0], current_dayun[1]
-                    dayun_score = get_ganzhi_score(dayun_gan, dayun_zhi)
-                    
-                    # 计算各层分数
-                    liunian_score = get_ganzhi_score(ganzhi['year_gan'], ganzhi['year_zhi'])
-                    liuyue_score = get_ganzhi_score(ganzhi['month_gan'], ganzhi['month_zhi'])
-                    liuri_score = get_ganzhi_score(ganzhi['day_gan'], ganzhi['day_zhi'])
-                    
-                    # 最终总分
-                    final_score = dayun_score + liunian_score + liuyue_score + liuri_score
-                    
-                    # 记录数据
-                    daily_data = {
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'year': year,
-                        'dayun_ganzhi': current_dayun,
-                        'liunian_ganzhi': f"{ganzhi['year_gan']}{ganzhi['year_zhi']}",
-                        'liuyue_ganzhi': f"{ganzhi['month_gan']}{ganzhi['month_zhi']}",
-                        'liuri_ganzhi': f"{ganzhi['day_gan']}{ganzhi['day_zhi']}",
-                        'dayun_score': dayun_score,
-                        'liunian_score': liunian_score,
-                        'liuyue_score': liuyue_score,
-                        'liuri_score': liuri_score,
-                        'final_score': final_score
-                    }
-                    
-                    daily_scores.append(daily_data)
-                    year_count += 1
-                
-                current_date += datetime.timedelta(days=1)
-                processed_days += 1
-                
-            except Exception as e:
-                print(f"计算{current_date}时出错: {e}")
-                current_date += datetime.timedelta(days=1)
-                continue
-        
-        print(f" 完成({year_count}天)")
-        
-        # 每10年显示进度
-        if year % 10 == 0:
-            print(f"     📈 已处理 {processed_days} 天")
+    # 向量化批量计算：一次查表得到整个区间每天的四层分数
+    daily_scores = PersonLifetimeCalculator().calculate_daily_scores(USER_PROFILE, start_year, end_year)
     
-    print(f"\n✅ 计算完成！共处理了 {processed_days} 天的数据")
+    print(f"\n✅ 计算完成！共处理了 {len(daily_scores)} 天的数据")
     return daily_scores
 
 def save_final_results(daily_scores):
@@ -154,34 +83,7 @@ def save_final_results(daily_scores):
     filename = "最终版一生每日分数_1995-2055.csv"
     filepath = os.path.join(os.path.dirname(__file__), filename)
     
-    print(f"💾 正在保存到 {filepath}...")
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['date', 'year', 'dayun_ganzhi', 'liunian_ganzhi', 'liuyue_ganzhi', 'liuri_ganzhi',
-                     'dayun_score', 'liunian_score', 'liuyue_score', 'liuri_score', 'final_score']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        # 写入表头
-        writer.writerow({
-            'date': '日期',
-            'year': '年份',
-            'dayun_ganzhi': '大运干支',
-            'liunian_ganzhi': '流年干支',
-            'liuyue_ganzhi': '流月干支',
-            'liuri_ganzhi': '流日干支',
-            'dayun_score': '大运分数',
-            'liunian_score': '流年分数',
-            'liuyue_score': '流月分数',
-            'liuri_score': '流日分数',
-            'final_score': '最终总分'
-        })
-        
-        # 写入数据
-        for row in daily_scores:
-            writer.writerow(row)
-    
-    print(f"✅ 结果已保存到: {filepath}")
-    return filepath
+    return save_daily_scores(daily_scores, filepath)
 
 def analyze_final_results(daily_scores):
     """分析最终结果"""
@@ -4,42 +4,31 @@
 基于61年长时间序列数据的深度分析
 """
 
-import csv
 import os
-import datetime
-# 使用纯Python替代numpy
-from collections import defaultdict, Counter
+from collections import defaultdict
 import statistics
+from score_frame import ScoreFrame
+from score_groupby import group_rows
+from score_windows import RollingWindows, detect_shift_episodes
 
 class FortunePatternAnalyzer:
     
-    def __init__(self, csv_file_path=None):
+    def __init__(self, csv_file_path=None, frame=None):
         if csv_file_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             csv_file_path = os.path.join(current_dir, "最终版一生每日分数_1995-2055.csv")
         
-        self.data = self.load_data(csv_file_path)
+        self.frame = frame
+        self.data = frame.rows() if frame is not None else self.load_data(csv_file_path)
+        self.windows = RollingWindows([item['final_score'] for item in self.data])
         print(f"✅ 加载了 {len(self.data)} 天的数据进行分析")
     
     def load_data(self, csv_file_path):
-        """加载CSV数据"""
+        """加载一生每日分数（优先内存映射二进制列式文件），同时保留列式的 self.frame"""
         data = []
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':  # 跳过中文表头
-                        continue
-                    try:
-                        data.append({
-                            'date': row['日期'],
-                            'year': int(row['年份']),
-                            'dayun_ganzhi': row['大运干支'],
-                            'final_score': int(row['最终总分']),
-                            'date_obj': datetime.datetime.strptime(row['日期'], '%Y-%m-%d').date()
-                        })
-                    except (ValueError, KeyError):
-                        continue
+            self.frame = ScoreFrame.load(csv_file_path)
+            data = self.frame.rows()
         except FileNotFoundError:
             print(f"❌ 数据文件不存在: {csv_file_path}")
         
@@ -50,129 +39,101 @@ class FortunePatternAnalyzer:
         检测倒霉时段：运气突然大幅下降的时间段
         
         Args:
-            window_days: 检测窗口天数
+            window_days: 检测窗口天数，可以是多个，如 (7, 14, 30)，一次扫描完成
             drop_threshold: 下降阈值（分数）
+        
+        相互重叠的命中窗口合并为一个时段，以下降最大的窗口为代表
         """
-        print(f"🔍 检测倒霉时段（{window_days}天窗口，下降{drop_threshold}分以上）")
+        print(f"🔍 检测倒霉时段（{self._window_label(window_days)}天窗口，下降{drop_threshold}分以上）")
         print("=" * 60)
         
-        unlucky_periods = []
-        scores = [item['final_score'] for item in self.data]
-        
-        for i in range(len(scores) - window_days):
-            # 计算窗口前后的平均分
-            before_window = scores[max(0, i-window_days):i]
-            current_window = scores[i:i+window_days]
-            
-            if before_window and current_window:
-                before_avg = statistics.mean(before_window)
-                current_avg = statistics.mean(current_window)
-                drop = before_avg - current_avg
-                
-                if drop >= drop_threshold:
-                    start_date = self.data[i]['date_obj']
-                    end_date = self.data[i+window_days-1]['date_obj']
-                    
-                    unlucky_periods.append({
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'before_avg': before_avg,
-                        'current_avg': current_avg,
-                        'drop': drop,
-                        'dayun': self.data[i]['dayun_ganzhi'],
-                        'min_score': min(current_window),
-                        'max_score': max(current_window)
-                    })
-        
-        # 去重并排序（按下降幅度排序）
-        unlucky_periods.sort(key=lambda x: x['drop'], reverse=True)
+        unlucky_periods = self._detect_shift_periods(window_days, drop_threshold, -1, 'drop')
         
         print(f"📊 检测到 {len(unlucky_periods)} 个倒霉时段:")
         print()
         
         for i, period in enumerate(unlucky_periods[:10]):  # 只显示前10个最严重的
             print(f"🚨 倒霉时段 #{i+1}")
-            print(f"   时间: {period['start_date']} ~ {period['end_date']}")
+            print(f"   时间: {period['start_date']} ~ {period['end_date']} ({period['days']}天，{period['window_days']}天窗口)")
             print(f"   大运: {period['dayun']}")
-            print(f"   下降幅度: {period['before_avg']:.1f}分 → {period['current_avg']:.1f}分 (下降{period['drop']:.1f}分)")
+            print(f"   下降幅度: {period['before_avg']:.1f}分 → {period['current_avg']:.1f}分 (下降{period['drop']:.1f}分，{period['peak_date']}起)")
             print(f"   分数范围: {period['min_score']}-{period['max_score']}分")
             print()
         
         return unlucky_periods
     
     def detect_lucky_periods(self, window_days=7, rise_threshold=10):
-        """检测幸运时段：运气突然大幅上升的时间段"""
-        print(f"🌟 检测幸运时段（{window_days}天窗口，上升{rise_threshold}分以上）")
+        """检测幸运时段：运气突然大幅上升的时间段（参数同 detect_unlucky_periods）"""
+        print(f"🌟 检测幸运时段（{self._window_label(window_days)}天窗口，上升{rise_threshold}分以上）")
         print("=" * 60)
         
-        lucky_periods = []
-        scores = [item['final_score'] for item in self.data]
-        
-        for i in range(len(scores) - window_days):
-            before_window = scores[max(0, i-window_days):i]
-            current_window = scores[i:i+window_days]
-            
-            if before_window and current_window:
-                before_avg = statistics.mean(before_window)
-                current_avg = statistics.mean(current_window)
-                rise = current_avg - before_avg
-                
-                if rise >= rise_threshold:
-                    start_date = self.data[i]['date_obj']
-                    end_date = self.data[i+window_days-1]['date_obj']
-                    
-                    lucky_periods.append({
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'before_avg': before_avg,
-                        'current_avg': current_avg,
-                        'rise': rise,
-                        'dayun': self.data[i]['dayun_ganzhi'],
-                        'min_score': min(current_window),
-                        'max_score': max(current_window)
-                    })
-        
-        lucky_periods.sort(key=lambda x: x['rise'], reverse=True)
+        lucky_periods = self._detect_shift_periods(window_days, rise_threshold, 1, 'rise')
         
         print(f"📊 检测到 {len(lucky_periods)} 个幸运时段:")
         print()
         
         for i, period in enumerate(lucky_periods[:10]):
             print(f"✨ 幸运时段 #{i+1}")
-            print(f"   时间: {period['start_date']} ~ {period['end_date']}")
+            print(f"   时间: {period['start_date']} ~ {period['end_date']} ({period['days']}天，{period['window_days']}天窗口)")
             print(f"   大运: {period['dayun']}")
-            print(f"   上升幅度: {period['before_avg']:.1f}分 → {period['current_avg']:.1f}分 (上升{period['rise']:.1f}分)")
+            print(f"   上升幅度: {period['before_avg']:.1f}分 → {period['current_avg']:.1f}分 (上升{period['rise']:.1f}分，{period['peak_date']}起)")
             print(f"   分数范围: {period['min_score']}-{period['max_score']}分")
             print()
         
         return lucky_periods
     
+    @staticmethod
+    def _window_label(window_days):
+        if isinstance(window_days, int):
+            return str(window_days)
+        return '/'.join(str(w) for w in window_days)
+    
+    def _detect_shift_periods(self, window_days, threshold, direction, change_key):
+        """前后窗口均值突变检测（前缀和，一次扫描），返回按变化幅度降序的时段"""
+        if not self.data:
+            return []
+        scores = self.windows.values
+        periods = []
+        for episode in detect_shift_episodes(self.windows, window_days, threshold, direction):
+            start, end, peak = episode['start'], episode['end'], episode['peak']
+            # 分数范围与 before_avg/current_avg 一样取自代表窗口（变化最大的那个窗口）
+            span = scores[peak:peak + episode['window_days']]
+            periods.append({
+                'start_date': self.data[start]['date_obj'],
+                'end_date': self.data[end]['date_obj'],
+                'peak_date': self.data[peak]['date_obj'],
+                'days': end - start + 1,
+                'window_days': episode['window_days'],
+                'hit_count': episode['hit_count'],
+                'before_avg': episode['before_avg'],
+                'current_avg': episode['current_avg'],
+                change_key: episode['change'],
+                'dayun': self.data[peak]['dayun_ganzhi'],
+                'min_score': int(span.min()),
+                'max_score': int(span.max())
+            })
+        periods.sort(key=lambda x: x[change_key], reverse=True)
+        return periods
+    
     def analyze_volatility_by_dayun(self):
         """分析各大运期的运势波动性"""
         print("📊 各大运期运势波动分析")
         print("=" * 60)
         
-        dayun_data = defaultdict(list)
-        for item in self.data:
-            dayun_data[item['dayun_ganzhi']].append(item['final_score'])
-        
-        for dayun, scores in dayun_data.items():
-            if len(scores) > 100:  # 只分析有足够数据的大运期
-                avg_score = statistics.mean(scores)
-                std_dev = statistics.stdev(scores)
-                min_score = min(scores)
-                max_score = max(scores)
-                range_score = max_score - min_score
-                
-                # 计算波动系数（变异系数）
-                volatility = (std_dev / avg_score) * 100
-                
-                print(f"🔮 {dayun}大运:")
-                print(f"   平均分: {avg_score:.1f}分")
-                print(f"   标准差: {std_dev:.1f}分")
-                print(f"   分数范围: {min_score}-{max_score}分 (波动{range_score}分)")
-                print(f"   波动系数: {volatility:.1f}% ({'高波动' if volatility > 15 else '低波动' if volatility < 10 else '中等波动'})")
-                print()
+        # 只分析有足够数据的大运期，按大运先后排列
+        for stat in group_rows(self.frame, 'dayun', min_count=101, order='first'):
+            avg_score = stat['avg_score']
+            std_dev = stat['std_dev']
+            
+            # 计算波动系数（变异系数）
+            volatility = (std_dev / avg_score) * 100
+            
+            print(f"🔮 {stat['key']}大运:")
+            print(f"   平均分: {avg_score:.1f}分")
+            print(f"   标准差: {std_dev:.1f}分")
+            print(f"   分数范围: {stat['min_score']}-{stat['max_score']}分 (波动{stat['range']}分)")
+            print(f"   波动系数: {volatility:.1f}% ({'高波动' if volatility > 15 else '低波动' if volatility < 10 else '中等波动'})")
+            print()
     
     def find_extreme_score_clusters(self):
         """找出极端分数的聚集现象"""
@@ -240,72 +201,33 @@ class FortunePatternAnalyzer:
         print("\n🌸 季节性运势模式分析")
         print("=" * 60)
         
-        # 按月份统计
-        monthly_scores = defaultdict(list)
-        for item in self.data:
-            month = item['date_obj'].month
-            monthly_scores[month].append(item['final_score'])
-        
         print("📅 各月份平均运势:")
-        month_names = ['1月', '2月', '3月', '4月', '5月', '6月', 
-                      '7月', '8月', '9月', '10月', '11月', '12月']
-        
-        month_avgs = []
-        for month in range(1, 13):
-            if month in monthly_scores:
-                avg_score = statistics.mean(monthly_scores[month])
-                month_avgs.append((month, avg_score))
-                print(f"   {month_names[month-1]}: {avg_score:.1f}分")
+        month_stats = group_rows(self.frame, 'month')
+        for stat in month_stats:
+            print(f"   {stat['key']}: {stat['avg_score']:.1f}分")
         
         # 找出最好和最差的月份
-        best_month = max(month_avgs, key=lambda x: x[1])
-        worst_month = min(month_avgs, key=lambda x: x[1])
+        best_month = max(month_stats, key=lambda x: x['avg_score'])
+        worst_month = min(month_stats, key=lambda x: x['avg_score'])
         
-        print(f"\n🏆 全年最佳月份: {month_names[best_month[0]-1]} (平均{best_month[1]:.1f}分)")
-        print(f"⚠️ 全年最差月份: {month_names[worst_month[0]-1]} (平均{worst_month[1]:.1f}分)")
+        print(f"\n🏆 全年最佳月份: {best_month['key']} (平均{best_month['avg_score']:.1f}分)")
+        print(f"⚠️ 全年最差月份: {worst_month['key']} (平均{worst_month['avg_score']:.1f}分)")
     
     def find_dangerous_ganzhi_combinations(self):
         """找出最危险的干支组合"""
         print("\n💀 危险干支组合分析")
         print("=" * 60)
         
-        # 统计每个流日干支的平均分数
-        ganzhi_scores = defaultdict(list)
-        for item in self.data:
-            # 从CSV中提取流日干支
-            for row_data in csv.DictReader(open(os.path.join(os.path.dirname(__file__), "最终版一生每日分数_1995-2055.csv"), 'r', encoding='utf-8')):
-                if row_data['日期'] == item['date']:
-                    liuri_ganzhi = row_data['流日干支']
-                    ganzhi_scores[liuri_ganzhi].append(item['final_score'])
-                    break
-        
-        # 计算各干支的平均分和出现次数
-        ganzhi_stats = []
-        for ganzhi, scores in ganzhi_scores.items():
-            if len(scores) >= 10:  # 至少出现10次
-                avg_score = statistics.mean(scores)
-                count = len(scores)
-                min_score = min(scores)
-                max_score = max(scores)
-                
-                ganzhi_stats.append({
-                    'ganzhi': ganzhi,
-                    'avg_score': avg_score,
-                    'count': count,
-                    'min_score': min_score,
-                    'max_score': max_score
-                })
-        
-        # 按平均分排序
-        ganzhi_stats.sort(key=lambda x: x['avg_score'])
+        # 各流日干支的平均分（至少出现10次），按平均分升序
+        ganzhi_stats = group_rows(self.frame, 'liuri', min_count=10, order='mean')
         
         print("⚠️ 最危险的流日干支 (平均分最低):")
         for i, stat in enumerate(ganzhi_stats[:5]):
-            print(f"   #{i+1}: {stat['ganzhi']} - 平均{stat['avg_score']:.1f}分 (出现{stat['count']}次，{stat['min_score']}-{stat['max_score']}分)")
+            print(f"   #{i+1}: {stat['key']} - 平均{stat['avg_score']:.1f}分 (出现{stat['count']}次，{stat['min_score']}-{stat['max_score']}分)")
         
         print("\n✨ 最幸运的流日干支 (平均分最高):")
         for i, stat in enumerate(ganzhi_stats[-5:]):
-            print(f"   #{i+1}: {stat['ganzhi']} - 平均{stat['avg_score']:.1f}分 (出现{stat['count']}次，{stat['min_score']}-{stat['max_score']}分)")
+            print(f"   #{i+1}: {stat['key']} - 平均{stat['avg_score']:.1f}分 (出现{stat['count']}次，{stat['min_score']}-{stat['max_score']}分)")
     
     def analyze_lifecycle_trends(self):
         """分析人生周期趋势"""
@@ -371,27 +293,17 @@ class FortunePatternAnalyzer:
         print("\n📅 星期运势模式分析")
         print("=" * 60)
         
-        weekday_scores = defaultdict(list)
-        weekday_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-        
-        for item in self.data:
-            weekday = item['date_obj'].weekday()  # 0=周一, 6=周日
-            weekday_scores[weekday].append(item['final_score'])
-        
         print("各星期运势平均分:")
-        for weekday in range(7):
-            if weekday in weekday_scores:
-                avg_score = statistics.mean(weekday_scores[weekday])
-                count = len(weekday_scores[weekday])
-                print(f"   {weekday_names[weekday]}: {avg_score:.1f}分 ({count}天数据)")
+        weekday_stats = group_rows(self.frame, 'weekday')
+        for stat in weekday_stats:
+            print(f"   {stat['key']}: {stat['avg_score']:.1f}分 ({stat['count']}天数据)")
         
         # 找出最好和最差的星期
-        weekday_avgs = [(day, statistics.mean(scores)) for day, scores in weekday_scores.items()]
-        best_weekday = max(weekday_avgs, key=lambda x: x[1])
-        worst_weekday = min(weekday_avgs, key=lambda x: x[1])
+        best_weekday = max(weekday_stats, key=lambda x: x['avg_score'])
+        worst_weekday = min(weekday_stats, key=lambda x: x['avg_score'])
         
-        print(f"\n🏆 最佳星期: {weekday_names[best_weekday[0]]} (平均{best_weekday[1]:.1f}分)")
-        print(f"⚠️ 最差星期: {weekday_names[worst_weekday[0]]} (平均{worst_weekday[1]:.1f}分)")
+        print(f"\n🏆 最佳星期: {best_weekday['key']} (平均{best_weekday['avg_score']:.1f}分)")
+        print(f"⚠️ 最差星期: {worst_weekday['key']} (平均{worst_weekday['avg_score']:.1f}分)")
 
 if __name__ == "__main__":
     print("🚀 启动运势模式分析器")
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+一次性运势分析报告
+数据只加载一次（ScoreFrame），各项指标都在同一组 NumPy 列上向量化计算，
+连续段（黄金窗口、连续高低分、连续涨跌）共用一个游程函数，分组统计走 score_groupby，
+同时输出控制台摘要和机器可读的 JSON 报告。
+
+用法:
+    python fortune_report.py                              # 默认用户数据，报告写到 destiny_clock/fortune_report.json
+    python fortune_report.py 爱人一生每日分数_1998-2055.csv --json lover_report.json
+    python fortune_report.py --json -                     # JSON输出到标准输出，摘要改写到标准错误
+"""
+
+import os
+import sys
+import json
+import contextlib
+import time
+import datetime
+
+import numpy as np
+
+from score_frame import ScoreFrame
+from score_groupby import group_scores
+
+GOLDEN_MIN_DAYS = 7
+GOLDEN_MIN_SCORE = 58
+TOP = 10
+
+
+def true_runs(mask):
+    """布尔序列中连续为True的段，返回 (起点数组, 长度数组)"""
+    padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, stops = edges[::2], edges[1::2]
+    return starts, stops - starts
+
+
+def longest_run(mask):
+    """最长的连续True段 (起点, 长度)，长度相同时取最早的；没有时返回 (None, 0)"""
+    starts, lengths = true_runs(mask)
+    if len(lengths) == 0:
+        return None, 0
+    best = int(np.argmax(lengths))
+    return int(starts[best]), int(lengths[best])
+
+
+class FortuneReport:
+    """在一个 ScoreFrame 上计算全部指标"""
+
+    def __init__(self, frame, golden_min_days=GOLDEN_MIN_DAYS, golden_min_score=GOLDEN_MIN_SCORE):
+        self.frame = frame
+        self.golden_min_days = golden_min_days
+        self.golden_min_score = golden_min_score
+        self.scores = frame.scores
+        self._prefix = np.concatenate(([0.0], np.cumsum(self.scores)))
+
+    def _date(self, offset):
+        return self.frame.date_at(offset).isoformat()
+
+    def _day_entry(self, offset):
+        return {
+            'date': self._date(offset),
+            'score': int(self.scores[offset]),
+            'liuri': self.frame.ganzhi_at('liuri', offset),
+            'dayun': self.frame.ganzhi_at('dayun', offset)
+        }
+
+    def _span(self, start, length, shift=0):
+        if start is None:
+            return {'days': 0, 'start_date': None, 'end_date': None}
+        return {'days': length,
+                'start_date': self._date(start + shift),
+                'end_date': self._date(start + shift + length - 1)}
+
+    def build(self):
+        if len(self.frame) == 0:
+            raise ValueError("没有数据可分析")
+        report = {
+            'meta': {
+                'source': os.path.basename(self.frame.csv_file_path or ''),
+                'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'days': len(self.frame),
+                'start_date': self._date(0),
+                'end_date': self._date(len(self.frame) - 1)
+            }
+        }
+        report['overview'] = self.overview()
+        report['anomalies'] = self.anomalies(report['overview'])
+        report['extremes'] = self.extremes(report['overview'])
+        report['momentum'] = self.momentum()
+        report['golden_windows'] = self.golden_windows()
+        report['seasonal'] = self.seasonal()
+        report['weekly'] = self.weekly()
+        report['ganzhi_distribution'] = self.ganzhi_distribution()
+        report['dayun'] = self.dayun()
+        report['yearly'] = self.yearly()
+        report['monthly_series'] = self.monthly_series()
+        return report
+
+    def overview(self):
+        scores = self.scores
+        ordered = np.sort(scores)
+        n = len(ordered)
+        return {
+            'mean': float(scores.mean()),
+            'std': float(scores.std(ddof=1)) if n > 1 else 0.0,
+            'min': int(ordered[0]),
+            'max': int(ordered[-1]),
+            'p10': float(ordered[int(n * 0.1)]),
+            'p90': float(ordered[min(n - 1, int(n * 0.9))])
+        }
+
+    def anomalies(self, overview):
+        """距平均值超过2个标准差的日子"""
+        upper = overview['mean'] + 2 * overview['std']
+        lower = overview['mean'] - 2 * overview['std']
+        high = np.flatnonzero(self.scores > upper)
+        low = np.flatnonzero(self.scores < lower)
+        return {
+            'upper_threshold': upper,
+            'lower_threshold': lower,
+            'high_count': len(high),
+            'low_count': len(low),
+            'high_days': [self._day_entry(i) for i in high[:TOP].tolist()],
+            'low_days': [self._day_entry(i) for i in low[:TOP].tolist()]
+        }
+
+    def extremes(self, overview):
+        """最高/最低分日与最长连续高低分（平均分±10）"""
+        high_threshold = overview['mean'] + 10
+        low_threshold = overview['mean'] - 10
+        return {
+            'perfect_days': [self._day_entry(i) for i in np.flatnonzero(self.scores == overview['max']).tolist()],
+            'terrible_days': [self._day_entry(i) for i in np.flatnonzero(self.scores == overview['min']).tolist()],
+            'high_threshold': high_threshold,
+            'low_threshold': low_threshold,
+            'longest_high_streak': self._span(*longest_run(self.scores > high_threshold)),
+            'longest_low_streak': self._span(*longest_run(self.scores < low_threshold))
+        }
+
+    def momentum(self):
+        """最长连续上升/下降（逐日变化，日期取变化后的那一天）"""
+        changes = np.diff(self.scores)
+        return {
+            'longest_rise': self._span(*longest_run(changes > 0), shift=1),
+            'longest_fall': self._span(*longest_run(changes < 0), shift=1)
+        }
+
+    def golden_windows(self):
+        """连续 golden_min_days 天以上分数 ≥ golden_min_score 的时段，按持续天数降序"""
+        starts, lengths = true_runs(self.scores >= self.golden_min_score)
+        keep = lengths >= self.golden_min_days
+        starts, lengths = starts[keep], lengths[keep]
+        order = np.argsort(-lengths, kind='stable')
+        windows = []
+        for start, length in zip(starts[order].tolist(), lengths[order].tolist()):
+            windows.append({
+                'start_date': self._date(start),
+                'end_date': self._date(start + length - 1),
+                'duration': length,
+                'avg_score': float((self._prefix[start + length] - self._prefix[start]) / length),
+                'peak_score': int(self.scores[start:start + length].max()),
+                'dayun': self.frame.ganzhi_at('dayun', start)
+            })
+        return {'min_days': self.golden_min_days, 'min_score': self.golden_min_score,
+                'count': len(windows), 'windows': windows}
+
+    def seasonal(self):
+        rows = group_scores(self.frame, 'month').rows()
+        return {'months': rows,
+                'best_month': max(rows, key=lambda x: x['avg_score'])['key'],
+                'worst_month': min(rows, key=lambda x: x['avg_score'])['key'],
+                'jieqi_months': group_scores(self.frame, 'jieqi').rows()}
+
+    def weekly(self):
+        rows = group_scores(self.frame, 'weekday').rows()
+        return {'weekdays': rows,
+                'best_weekday': max(rows, key=lambda x: x['avg_score'])['key'],
+                'worst_weekday': min(rows, key=lambda x: x['avg_score'])['key']}
+
+    def ganzhi_distribution(self, min_count=20):
+        """流日干支的分数分布，按平均分降序"""
+        rows = group_scores(self.frame, 'liuri').rows(min_count, order='-mean')
+        return {'layer': 'liuri', 'min_count': min_count, 'ganzhi': rows}
+
+    def dayun(self, min_count=100):
+        """各大运期的平均分与波动系数，按大运出现顺序"""
+        rows = group_scores(self.frame, 'dayun').rows(min_count, order='first')
+        for row in rows:
+            row['volatility'] = row['std_dev'] / row['avg_score'] * 100 if row['avg_score'] else 0.0
+        return rows
+
+    def yearly(self):
+        return group_scores(self.frame, 'year').rows()
+
+    def monthly_series(self):
+        """月度平均分（绘制一生折线图用），日期取每月15日"""
+        years = self.frame.year.astype(np.int64)
+        keys = (years - int(years[0])) * 12 + self.frame.month.astype(np.int64) - 1
+        counts = np.bincount(keys)
+        sums = np.bincount(keys, weights=self.scores)
+        first = int(years[0])
+        return [{'date': datetime.date(first + key // 12, key % 12 + 1, 15).isoformat(),
+                 'avg_score': float(sums[key] / counts[key])}
+                for key in np.flatnonzero(counts).tolist()]
+
+
+def _rounded(value, digits=2):
+    """JSON 输出前把浮点数统一保留两位小数"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: _rounded(v, digits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v, digits) for v in value]
+    return value
+
+
+def build_report(csv_file_path=None, frame=None, **options):
+    """加载一次数据并计算完整报告（dict）"""
+    if frame is None:
+        frame = ScoreFrame.load(csv_file_path)
+    return FortuneReport(frame, **options).build()
+
+
+def print_report(report):
+    meta, overview = report['meta'], report['overview']
+    print(f"📊 运势分析报告: {meta['source']} ({meta['start_date']} ~ {meta['end_date']}，{meta['days']}天)")
+    print("=" * 60)
+    print(f"   平均分{overview['mean']:.1f}，标准差{overview['std']:.1f}，范围{overview['min']}-{overview['max']}分")
+    print(f"   10分位{overview['p10']:.1f}分，90分位{overview['p90']:.1f}分")
+
+    anomalies = report['anomalies']
+    print(f"\n🎯 异常值: 超高分{anomalies['high_count']}天 (>{anomalies['upper_threshold']:.1f})，"
+          f"超低分{anomalies['low_count']}天 (<{anomalies['lower_threshold']:.1f})")
+
+    extremes = report['extremes']
+    print(f"\n💎 最高分{overview['max']}分共{len(extremes['perfect_days'])}天，最低分{overview['min']}分共{len(extremes['terrible_days'])}天")
+    for label, span in (('🔥 最长连续高分', extremes['longest_high_streak']),
+                        ('❄️ 最长连续低分', extremes['longest_low_streak']),
+                        ('🚀 最长连续上升', report['momentum']['longest_rise']),
+                        ('📉 最长连续下降', report['momentum']['longest_fall'])):
+        when = f" ({span['start_date']} ~ {span['end_date']})" if span['days'] else ''
+        print(f"   {label}: {span['days']}天{when}")
+
+    golden = report['golden_windows']
+    print(f"\n✨ 黄金时间窗口 (连续{golden['min_days']}天以上≥{golden['min_score']}分): {golden['count']}个")
+    for window in golden['windows'][:5]:
+        print(f"   {window['start_date']} ~ {window['end_date']} ({window['duration']}天，平均{window['avg_score']:.1f}分，大运{window['dayun']})")
+
+    seasonal, weekly = report['seasonal'], report['weekly']
+    print(f"\n🌸 最佳月份: {seasonal['best_month']}，最差月份: {seasonal['worst_month']}")
+    print(f"📅 最佳星期: {weekly['best_weekday']}，最差星期: {weekly['worst_weekday']}")
+
+    ganzhi = report['ganzhi_distribution']['ganzhi']
+    if ganzhi:
+        print(f"\n🎲 流日干支: 最高 {ganzhi[0]['key']} {ganzhi[0]['avg_score']:.1f}分，最低 {ganzhi[-1]['key']} {ganzhi[-1]['avg_score']:.1f}分")
+
+    print("\n🔮 各大运期:")
+    for row in report['dayun']:
+        print(f"   {row['key']}: 平均{row['avg_score']:.1f}分，标准差{row['std_dev']:.1f}，波动系数{row['volatility']:.1f}%")
+
+
+def write_report(report, path):
+    """写出JSON报告，path 为 "-" 时写到标准输出"""
+    text = json.dumps(_rounded(report), ensure_ascii=False, indent=2)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='一次性运势分析报告（控制台 + JSON）')
+    parser.add_argument('csv', nargs='?', help='一生每日分数CSV（默认用户数据）')
+    parser.add_argument('--json', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fortune_report.json'),
+                        help='JSON报告路径，"-" 输出到标准输出')
+    parser.add_argument('--golden-days', type=int, default=GOLDEN_MIN_DAYS, help='黄金窗口最少天数')
+    parser.add_argument('--golden-score', type=float, default=GOLDEN_MIN_SCORE, help='黄金窗口最低分数')
+    parser.add_argument('--quiet', action='store_true', help='不输出控制台摘要')
+    args = parser.parse_args()
+
+    # JSON写到标准输出时，控制台摘要和加载过程中的提示都改写到标准错误，保证标准输出能被 json.loads 解析
+    console = sys.stderr if args.json == '-' else sys.stdout
+    with contextlib.redirect_stdout(console):
+        try:
+            t0 = time.time()
+            frame = ScoreFrame.load(args.csv)
+            t1 = time.time()
+            report = build_report(frame=frame, golden_min_days=args.golden_days, golden_min_score=args.golden_score)
+            t2 = time.time()
+        except FileNotFoundError as e:
+            print(f"❌ 数据文件不存在: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if not args.quiet:
+            print_report(report)
+            print(f"\n⚡ 加载{(t1 - t0) * 1000:.0f}ms，计算{(t2 - t1) * 1000:.0f}ms")
+    write_report(report, args.json)
+    if not args.quiet and args.json != '-':
+        print(f"💾 JSON报告: {args.json}")
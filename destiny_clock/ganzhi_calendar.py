@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+干支日历表
+预先计算1900-2100年每一天（以正午12点为准）的年、月、日干支，
+用紧凑的数组存储并缓存到磁盘，提供O(1)的日期→干支查询。
+
+年柱以立春、月柱以十二节的精确交节时刻分界，与lunar_python的
+EightChar结果一致（可用 --validate 逐日核对）。
+"""
+
+import sys
+import os
+import datetime
+import struct
+import time
+from array import array
+
+from lunar_python import Solar
+
+TIANGAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+DIZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+
+# 六十甲子，下标即干支序号（甲子=0 … 癸亥=59）
+GANZHI_60 = [TIANGAN[i % 10] + DIZHI[i % 12] for i in range(60)]
+GANZHI_INDEX = {name: i for i, name in enumerate(GANZHI_60)}
+
+# 十二节（月柱分界），立春同时是年柱分界
+JIE_NAMES = ('小寒', '立春', '惊蛰', '清明', '立夏', '芒种',
+             '小暑', '立秋', '白露', '寒露', '立冬', '大雪')
+
+DEFAULT_START_YEAR = 1900
+DEFAULT_END_YEAR = 2100
+
+_CACHE_MAGIC = b'GZC1'
+_CACHE_HEADER = struct.Struct('<4sII')
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _lunar_ganzhi_indices(date):
+    """直接用lunar_python计算某日正午的年、月、日干支序号"""
+    ba = Solar.fromYmdHms(date.year, date.month, date.day, 12, 0, 0).getLunar().getEightChar()
+    return (GANZHI_INDEX[ba.getYear()],
+            GANZHI_INDEX[ba.getMonth()],
+            GANZHI_INDEX[ba.getDay()])
+
+
+def _collect_jie_times(start_year, end_year):
+    """收集范围内（前后各多取一年）所有节的交节时刻，按时间排序"""
+    jie_times = {}
+    for year in range(start_year - 1, end_year + 2):
+        lunar = Solar.fromYmd(year, 6, 1).getLunar()
+        for name, solar in lunar.getJieQiTable().items():
+            if name not in JIE_NAMES:
+                continue
+            moment = datetime.datetime(solar.getYear(), solar.getMonth(), solar.getDay(),
+                                       solar.getHour(), solar.getMinute(), solar.getSecond())
+            jie_times[moment] = name
+    return sorted(jie_times.items())
+
+
+def default_cache_path(start_year=DEFAULT_START_YEAR, end_year=DEFAULT_END_YEAR):
+    return os.path.join(current_dir, f'ganzhi_calendar_{start_year}-{end_year}.bin')
+
+
+class GanzhiCalendar:
+    """年/月/日干支查询表"""
+
+    def __init__(self, start_year=DEFAULT_START_YEAR, end_year=DEFAULT_END_YEAR, cache_path=None):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.start_date = datetime.date(start_year, 1, 1)
+        self.end_date = datetime.date(end_year, 12, 31)
+        self.start_ordinal = self.start_date.toordinal()
+        self.days = self.end_date.toordinal() - self.start_ordinal + 1
+        self.cache_path = cache_path or default_cache_path(start_year, end_year)
+
+        # 三个等长数组，第i个元素对应 start_date + i 天的干支序号
+        self.year_index = array('B')
+        self.month_index = array('B')
+        self.day_index = array('B')
+
+        self.load_data()
+
+    def load_data(self):
+        """优先从磁盘缓存加载，否则生成并写入缓存"""
+        if self._load_cache():
+            return
+        self.build()
+        self._save_cache()
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, 'rb') as f:
+                magic, start_ordinal, days = _CACHE_HEADER.unpack(f.read(_CACHE_HEADER.size))
+                if magic != _CACHE_MAGIC or start_ordinal != self.start_ordinal or days != self.days:
+                    return False
+                year_index, month_index, day_index = array('B'), array('B'), array('B')
+                year_index.fromfile(f, days)
+                month_index.fromfile(f, days)
+                day_index.fromfile(f, days)
+        except (OSError, EOFError, struct.error) as e:
+            print(f"⚠️ 干支日历缓存读取失败，将重新生成: {e}")
+            return False
+
+        self.year_index, self.month_index, self.day_index = year_index, month_index, day_index
+        return True
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_path, 'wb') as f:
+                f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, self.start_ordinal, self.days))
+                self.year_index.tofile(f)
+                self.month_index.tofile(f)
+                self.day_index.tofile(f)
+        except OSError as e:
+            print(f"⚠️ 干支日历缓存写入失败（仅保留在内存中）: {e}")
+
+    def build(self):
+        """根据节气交节时刻生成整张表
+
+        月柱六十甲子每过一个节前进一位，年柱每过立春前进一位，
+        日柱每天前进一位，因此只需从起点取一次基准，之后按节计数即可。
+        """
+        jie_times = _collect_jie_times(self.start_year, self.end_year)
+        base_year, base_month, base_day = _lunar_ganzhi_indices(self.start_date)
+
+        year_index = array('B', bytes(self.days))
+        month_index = array('B', bytes(self.days))
+        day_index = array('B', bytes(self.days))
+
+        # 起点正午之前最后一个节的位置
+        noon = datetime.datetime.combine(self.start_date, datetime.time(12))
+        pos = 0
+        while pos < len(jie_times) and jie_times[pos][0] <= noon:
+            pos += 1
+
+        year_value, month_value = base_year, base_month
+        for i in range(self.days):
+            noon = datetime.datetime.combine(self.start_date + datetime.timedelta(days=i), datetime.time(12))
+            while pos < len(jie_times) and jie_times[pos][0] <= noon:
+                month_value = (month_value + 1) % 60
+                if jie_times[pos][1] == '立春':
+                    year_value = (year_value + 1) % 60
+                pos += 1
+            year_index[i] = year_value
+            month_index[i] = month_value
+            day_index[i] = (base_day + i) % 60
+
+        self.year_index, self.month_index, self.day_index = year_index, month_index, day_index
+
+    def contains(self, date):
+        return self.start_date <= date <= self.end_date
+
+    def offset(self, date):
+        """日期在表中的下标（超出范围时抛出ValueError）"""
+        offset = date.toordinal() - self.start_ordinal
+        if not 0 <= offset < self.days:
+            raise ValueError(f"日期{date}超出干支日历范围({self.start_date}~{self.end_date})")
+        return offset
+
+    def get_pillar_indices(self, year, month, day):
+        """返回 (年干支序号, 月干支序号, 日干支序号)，超出范围时回退到lunar_python"""
+        date = datetime.date(year, month, day)
+        if not self.contains(date):
+            return _lunar_ganzhi_indices(date)
+        offset = date.toordinal() - self.start_ordinal
+        return self.year_index[offset], self.month_index[offset], self.day_index[offset]
+
+    def get_pillars(self, year, month, day):
+        """返回与EightChar一致的年月日干支字典"""
+        year_gz, month_gz, day_gz = (GANZHI_60[i] for i in self.get_pillar_indices(year, month, day))
+        return {
+            'year_gan': year_gz[0],
+            'year_zhi': year_gz[1],
+            'month_gan': month_gz[0],
+            'month_zhi': month_gz[1],
+            'day_gan': day_gz[0],
+            'day_zhi': day_gz[1]
+        }
+
+    def validate(self, start_year=None, end_year=None, step=1):
+        """与lunar_python逐日比对，返回不一致的日期列表"""
+        start = datetime.date(start_year or self.start_year, 1, 1)
+        end = datetime.date(end_year or self.end_year, 12, 31)
+        mismatches = []
+        current = start
+        while current <= end:
+            expected = _lunar_ganzhi_indices(current)
+            actual = self.get_pillar_indices(current.year, current.month, current.day)
+            if tuple(actual) != expected:
+                mismatches.append({
+                    'date': current.strftime('%Y-%m-%d'),
+                    'expected': [GANZHI_60[i] for i in expected],
+                    'actual': [GANZHI_60[i] for i in actual]
+                })
+            current += datetime.timedelta(days=step)
+        return mismatches
+
+
+_calendar = None
+
+
+def get_ganzhi_calendar():
+    """获取全局共享的干支日历（首次调用时加载）"""
+    global _calendar
+    if _calendar is None:
+        _calendar = GanzhiCalendar()
+    return _calendar
+
+
+def get_pillars(year, month, day):
+    """便捷函数：查询某日年月日干支"""
+    return get_ganzhi_calendar().get_pillars(year, month, day)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='干支日历表生成与校验')
+    parser.add_argument('--rebuild', action='store_true', help='忽略缓存重新生成')
+    parser.add_argument('--validate', action='store_true', help='与lunar_python逐日核对')
+    parser.add_argument('--start', type=int, help='校验起始年份')
+    parser.add_argument('--end', type=int, help='校验结束年份')
+    parser.add_argument('--step', type=int, default=1, help='校验步长（天）')
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(default_cache_path()):
+        os.remove(default_cache_path())
+
+    t0 = time.time()
+    calendar = get_ganzhi_calendar()
+    print(f"📅 干支日历: {calendar.start_date} ~ {calendar.end_date}，共{calendar.days}天")
+    print(f"⚡ 加载耗时: {time.time() - t0:.3f}秒")
+    print(f"💾 缓存文件: {calendar.cache_path}")
+
+    if args.validate:
+        t0 = time.time()
+        print("\n🔍 开始与lunar_python逐日核对...")
+        mismatches = calendar.validate(args.start, args.end, args.step)
+        print(f"⏱️ 核对耗时: {time.time() - t0:.1f}秒")
+        if mismatches:
+            print(f"❌ 发现{len(mismatches)}处不一致:")
+            for item in mismatches[:20]:
+                print(f"   {item['date']}: 期望{item['expected']} 实际{item['actual']}")
+            sys.exit(1)
+        print("✅ 全部一致")
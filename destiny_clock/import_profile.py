@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+导入耗时报告
+用 python -X importtime 分别在新进程中导入各服务模块，列出最慢的依赖；
+加 --server 时再实测 server.py 从启动到可以接受连接的时间。
+
+用法:
+    python import_profile.py                 # 默认检查 server.py / app.py 依赖的模块
+    python import_profile.py bazi_api --top 20
+    python import_profile.py --server
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(CURRENT_DIR)
+
+DEFAULT_MODULES = [
+    'chart_data_api',
+    'chart_response_cache',
+    'mingli_analysis_api',
+    'mingli_jobs',
+]
+
+
+def profile_import(module):
+    """在新进程中导入 module，返回 (总耗时秒, [(累计微秒, 自身微秒, 模块名), ...])"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [CURRENT_DIR, env.get('PYTHONPATH')]))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=CURRENT_DIR, env=env, capture_output=True, text=True, encoding='utf-8'
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '导入失败')
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # 输出按后序排列：目标模块的依赖在它之前、上一个顶层模块之后；
+    # 之前的顶层模块（site 等）属于解释器启动，不计入
+    for end, (_, _, name) in enumerate(entries):
+        if name == f' {module}':
+            break
+    start = end
+    while start > 0 and entries[start - 1][2].startswith('  '):
+        start -= 1
+    return elapsed, entries[start:end + 1]
+
+
+def measure_server_ready(port=8765, timeout=30):
+    """启动 server.py，返回它开始接受连接所用的秒数"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'server.py', '--port', str(port)],
+        cwd=PROJECT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server.py 提前退出（返回码 {process.returncode}）")
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.05):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"server.py 在 {timeout} 秒内没有开始监听")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def print_report(module, elapsed, entries, top):
+    total_us = entries[-1][0] if entries else 0
+    print(f"📦 {module}: 导入 {total_us / 1000:.1f} ms（进程总计 {elapsed * 1000:.0f} ms）")
+    # 按累计耗时排序，列出最慢的依赖
+    for cumulative_us, self_us, name in sorted(entries[:-1], reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  (自身 {self_us / 1000:6.1f} ms)  {name}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='服务模块导入耗时报告')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help='要检查的模块')
+    parser.add_argument('--top', type=int, default=10, help='每个模块列出最慢的几个依赖')
+    parser.add_argument('--server', action='store_true', help='实测 server.py 启动到可接受连接的时间')
+    parser.add_argument('--port', type=int, default=8765, help='--server 使用的端口')
+    args = parser.parse_args()
+
+    print("⏱️ 导入耗时报告")
+    print("=" * 60)
+    for module in args.modules:
+        try:
+            elapsed, entries = profile_import(module)
+        except Exception as e:
+            print(f"❌ {module}: {e}\n")
+            continue
+        print_report(module, elapsed, entries, args.top)
+
+    if args.server:
+        try:
+            ready = measure_server_ready(args.port)
+            print(f"🚀 server.py 启动到可接受连接: {ready * 1000:.0f} ms")
+        except Exception as e:
+            print(f"❌ 测量 server.py 启动时间失败: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@
 
 from yongshen_based_algorithm import YongshenBasedAnalyzer
 from comprehensive_scoring_system import ComprehensiveScoringSystem
+from dayun_service import dayun_at_date, all_dayun
 from lunar_python import Solar, Lunar
 import datetime
 
@@ -165,11 +166,7 @@ class LayeredScoringSystem:
     
     def get_current_dayun(self, birth_year, birth_month, birth_day, gender='male'):
         """获取当前大运"""
-        from bazi_calculator import BaziCalculator
-        calculator = BaziCalculator()
-        
-        current_date = datetime.date.today()
-        dayun_result = calculator.calculate_dayun(birth_year, birth_month, birth_day, current_date, gender)
+        dayun_result = dayun_at_date(birth_year, birth_month, birth_day, datetime.date.today(), gender)
         
         if dayun_result and 'gan' in dayun_result and 'zhi' in dayun_result:
             return dayun_result['gan'] + dayun_result['zhi']
@@ -177,40 +174,8 @@ class LayeredScoringSystem:
         return "己卯"  # 备用值
     
     def get_all_dayun(self, birth_year, birth_month, birth_day, gender='male'):
-        """获取所有大运数据"""
-        # 对于您的特定生日，使用已知的正确序列
-        if birth_year == 1995 and birth_month == 6 and birth_day == 11 and gender == 'male':
-            return [
-                {'ganzhi': '辛巳', 'start_age': 2, 'end_age': 12},
-                {'ganzhi': '庚辰', 'start_age': 12, 'end_age': 22},
-                {'ganzhi': '己卯', 'start_age': 22, 'end_age': 32},
-                {'ganzhi': '戊寅', 'start_age': 32, 'end_age': 42},
-                {'ganzhi': '丁丑', 'start_age': 42, 'end_age': 52},
-                {'ganzhi': '丙子', 'start_age': 52, 'end_age': 62},
-                {'ganzhi': '乙亥', 'start_age': 62, 'end_age': 72},
-                {'ganzhi': '甲戌', 'start_age': 72, 'end_age': 82},
-            ]
-        
-        # 对于其他生日，使用通用方法
-        from lunar_python import Solar
-        solar = Solar.fromYmdHms(birth_year, birth_month, birth_day, 4, 0, 0)
-        lunar = solar.getLunar()
-        ba = lunar.getEightChar()
-        
-        gender_code = 0 if gender == 'male' else 1
-        yun = ba.getYun(gender_code)
-        dayuns = yun.getDaYun()
-        
-        result = []
-        for dayun in dayuns:
-            ganzhi = str(dayun.getGanZhi())
-            result.append({
-                'ganzhi': ganzhi,
-                'start_age': dayun.getStartAge(),
-                'end_age': dayun.getEndAge()
-            })
-        
-        return result
+        """获取所有大运数据（已知的标准序列或专业库推算，时间线已缓存）"""
+        return all_dayun(birth_year, birth_month, birth_day, gender)
     
     def generate_charts_data(self, natal_ba, analysis, birth_year, gender):
         """生成图表数据"""
@@ -4,7 +4,6 @@
 绘制61年完整运势折线图
 """
 
-import csv
 import os
 import datetime
 import calendar
@@ -13,18 +12,20 @@ import matplotlib.dates as mdates
 from collections import defaultdict
 import statistics
 
+from daily_score_series import load_daily_series
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['PingFang SC', 'SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
 
 class LifetimeFortuneChart:
     
-    def __init__(self, csv_file_path=None):
+    def __init__(self, csv_file_path=None, frame=None):
         if csv_file_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             csv_file_path = os.path.join(current_dir, "最终版一生每日分数_1995-2055.csv")
         
-        self.data = self.load_data(csv_file_path)
+        self.data = frame.rows() if frame is not None else self.load_data(csv_file_path)
         print(f"📊 加载了 {len(self.data)} 天的数据准备绘图")
         
         # 大运周期定义
@@ -39,25 +40,11 @@ class LifetimeFortuneChart:
         ]
     
     def load_data(self, csv_file_path):
-        """加载CSV数据"""
+        """加载一生每日分数（优先内存映射二进制列式文件）"""
         data = []
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':
-                        continue
-                    try:
-                        date_obj = datetime.datetime.strptime(row['日期'], '%Y-%m-%d').date()
-                        data.append({
-                            'date': row['日期'],
-                            'date_obj': date_obj,
-                            'year': int(row['年份']),
-                            'final_score': int(row['最终总分']),
-                            'dayun_ganzhi': row['大运干支']
-                        })
-                    except (ValueError, KeyError):
-                        continue
+            data = load_daily_series(csv_file_path).rows(
+                ['date', 'date_obj', 'year', 'final_score', 'dayun_ganzhi'])
         except FileNotFoundError:
             print(f"❌ 数据文件不存在: {csv_file_path}")
         
@@ -312,25 +299,11 @@ class LifetimeFortuneChart:
         return output_path
     
     def load_data(self, csv_file_path):
-        """加载CSV数据"""
+        """加载一生每日分数（优先内存映射二进制列式文件）"""
         data = []
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['日期'] == '日期':
-                        continue
-                    try:
-                        date_obj = datetime.datetime.strptime(row['日期'], '%Y-%m-%d').date()
-                        data.append({
-                            'date': row['日期'],
-                            'date_obj': date_obj,
-                            'year': int(row['年份']),
-                            'final_score': int(row['最终总分']),
-                            'dayun_ganzhi': row['大运干支']
-                        })
-                    except (ValueError, KeyError):
-                        continue
+            data = load_daily_series(csv_file_path).rows(
+                ['date', 'date_obj', 'year', 'final_score', 'dayun_ganzhi'])
         except FileNotFoundError:
             print(f"❌ 数据文件不存在: {csv_file_path}")
         
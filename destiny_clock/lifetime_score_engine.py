@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+向量化一生计分引擎
+基于干支日历表，用NumPy数组一次性计算任意日期范围内
+每天的大运、流年、流月、流日及最终分数
+"""
+
+import datetime
+
+import numpy as np
+
+from ganzhi_calendar import GANZHI_60, GANZHI_INDEX, TIANGAN, DIZHI, get_ganzhi_calendar
+
+# 输出列（与一生每日分数CSV一致）
+SCORE_FIELDS = ['date', 'year', 'dayun_ganzhi', 'liunian_ganzhi', 'liuyue_ganzhi', 'liuri_ganzhi',
+                'dayun_score', 'liunian_score', 'liuyue_score', 'liuri_score', 'final_score']
+
+
+def build_ganzhi_score_table(tiangan_scores, dizhi_scores):
+    """把天干、地支分数表展开成六十甲子分数表（下标=干支序号）"""
+    gan_table = np.array([tiangan_scores[gan] for gan in TIANGAN], dtype=np.int16)
+    zhi_table = np.array([dizhi_scores[zhi] for zhi in DIZHI], dtype=np.int16)
+    cycle = np.arange(60)
+    return gan_table[cycle % 10] + zhi_table[cycle % 12]
+
+
+def dayun_indices_for_years(years, dayun_sequence):
+    """按年份数组查找大运干支序号
+
+    与逐年查找的规则一致：早于第一步大运按第一步计，晚于最后一步按最后一步计
+    """
+    start_years = np.array([dayun['start_year'] for dayun in dayun_sequence])
+    dayun_ganzhi = np.array([GANZHI_INDEX[dayun['ganzhi']] for dayun in dayun_sequence], dtype=np.uint8)
+    position = np.searchsorted(start_years, years, side='right') - 1
+    position = np.clip(position, 0, len(dayun_sequence) - 1)
+    return dayun_ganzhi[position]
+
+
+def compute_lifetime_arrays(start_date, end_date, tiangan_scores, dizhi_scores, dayun_sequence):
+    """计算 [start_date, end_date] 每天的干支序号与各层分数
+
+    返回字典，所有值都是等长NumPy数组：
+    ordinal（日序数）、year、*_index（干支序号）、*_score
+    """
+    calendar = get_ganzhi_calendar()
+    first = calendar.offset(start_date)
+    last = calendar.offset(end_date)
+
+    days = np.arange(first, last + 1)
+    dates = np.datetime64(start_date, 'D') + np.arange(len(days))
+    years = dates.astype('datetime64[Y]').astype(np.int32) + 1970
+
+    liunian_index = np.frombuffer(calendar.year_index, dtype=np.uint8)[days]
+    liuyue_index = np.frombuffer(calendar.month_index, dtype=np.uint8)[days]
+    liuri_index = np.frombuffer(calendar.day_index, dtype=np.uint8)[days]
+    dayun_index = dayun_indices_for_years(years, dayun_sequence)
+
+    score_table = build_ganzhi_score_table(tiangan_scores, dizhi_scores)
+    dayun_score = score_table[dayun_index]
+    liunian_score = score_table[liunian_index]
+    liuyue_score = score_table[liuyue_index]
+    liuri_score = score_table[liuri_index]
+
+    return {
+        'ordinal': days + calendar.start_ordinal,
+        'year': years,
+        'dayun_index': dayun_index,
+        'liunian_index': liunian_index,
+        'liuyue_index': liuyue_index,
+        'liuri_index': liuri_index,
+        'dayun_score': dayun_score,
+        'liunian_score': liunian_score,
+        'liuyue_score': liuyue_score,
+        'liuri_score': liuri_score,
+        'final_score': dayun_score + liunian_score + liuyue_score + liuri_score
+    }
+
+
+def arrays_to_rows(arrays):
+    """把数组结果转换成逐日字典列表（CSV/旧接口格式）"""
+    ganzhi_names = {
+        field: [GANZHI_60[i] for i in arrays[f'{field}_index'].tolist()]
+        for field in ('dayun', 'liunian', 'liuyue', 'liuri')
+    }
+    scores = {
+        field: arrays[field].tolist()
+        for field in ('dayun_score', 'liunian_score', 'liuyue_score', 'liuri_score', 'final_score')
+    }
+    ordinals = arrays['ordinal'].tolist()
+    years = arrays['year'].tolist()
+
+    rows = []
+    for i, ordinal in enumerate(ordinals):
+        rows.append({
+            'date': datetime.date.fromordinal(ordinal).strftime('%Y-%m-%d'),
+            'year': years[i],
+            'dayun_ganzhi': ganzhi_names['dayun'][i],
+            'liunian_ganzhi': ganzhi_names['liunian'][i],
+            'liuyue_ganzhi': ganzhi_names['liuyue'][i],
+            'liuri_ganzhi': ganzhi_names['liuri'][i],
+            'dayun_score': scores['dayun_score'][i],
+            'liunian_score': scores['liunian_score'][i],
+            'liuyue_score': scores['liuyue_score'][i],
+            'liuri_score': scores['liuri_score'][i],
+            'final_score': scores['final_score'][i]
+        })
+    return rows
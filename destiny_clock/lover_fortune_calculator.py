@@ -7,52 +7,19 @@
 import sys
 import os
 import datetime
-import csv
-from collections import defaultdict
 
 # 添加bazi_lib到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
-from lunar_python import Solar, Lunar
-
-# 爱人专属计分规则
-LOVER_TIANGAN_SCORES = {
-    '甲': 1, '乙': 3, '丙': 10, '丁': 8, '戊': 9,
-    '己': 7, '庚': 6, '辛': 5, '壬': 2, '癸': 4
-}
-
-LOVER_DIZHI_SCORES = {
-    '子': 4, '丑': 6, '寅': 1, '卯': 9, '辰': 2, '巳': 10,
-    '午': 12, '未': 7, '申': 5, '酉': 3, '戌': 11, '亥': 8
-}
-
-# 爱人大运序列（1994年出生，从1998年壬申开始）
-LOVER_DAYUN_SEQUENCE = [
-    {'ganzhi': '壬申', 'start_year': 1998, 'end_year': 2008},
-    {'ganzhi': '辛未', 'start_year': 2008, 'end_year': 2018},
-    {'ganzhi': '庚午', 'start_year': 2018, 'end_year': 2028},
-    {'ganzhi': '己巳', 'start_year': 2028, 'end_year': 2038},
-    {'ganzhi': '戊辰', 'start_year': 2038, 'end_year': 2048},
-    {'ganzhi': '丁卯', 'start_year': 2048, 'end_year': 2058},
-    {'ganzhi': '丙寅', 'start_year': 2058, 'end_year': 2068},
-]
-
-def get_lover_ganzhi_score(gan, zhi):
-    """计算爱人的干支分数"""
-    return LOVER_TIANGAN_SCORES[gan] + LOVER_DIZHI_SCORES[zhi]
-
-def get_lover_dayun_for_year(year):
-    """根据年份获取爱人对应的大运"""
-    for dayun in LOVER_DAYUN_SEQUENCE:
-        if dayun['start_year'] <= year < dayun['end_year']:
-            return dayun['ganzhi']
-    
-    if year >= LOVER_DAYUN_SEQUENCE[-1]['start_year']:
-        return LOVER_DAYUN_SEQUENCE[-1]['ganzhi']
-    
-    return LOVER_DAYUN_SEQUENCE[0]['ganzhi']
+# 爱人的计分表、大运序列与查询函数统一定义在 calculate_lover_lifetime_data 中
+from calculate_lover_lifetime_data import (
+    LOVER_TIANGAN_SCORES, LOVER_DIZHI_SCORES, LOVER_DAYUN_SEQUENCE, LOVER_PROFILE,
+    get_lover_ganzhi_score, get_lover_dayun_for_year, get_accurate_ganzhi_for_date
+)
+from final_lifetime_calculator import TIANGAN_SCORES, DIZHI_SCORES
+from person_lifetime_calculator import PersonLifetimeCalculator
 
 def verify_lover_dayun_sequence():
     """验证爱人的大运序列"""
@@ -73,25 +40,6 @@ def verify_lover_dayun_sequence():
         
         print(f"   {dayun['ganzhi']} ({dayun['start_year']}-{dayun['end_year']}) {age_start}-{age_end}岁 = {gan}({LOVER_TIANGAN_SCORES[gan]}) + {zhi}({LOVER_DIZHI_SCORES[zhi]}) = {score}分")
 
-def get_accurate_ganzhi_for_date(year, month, day):
-    """获取指定日期的准确干支（考虑节气分界）"""
-    try:
-        solar = Solar.fromYmdHms(year, month, day, 12, 0, 0)
-        lunar = solar.getLunar()
-        ba = lunar.getEightChar()
-        
-        return {
-            'year_gan': ba.getYearGan(),
-            'year_zhi': ba.getYearZhi(),
-            'month_gan': ba.getMonthGan(),
-            'month_zhi': ba.getMonthZhi(),
-            'day_gan': ba.getDayGan(),
-            'day_zhi': ba.getDayZhi()
-        }
-    except Exception as e:
-        print(f"获取{year}-{month}-{day}干支时出错: {e}")
-        return None
-
 def calculate_lover_2025_sample():
     """计算爱人2025年各月的分数样本"""
     print("\n📊 计算爱人2025年各月运势")
@@ -130,68 +78,17 @@ def calculate_lover_lifetime_scores(start_year=1995, end_year=2055):
     print("⚡ 使用爱人的专属计分规则")
     
     daily_scores = []
-    processed_days = 0
+    calculator = PersonLifetimeCalculator()
     
     # 为了演示，先计算几年的数据
     demo_years = [2024, 2025, 2026]
     
     for year in demo_years:
-        print(f"   正在计算 {year}年...", end="")
-        
-        year_count = 0
-        
-        # 获取当年大运
-        current_dayun = get_lover_dayun_for_year(year)
-        dayun_gan, dayun_zhi = current_dayun[0], current_dayun[1]
-        dayun_score = get_lover_ganzhi_score(dayun_gan, dayun_zhi)
-        
-        # 计算当年每一天
-        current_date = datetime.date(year, 1, 1)
-        end_date = datetime.date(year, 12, 31)
-        
-        while current_date <= end_date:
-            try:
-                # 获取当天的准确干支
-                ganzhi = get_accurate_ganzhi_for_date(current_date.year, current_date.month, current_date.day)
-                
-                if ganzhi:
-                    # 计算各层分数
-                    liunian_score = get_lover_ganzhi_score(ganzhi['year_gan'], ganzhi['year_zhi'])
-                    liuyue_score = get_lover_ganzhi_score(ganzhi['month_gan'], ganzhi['month_zhi'])
-                    liuri_score = get_lover_ganzhi_score(ganzhi['day_gan'], ganzhi['day_zhi'])
-                    
-                    # 最终总分
-                    final_score = dayun_score + liunian_score + liuyue_score + liuri_score
-                    
-                    # 记录数据
-                    daily_data = {
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'year': year,
-                        'dayun_ganzhi': current_dayun,
-                        'liunian_ganzhi': f"{ganzhi['year_gan']}{ganzhi['year_zhi']}",
-                        'liuyue_ganzhi': f"{ganzhi['month_gan']}{ganzhi['month_zhi']}",
-                        'liuri_ganzhi': f"{ganzhi['day_gan']}{ganzhi['day_zhi']}",
-                        'dayun_score': dayun_score,
-                        'liunian_score': liunian_score,
-                        'liuyue_score': liuyue_score,
-                        'liuri_score': liuri_score,
-                        'final_score': final_score
-                    }
-                    
-                    daily_scores.append(daily_data)
-                    year_count += 1
-                
-                current_date += datetime.timedelta(days=1)
-                processed_days += 1
-                
-            except Exception as e:
-                print(f"计算{current_date}时出错: {e}")
-                current_date += datetime.timedelta(days=1)
-                continue
-        
-        print(f" 完成({year_count}天)")
+        year_scores = calculator.calculate_daily_scores(LOVER_PROFILE, year, year)
+        daily_scores.extend(year_scores)
+        print(f"   正在计算 {year}年... 完成({len(year_scores)}天)")
     
-    print(f"\n✅ 示例计算完成！共处理了 {processed_days} 天的数据")
+    print(f"\n✅ 示例计算完成！共处理了 {len(daily_scores)} 天的数据")
     
     # 简单统计
     if daily_scores:
@@ -218,8 +115,8 @@ def compare_couple_fortune():
         print()
         
         # 用户的分数（使用您的规则）
-        your_tiangan = {'甲': 1, '乙': 4, '丙': 2, '丁': 3, '戊': 8, '己': 5, '庚': 9, '辛': 7, '壬': 10, '癸': 6}
-        your_dizhi = {'子': 12, '丑': 10, '寅': 1, '卯': 2, '辰': 3, '巳': 5, '午': 4, '未': 6, '申': 11, '酉': 8, '戌': 9, '亥': 7}
+        your_tiangan = TIANGAN_SCORES
+        your_dizhi = DIZHI_SCORES
         
         your_dayun = "己卯"  # 您当前的大运
         your_dayun_score = your_tiangan[your_dayun[0]] + your_dizhi[your_dayun[1]]
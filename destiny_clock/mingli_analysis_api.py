@@ -8,23 +8,31 @@
 
 import os
 import json
-from google import genai
-from google.genai import types
+import time
+import hashlib
+import threading
+
+from mingli_result_cache import get_result_cache, result_key
+from mingli_model_client import get_model_limiter, ModelBusyError, DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES
 
 # 获取API密钥
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
+# 上下文缓存默认保留时间（秒）
+DEFAULT_CONTEXT_CACHE_TTL = 3600
+
+# 候选配置文件，按优先级排列
+CONFIG_FILES = [
+    'mingli_prompts_v2.json',   # 最新版本的提示词
+    'mingli_prompts_new.json',  # 新修复的文件
+    'mingli_config.json',       # 旧格式但语法正确的文件
+    'mingli_prompts.json'       # 原始文件（可能有语法错误）
+]
+
 # 加载配置文件
 def load_config():
     """加载配置文件，优先使用新格式，如果不存在则使用旧格式"""
-    config_files = [
-        'mingli_prompts_v2.json',   # 最新版本的提示词
-        'mingli_prompts_new.json',  # 新修复的文件
-        'mingli_config.json',       # 旧格式但语法正确的文件
-        'mingli_prompts.json'       # 原始文件（可能有语法错误）
-    ]
-    
-    for config_file in config_files:
+    for config_file in CONFIG_FILES:
         config_path = os.path.join(os.path.dirname(__file__), config_file)
         if os.path.exists(config_path):
             try:
@@ -142,72 +150,331 @@ def build_prompts_from_config(config):
     
     return None
 
-def analyze_bazi(bazi_input):
+class MingliAnalysisError(Exception):
+    """分析无法进行（密钥、配置等问题），消息直接返回给前端"""
+
+
+class PromptBundle:
+    """一份加载好的提示词配置：模型参数、对话前缀，以及预先构建的 Gemini 内容对象
+
+    同一份配置在各请求间共享，调用方只读不改。
     """
-    使用Gemini AI分析八字
-    
-    Args:
-        bazi_input: 八字字符串，格式如 "甲子 乙丑 丙寅 丁卯"
-    
-    Returns:
-        dict: 包含分析结果的字典
+
+    def __init__(self, config, prompts, files_state):
+        self.config = config
+        self.prompts = prompts
+        self.model_config = config.get('model', {})
+        self.files_state = files_state
+        # 提示词和模型参数的指纹，用于识别配置版本（如上下文缓存、结果缓存）
+        self.signature = hashlib.sha1(
+            json.dumps({'prompts': prompts, 'model': self.model_config},
+                       ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self._gemini_contents = None
+
+    def gemini_contents(self):
+        """固定的对话前缀 → types.Content 列表（首次调用时构建）"""
+        if self._gemini_contents is None:
+            from google.genai import types
+            self._gemini_contents = [
+                types.Content(role=prompt['role'], parts=[types.Part.from_text(text=prompt['content'])])
+                for prompt in self.prompts
+            ]
+        return self._gemini_contents
+
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+
+def _config_files_state():
+    """各候选配置文件的 (文件名, 修改时间)，不存在的文件记为None"""
+    state = []
+    for config_file in CONFIG_FILES:
+        try:
+            mtime = os.stat(os.path.join(os.path.dirname(__file__), config_file)).st_mtime_ns
+        except OSError:
+            mtime = None
+        state.append((config_file, mtime))
+    return tuple(state)
+
+
+def get_prompt_bundle():
+    """进程内共享的提示词配置，只在配置文件改动（修改时间变化）后重新加载
+
+    配置无法加载或提示词无法构建时抛出 MingliAnalysisError
     """
-    
-    if not GEMINI_API_KEY:
-        return {"error": "未配置GEMINI_API_KEY环境变量"}
-    
-    # 加载配置
-    config = load_config()
-    if not config:
-        return {"error": "配置文件加载失败"}
-    
-    try:
-        # 初始化客户端
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
-        # 从配置获取模型设置
-        model_config = config.get('model', {})
-        model_name = model_config.get('name', 'gemini-2.5-pro')
-        
-        # 构建对话内容
+    global _bundle
+    files_state = _config_files_state()
+    with _bundle_lock:
+        if _bundle is not None and _bundle.files_state == files_state:
+            return _bundle
+
+        config = load_config()
+        if not config:
+            raise MingliAnalysisError("配置文件加载失败")
         prompts = build_prompts_from_config(config)
         if not prompts:
-            return {"error": "提示词构建失败"}
-        
-        # 将prompts转换为Gemini格式
-        contents = []
-        for prompt in prompts:
-            contents.append(types.Content(
-                role=prompt['role'],
-                parts=[types.Part.from_text(text=prompt['content'])]
-            ))
-        
-        # 添加用户输入的八字
-        contents.append(types.Content(
-            role="user",
-            parts=[types.Part.from_text(text=bazi_input)]
-        ))
+            raise MingliAnalysisError("提示词构建失败")
+        _bundle = PromptBundle(config, prompts, files_state)
+        return _bundle
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """进程内共享的 Gemini 客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # google-genai 导入较慢（约0.6秒），第一次调用模型时才导入
+            from google import genai
+            _client = genai.Client(api_key=GEMINI_API_KEY)
+        return _client
+
+
+class GeminiContextCache:
+    """Gemini 服务端上下文缓存：固定的对话前缀只上传一次，之后每次只需发送新的八字
+
+    创建失败（模型不支持、前缀太短等）时记下失败的配置版本，不再重试，直接发送完整对话。
+    """
+
+    def __init__(self, ttl=DEFAULT_CONTEXT_CACHE_TTL):
+        self.ttl = ttl
+        self._name = None
+        self._signature = None
+        self._expires_at = 0
+        self._failed_signature = None
+        self._lock = threading.Lock()
+
+    def get_name(self, client, bundle, model_name):
+        """当前配置对应的缓存名称，无法使用缓存时返回None"""
+        signature = (bundle.signature, model_name)
+        with self._lock:
+            if signature == self._failed_signature:
+                return None
+            # 提前一分钟换新，避免请求途中缓存过期
+            if self._name and self._signature == signature and time.time() < self._expires_at - 60:
+                return self._name
+            from google.genai import types
+            try:
+                cached = client.caches.create(
+                    model=model_name,
+                    config=types.CreateCachedContentConfig(
+                        contents=bundle.gemini_contents(),
+                        ttl=f'{int(self.ttl)}s',
+                        display_name=f'mingli-prompts-{bundle.signature[:12]}'
+                    )
+                )
+            except Exception as e:
+                print(f"⚠️ 创建上下文缓存失败，改为发送完整对话: {e}")
+                self._failed_signature = signature
+                self._name = None
+                return None
+            self._name = cached.name
+            self._signature = signature
+            self._expires_at = time.time() + self.ttl
+            print(f"✅ 已创建上下文缓存: {cached.name}")
+            return self._name
+
+    def invalidate(self):
+        with self._lock:
+            self._name = None
+
+
+class _CacheRequestFailed(Exception):
+    """带上下文缓存的请求在产出任何内容前失败"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class GeminiBackend:
+    """Gemini 模型后端"""
+    name = 'gemini'
+    requires_api_key = True
+
+    def __init__(self, context_cache=None):
+        self.context_cache = context_cache
+
+    def stream(self, bundle, bazi_input):
+        """逐块产出模型输出的文本"""
+        from google.genai import types
+        client = get_gemini_client()
+        model_config = bundle.model_config
+        model_name = model_config.get('name', 'gemini-2.5-pro')
+        user_content = types.Content(role="user", parts=[types.Part.from_text(text=bazi_input)])
         
-        # 配置生成参数
-        generate_content_config = types.GenerateContentConfig(
+        # 配置生成参数（api_settings.timeout 为秒，HttpOptions 以毫秒计）
+        timeout = bundle.config.get('api_settings', {}).get('timeout', DEFAULT_TIMEOUT)
+        config_args = dict(
             temperature=model_config.get('temperature', 1.15),
             thinking_config = types.ThinkingConfig(
                 thinking_budget=model_config.get('thinking_budget', -1),
             ),
+            http_options=types.HttpOptions(timeout=int(timeout * 1000)),
         )
         
-        # 调用API生成分析
-        analysis_text = ""
-        for chunk in client.models.generate_content_stream(
-            model=model_name,
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if chunk.text:
-                analysis_text += chunk.text
+        cache_name = self.context_cache.get_name(client, bundle, model_name) if self.context_cache else None
+        if cache_name:
+            try:
+                # 在拿到第一块之前失败（如缓存已被删除）时，退回发送完整对话
+                yield from self._generate(client, model_name, [user_content],
+                                          types.GenerateContentConfig(cached_content=cache_name, **config_args))
+                return
+            except _CacheRequestFailed as e:
+                print(f"⚠️ 上下文缓存不可用，改为发送完整对话: {e.error}")
+                self.context_cache.invalidate()
         
+        yield from self._generate(client, model_name, bundle.gemini_contents() + [user_content],
+                                  types.GenerateContentConfig(**config_args), wrap_errors=False)
+
+    def _generate(self, client, model_name, contents, config, wrap_errors=True):
+        started = False
+        try:
+            for chunk in client.models.generate_content_stream(
+                model=model_name,
+                contents=contents,
+                config=config,
+            ):
+                started = True
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            if wrap_errors and not started:
+                raise _CacheRequestFailed(e)
+            raise
+
+
+class FakeBackend:
+    """离线测试用的假模型：不调用网络，按固定间隔吐出一段模板分析"""
+    name = 'fake'
+    requires_api_key = False
+
+    def __init__(self, delay=None, chunk_count=8):
+        self.delay = float(os.environ.get('MINGLI_FAKE_DELAY', 0.2)) if delay is None else delay
+        self.chunk_count = chunk_count
+
+    def stream(self, bundle, bazi_input):
+        sections = ['系统优势与潜能', '系统劣势与风险', '人生阶段提示', '综合建议']
+        yield f"### 八字 {bazi_input} 的测试分析\n\n"
+        for i in range(self.chunk_count):
+            time.sleep(self.delay)
+            section = sections[i % len(sections)]
+            yield f"**{section}（{i + 1}/{self.chunk_count}）**：这是离线假模型生成的占位内容。\n\n"
+
+
+BACKENDS = {
+    'gemini': lambda: GeminiBackend(get_context_cache()),
+    'fake': FakeBackend,
+}
+
+
+_context_cache = None
+
+
+def get_context_cache():
+    """进程内共享的上下文缓存；未设置环境变量 MINGLI_CONTEXT_CACHE=1 时返回None
+
+    保留时间可用 MINGLI_CONTEXT_CACHE_TTL（秒）配置
+    """
+    global _context_cache
+    if os.environ.get('MINGLI_CONTEXT_CACHE', '0').lower() not in ('1', 'true', 'yes'):
+        return None
+    with _client_lock:
+        if _context_cache is None:
+            _context_cache = GeminiContextCache(
+                ttl=float(os.environ.get('MINGLI_CONTEXT_CACHE_TTL', DEFAULT_CONTEXT_CACHE_TTL))
+            )
+        return _context_cache
+
+
+def get_backend(name=None):
+    """按名称（默认取环境变量 MINGLI_BACKEND，缺省 gemini）创建模型后端"""
+    name = name or os.environ.get('MINGLI_BACKEND', 'gemini')
+    if name not in BACKENDS:
+        raise MingliAnalysisError(f"未知的模型后端: {name}")
+    return BACKENDS[name]()
+
+
+def preload():
+    """预先导入模型SDK并加载提示词配置，服务启动后在后台调用，避免第一个请求等待"""
+    try:
+        if get_backend().name == 'gemini':
+            from google.genai import types  # noqa: F401
+        get_prompt_bundle()
+    except Exception as e:
+        print(f"⚠️ 命理分析预加载失败: {e}")
+
+
+def stream_bazi_analysis(bazi_input, backend=None, use_cache=True):
+    """
+    流式分析八字，逐块产出分析文本
+    
+    相同八字、相同提示词配置的完整结果会被缓存，命中时一次性产出缓存的全文；
+    use_cache=False 时跳过缓存，重新调用模型（结果仍会写入缓存）
+    无法开始分析时抛出 MingliAnalysisError；模型调用中的其它异常原样抛出
+    """
+    backend = backend or get_backend()
+    
+    if backend.requires_api_key and not GEMINI_API_KEY:
+        raise MingliAnalysisError("未配置GEMINI_API_KEY环境变量")
+    
+    # 配置只在文件改动后重新加载
+    bundle = get_prompt_bundle()
+    
+    result_cache = get_result_cache()
+    cache_key = result_key(bazi_input, bundle.signature, backend.name) if result_cache else None
+    if result_cache and use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    # 并发上限、限速、超时与重试
+    api_settings = bundle.config.get('api_settings', {})
+    limited = get_model_limiter().stream(
+        lambda: backend.stream(bundle, bazi_input),
+        timeout=api_settings.get('timeout', DEFAULT_TIMEOUT),
+        max_retries=api_settings.get('max_retries', DEFAULT_MAX_RETRIES)
+    )
+    
+    chunks = []
+    try:
+        for text in limited:
+            if text:
+                chunks.append(text)
+                yield text
+    except ModelBusyError as e:
+        raise MingliAnalysisError(str(e))
+    finally:
+        limited.close()
+    
+    # 只缓存完整的结果（中途出错或被关闭时不会走到这里）
+    if result_cache and chunks:
+        result_cache.put(cache_key, bazi_input, "".join(chunks))
+
+
+def analyze_bazi(bazi_input, backend=None, use_cache=True):
+    """
+    使用Gemini AI分析八字
+    
+    Args:
+        bazi_input: 八字字符串，格式如 "甲子 乙丑 丙寅 丁卯"
+        backend: 模型后端，默认按 MINGLI_BACKEND 选择
+        use_cache: False 时跳过结果缓存，重新调用模型
+    
+    Returns:
+        dict: 包含分析结果的字典
+    """
+    try:
+        analysis_text = "".join(stream_bazi_analysis(bazi_input, backend, use_cache))
         return {"analysis": analysis_text}
-        
+    except MingliAnalysisError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"分析过程中出现错误: {str(e)}"}
 
@@ -233,8 +500,8 @@ def create_api_handler(app):
             if not bazi or not isinstance(bazi, str):
                 return jsonify({"error": "八字格式不正确"}), 400
             
-            # 调用分析函数
-            result = analyze_bazi(bazi)
+            # 调用分析函数（no_cache 为真时跳过结果缓存）
+            result = analyze_bazi(bazi, use_cache=not data.get('no_cache'))
             
             # 返回结果
             if 'error' in result:
@@ -244,6 +511,59 @@ def create_api_handler(app):
                 
         except Exception as e:
             return jsonify({"error": f"服务器错误: {str(e)}"}), 500
+    
+    # 流式接口：模型每输出一块就以SSE推送，不必等全文生成完
+    from flask import Response, stream_with_context
+    from mingli_jobs import get_job_queue, validate_bazi_request, format_sse, stream_analysis_events, mingli_stats
+    
+    @app.route('/api/mingli-analysis/stats', methods=['GET'])
+    def mingli_stats_handler():
+        return jsonify(mingli_stats()), 200
+    
+    @app.route('/api/mingli-analysis/stream', methods=['POST'])
+    def mingli_analysis_stream_handler():
+        data = request.get_json(silent=True)
+        error = validate_bazi_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        events = stream_analysis_events(data['bazi'], use_cache=not data.get('no_cache'))
+        return Response(stream_with_context(format_sse(event, payload) for event, payload in events),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    # 异步任务接口：提交后立即返回任务id，轮询状态或通过SSE接收分析内容
+    
+    @app.route('/api/mingli-analysis/jobs', methods=['POST'])
+    def mingli_job_submit_handler():
+        data = request.get_json(silent=True)
+        error = validate_bazi_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        job_id = get_job_queue().submit(data['bazi'], use_cache=not data.get('no_cache'))
+        return jsonify({
+            "job_id": job_id,
+            "status_url": f"/api/mingli-analysis/jobs/{job_id}",
+            "events_url": f"/api/mingli-analysis/jobs/{job_id}/events"
+        }), 202
+    
+    @app.route('/api/mingli-analysis/jobs/<job_id>', methods=['GET'])
+    def mingli_job_status_handler(job_id):
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return jsonify({"error": "任务不存在"}), 404
+        return jsonify(job), 200
+    
+    @app.route('/api/mingli-analysis/jobs/<job_id>/events', methods=['GET'])
+    def mingli_job_events_handler(job_id):
+        queue = get_job_queue()
+        if queue.get(job_id, include_text=False) is None:
+            return jsonify({"error": "任务不存在"}), 404
+        start = request.args.get('start', 0, type=int)
+        events = (format_sse(event, data) for event, data in queue.iter_events(job_id, start))
+        return Response(stream_with_context(events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # 如果直接运行此文件，可以用于测试
 if __name__ == "__main__":
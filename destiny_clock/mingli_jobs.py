@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命理分析异步任务队列
+提交八字后立即返回任务id，分析在有上限的线程池中进行；
+前端可轮询任务状态，或通过SSE按块接收模型输出。
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mingli_analysis_api import stream_bazi_analysis, MingliAnalysisError
+from mingli_model_client import get_model_limiter
+from mingli_result_cache import get_result_cache
+
+DEFAULT_WORKERS = 2          # 同时进行的模型调用数
+DEFAULT_JOB_TIMEOUT = 300    # 单个任务的最长时间（秒）
+JOB_RETENTION = 3600         # 结束的任务保留多久（秒）
+MAX_FINISHED_JOBS = 200      # 最多保留的已结束任务数
+
+FINISHED_STATUSES = ('done', 'error', 'timeout')
+
+
+class AnalysisJob:
+    """一次八字分析任务"""
+
+    def __init__(self, bazi, use_cache=True):
+        self.id = uuid.uuid4().hex
+        self.bazi = bazi
+        self.use_cache = use_cache
+        self.status = 'queued'
+        self.chunks = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self, include_text=True):
+        data = {
+            'job_id': self.id,
+            'bazi': self.bazi,
+            'status': self.status,
+            'chunk_count': len(self.chunks),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if include_text:
+            data['analysis'] = ''.join(self.chunks)
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class AnalysisJobQueue:
+    """有上限的分析任务线程池"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, job_timeout=DEFAULT_JOB_TIMEOUT, backend=None):
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.backend = backend
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mingli-job')
+
+    def submit(self, bazi, use_cache=True):
+        """提交任务，返回任务id（use_cache=False 时跳过结果缓存）"""
+        job = AnalysisJob(bazi, use_cache)
+        with self._condition:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def _run(self, job):
+        with self._condition:
+            job.status = 'running'
+            job.started_at = time.time()
+            self._condition.notify_all()
+
+        # 模型流在单独的读取线程里迭代，这里按截止时间等待下一块：
+        # 模型在两块之间（或第一块之前）卡住时也能按时结束任务、让出工作线程
+        deadline = time.monotonic() + self.job_timeout
+        events = queue.Queue()
+        cancelled = threading.Event()
+        reader = threading.Thread(target=self._read_stream, args=(job, events, cancelled),
+                                  name=f'mingli-stream-{job.id[:8]}', daemon=True)
+        reader.start()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    kind, value = events.get(timeout=remaining)
+                except queue.Empty:
+                    self._finish(job, 'timeout', f"分析超时（超过{self.job_timeout}秒）")
+                    return
+                if kind == 'chunk':
+                    with self._condition:
+                        job.chunks.append(value)
+                        self._condition.notify_all()
+                elif kind == 'done':
+                    self._finish(job, 'done')
+                    return
+                elif isinstance(value, MingliAnalysisError):
+                    self._finish(job, 'error', str(value))
+                    return
+                else:
+                    self._finish(job, 'error', f"分析过程中出现错误: {str(value)}")
+                    return
+        finally:
+            # 超时后读取线程收到下一块（或底层连接超时）时关闭模型流，不再写缓存
+            cancelled.set()
+
+    def _read_stream(self, job, events, cancelled):
+        """读取线程：把模型输出逐块放入 events，结束时放入 done 或 error"""
+        stream = stream_bazi_analysis(job.bazi, self.backend, job.use_cache)
+        try:
+            for text in stream:
+                if cancelled.is_set():
+                    return
+                events.put(('chunk', text))
+            events.put(('done', None))
+        except Exception as e:
+            events.put(('error', e))
+        finally:
+            stream.close()
+
+    def _finish(self, job, status, error=None):
+        with self._condition:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+            self._condition.notify_all()
+
+    def _prune(self):
+        """清理过期的已结束任务（调用方持有锁）"""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_at > JOB_RETENTION:
+                del self._jobs[job.id]
+
+    def get(self, job_id, include_text=True):
+        """任务状态快照，任务不存在时返回None"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return job.to_dict(include_text) if job else None
+
+    def iter_events(self, job_id, start=0, poll_timeout=15):
+        """按顺序产出任务事件 (事件名, 数据)，直到任务结束
+
+        事件: status（排队/开始）、chunk（新的一块文本）、done / error / timeout（结束）；
+        等待超过 poll_timeout 秒没有新内容时产出 ping，便于SSE保持连接
+        start: 从第几块开始（断线重连时跳过已收到的块）
+        """
+        sent = start
+        last_status = None
+        while True:
+            with self._condition:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    yield 'error', {'error': '任务不存在'}
+                    return
+                if sent >= len(job.chunks) and job.status == last_status and not job.finished:
+                    self._condition.wait(poll_timeout)
+                chunks = job.chunks[sent:]
+                status = job.status
+                snapshot = job.to_dict(include_text=False) if job.finished else None
+
+            changed = status != last_status
+            if changed and status in ('queued', 'running'):
+                yield 'status', {'status': status}
+            last_status = status
+
+            for text in chunks:
+                sent += 1
+                yield 'chunk', {'index': sent - 1, 'text': text}
+
+            if snapshot is not None:
+                yield status, snapshot
+                return
+            if not chunks and not changed:
+                yield 'ping', {}
+
+    def stats(self):
+        with self._condition:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'workers': self.workers, 'jobs': counts}
+
+
+def validate_bazi_request(data):
+    """检查请求体，返回错误信息或None"""
+    if not data or 'bazi' not in data:
+        return "请提供八字信息"
+    if not data['bazi'] or not isinstance(data['bazi'], str):
+        return "八字格式不正确"
+    return None
+
+
+def stream_analysis_events(bazi, use_cache=True, backend=None):
+    """不经任务队列、直接流式分析的SSE事件 (事件名, 数据)
+
+    chunk 逐块产出，最后是 done 或 error；客户端断开（生成器被关闭）时模型调用随之停止
+    """
+    stream = stream_bazi_analysis(bazi, backend, use_cache)
+    index = 0
+    try:
+        for text in stream:
+            yield 'chunk', {'index': index, 'text': text}
+            index += 1
+        yield 'done', {'chunk_count': index}
+    except MingliAnalysisError as e:
+        yield 'error', {'error': str(e)}
+    except Exception as e:
+        yield 'error', {'error': f"分析过程中出现错误: {str(e)}"}
+    finally:
+        stream.close()
+
+
+def mingli_stats():
+    """模型调用、结果缓存和任务队列的运行指标"""
+    result_cache = get_result_cache()
+    return {
+        'model_calls': get_model_limiter().stats(),
+        'result_cache': result_cache.stats() if result_cache else None,
+        'jobs': get_job_queue().stats()
+    }
+
+
+def format_sse(event, data):
+    """编码一条 server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+
+
+_shared_queue = None
+_shared_lock = threading.Lock()
+
+
+def get_job_queue():
+    """进程内共享的任务队列"""
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = AnalysisJobQueue(
+                workers=int(os.environ.get('MINGLI_JOB_WORKERS', DEFAULT_WORKERS)),
+                job_timeout=float(os.environ.get('MINGLI_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT))
+            )
+        return _shared_queue
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模型调用限流与重试
+所有对模型后端的调用都经过同一个 ModelCallLimiter：
+- 并发上限：同时进行的模型调用数有上限，多余的请求排队等待（最多等 timeout 秒）
+- 令牌桶限速：每分钟的调用次数有上限，突发请求不会一次耗尽配额
+- 超时与重试：按配置中的 api_settings.timeout / max_retries，对限流、服务端错误等临时故障做带抖动的指数退避重试
+  （只在收到第一块输出之前重试，避免重复输出）
+- 指标：排队数、进行中的调用数、重试/失败次数、首块延迟和总耗时
+
+环境变量：
+    MINGLI_MAX_CONCURRENCY     同时进行的模型调用数（默认4）
+    MINGLI_RATE_LIMIT          每分钟最多发起的调用数（默认30）
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_RATE_PER_MINUTE = 30
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 1.0      # 第一次重试前的最长等待（秒）
+BACKOFF_MAX = 30.0      # 单次重试等待的上限（秒）
+LATENCY_WINDOW = 200    # 延迟统计保留最近多少次调用
+
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class ModelBusyError(Exception):
+    """排队超时，没能在限定时间内拿到调用名额"""
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多攒 capacity 个"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """取一个令牌，timeout 秒内取不到返回False"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+
+def is_retryable(error):
+    """是否为值得重试的临时故障：限流、服务端错误、超时、网络中断"""
+    if getattr(error, 'code', None) in RETRYABLE_STATUS_CODES:
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # httpx 的超时和网络错误（google-genai 底层使用 httpx）
+    name = type(error).__name__
+    return name.endswith('Timeout') or name in ('ConnectError', 'ReadError', 'RemoteProtocolError')
+
+
+def backoff_delay(attempt):
+    """第 attempt 次重试前的等待时间（full jitter 指数退避）"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class ModelCallLimiter:
+    """模型调用的并发上限、限速、重试和指标"""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, rate_per_minute=DEFAULT_RATE_PER_MINUTE):
+        self.max_concurrency = max_concurrency
+        self.rate_per_minute = rate_per_minute
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_minute / 60.0, max(1, min(max_concurrency, rate_per_minute)))
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self._first_chunk_latency = deque(maxlen=LATENCY_WINDOW)
+        self._total_latency = deque(maxlen=LATENCY_WINDOW)
+
+    def stream(self, start_stream, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, retryable=is_retryable):
+        """在限流保护下调用 start_stream()，逐块产出它的输出
+
+        start_stream: 每次尝试调用一次，返回文本块的迭代器
+        排队超过 timeout 秒抛出 ModelBusyError；重试用尽后抛出最后一次的异常
+        """
+        queued_at = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=timeout)
+            if acquired:
+                remaining = max(0.0, timeout - (time.monotonic() - queued_at))
+                if not self._bucket.acquire(remaining):
+                    self._slots.release()
+                    acquired = False
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise ModelBusyError(f"模型调用繁忙（排队超过{timeout}秒），请稍后重试")
+
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        started = time.monotonic()
+        succeeded = False
+        try:
+            attempt = 0
+            while True:
+                received = False
+                try:
+                    for text in start_stream():
+                        if not received:
+                            received = True
+                            self._record(self._first_chunk_latency, time.monotonic() - started)
+                        yield text
+                    break
+                except Exception as e:
+                    if received or attempt >= max_retries or not retryable(e):
+                        raise
+                    delay = backoff_delay(attempt)
+                    attempt += 1
+                    with self._lock:
+                        self.retries += 1
+                    print(f"⚠️ 模型调用失败，{delay:.1f}秒后第{attempt}次重试: {e}")
+                    time.sleep(delay)
+            succeeded = True
+        except GeneratorExit:
+            # 调用方提前关闭（客户端断开、任务超时），不算失败
+            succeeded = True
+            raise
+        finally:
+            self._record(self._total_latency, time.monotonic() - started)
+            with self._lock:
+                self.in_flight -= 1
+                if not succeeded:
+                    self.failures += 1
+            self._slots.release()
+
+    def _record(self, samples, value):
+        with self._lock:
+            samples.append(value)
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {
+            'avg': round(sum(ordered) / len(ordered), 3),
+            'p50': round(ordered[len(ordered) // 2], 3),
+            'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            'max': round(ordered[-1], 3)
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'rate_per_minute': self.rate_per_minute,
+                'waiting': self.waiting,
+                'in_flight': self.in_flight,
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'first_chunk_seconds': self._summary(self._first_chunk_latency),
+                'total_seconds': self._summary(self._total_latency)
+            }
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_model_limiter():
+    """进程内共享的模型调用限流器"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = ModelCallLimiter(
+                max_concurrency=int(os.environ.get('MINGLI_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+                rate_per_minute=float(os.environ.get('MINGLI_RATE_LIMIT', DEFAULT_RATE_PER_MINUTE))
+            )
+        return _shared_limiter
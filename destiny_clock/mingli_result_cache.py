@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命理分析结果缓存
+同一个八字、同一版提示词和模型参数的分析结果保存到磁盘，重复查询直接返回，不再调用模型。
+缓存键 = 规范化的四柱 + 提示词配置指纹 + 模型后端，提示词或模型参数一改，旧结果自然失效。
+
+环境变量：
+    MINGLI_RESULT_CACHE=0          关闭结果缓存
+    MINGLI_RESULT_CACHE_DIR        缓存目录（默认 destiny_clock/mingli_result_cache）
+    MINGLI_RESULT_CACHE_TTL        结果有效期，秒（默认30天）
+    MINGLI_RESULT_CACHE_SIZE       最多保存的结果数（默认1000）
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mingli_result_cache')
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 1000
+
+TIANGAN = '甲乙丙丁戊己庚辛壬癸'
+DIZHI = '子丑寅卯辰巳午未申酉戌亥'
+_PILLAR_PATTERN = re.compile(f'[{TIANGAN}][{DIZHI}]')
+
+
+def normalize_bazi(bazi):
+    """八字字符串 → 规范形式 "甲子 乙丑 丙寅 丁卯"
+
+    只有输入恰好是四柱加空白、标点时才规范化；带性别、标注等其它文字的输入发给模型的提示词不同，
+    只压缩空白，保留原文
+    """
+    pillars = _PILLAR_PATTERN.findall(bazi)
+    rest = _PILLAR_PATTERN.sub('', bazi)
+    if len(pillars) == 4 and all(ch.isspace() or unicodedata.category(ch).startswith('P') for ch in rest):
+        return ' '.join(pillars)
+    return ' '.join(bazi.split())
+
+
+def result_key(bazi, signature, backend_name):
+    """缓存键：规范化八字 + 提示词配置指纹 + 模型后端"""
+    raw = json.dumps([normalize_bazi(bazi), signature, backend_name], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class MingliResultCache:
+    """以内容地址命名的结果文件缓存（每条结果一个JSON文件）
+
+    命中时刷新文件修改时间，超出数量上限时删除最久未用的结果。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """取缓存的分析文本，未命中或已过期时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            entry = None
+        except Exception as e:
+            print(f"⚠️ 读取分析结果缓存失败: {e}")
+            entry = None
+
+        if entry is not None and time.time() - entry.get('created_at', 0) > self.ttl:
+            self._remove(path)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['analysis']
+
+    def put(self, key, bazi, analysis):
+        """保存一次完整的分析结果"""
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        entry = {
+            'bazi': normalize_bazi(bazi),
+            'created_at': time.time(),
+            'analysis': analysis
+        }
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ 写入分析结果缓存失败: {e}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _entries(self):
+        """[(修改时间, 路径), ...]，按最近使用时间升序"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+                self._remove(path)
+                self.evictions += 1
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, path in self._entries():
+                self._remove(path)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries()),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'cache_dir': self.cache_dir
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def result_cache_enabled():
+    return os.environ.get('MINGLI_RESULT_CACHE', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def get_result_cache():
+    """进程内共享的结果缓存，MINGLI_RESULT_CACHE=0 时返回None"""
+    global _shared_cache
+    if not result_cache_enabled():
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = MingliResultCache(
+                cache_dir=os.environ.get('MINGLI_RESULT_CACHE_DIR') or DEFAULT_CACHE_DIR,
+                ttl=float(os.environ.get('MINGLI_RESULT_CACHE_TTL', DEFAULT_TTL)),
+                max_entries=int(os.environ.get('MINGLI_RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+            )
+        return _shared_cache
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+本命盘分析缓存
+本命八字、用神忌神、专业计分、增强计分等结果只取决于（出生日期, 时辰, 性别），
+各接口共用一个有上限的LRU缓存，避免每次请求都从头重算。
+可选落盘：设置 NATAL_CACHE_DIR 后，分析结果以pickle文件保存，服务重启后仍可命中。
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+from lunar_python import Solar
+
+from natal_features import NatalFeatures
+
+# 计分算法调整后递增，使旧的落盘结果失效
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 256
+
+
+def natal_key(birth_year, birth_month, birth_day, birth_hour, gender):
+    """缓存键：出生日期 + 时辰 + 性别"""
+    return (int(birth_year), int(birth_month), int(birth_day), int(birth_hour), gender)
+
+
+def is_error_result(value):
+    """评分器出错时返回的结果（带 'error' 键的dict），这类结果不进缓存"""
+    return isinstance(value, dict) and 'error' in value
+
+
+class NatalAnalysisCache:
+    """线程安全的LRU缓存，按（分析项, 出生信息）存放本命盘分析结果
+
+    返回的对象在各请求间共享，调用方只读不改。
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, persist_dir=None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _disk_path(self, cache_key):
+        digest = hashlib.sha1(repr((CACHE_VERSION, cache_key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.persist_dir, f'{digest}.pkl')
+
+    def _load_from_disk(self, cache_key):
+        try:
+            with open(self._disk_path(cache_key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ 读取本命缓存文件失败: {e}")
+            return None
+
+    def _save_to_disk(self, cache_key, value):
+        path = self._disk_path(cache_key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ 写入本命缓存文件失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _store(self, cache_key, value):
+        self._entries[cache_key] = value
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, section, key, compute, persist=True):
+        """取缓存，未命中时调用 compute() 计算并存入
+
+        section: 分析项名称（如 'yongshen'），key: natal_key(...) 的结果
+        persist=False 用于不便序列化的对象（如 EightChar），只放内存
+        """
+        cache_key = (section,) + tuple(key)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return self._entries[cache_key]
+
+        value = None
+        if persist and self.persist_dir:
+            value = self._load_from_disk(cache_key)
+            if value is not None and not is_error_result(value):
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(cache_key, value)
+                return value
+
+        # 计算放在锁外，慢的分析不阻塞其它请求；并发的同键请求最多重复算一次
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            if is_error_result(value):
+                # 各评分器捕获异常后返回带 error 的结果，不缓存，下次重新计算
+                return value
+            self._store(cache_key, value)
+        if persist and self.persist_dir:
+            self._save_to_disk(cache_key, value)
+        return value
+
+    def get_eight_char(self, birth_year, birth_month, birth_day, birth_hour, gender='male'):
+        """本命八字（EightChar对象只缓存在内存中）"""
+        key = natal_key(birth_year, birth_month, birth_day, birth_hour, gender)
+        return self.get_or_compute(
+            'eight_char', key,
+            lambda: Solar.fromYmdHms(birth_year, birth_month, birth_day, birth_hour, 0, 0).getLunar().getEightChar(),
+            persist=False
+        )
+
+    def get_features(self, birth_year, birth_month, birth_day, birth_hour, gender='male'):
+        """本命盘特征 NatalFeatures（只缓存在内存中）"""
+        key = natal_key(birth_year, birth_month, birth_day, birth_hour, gender)
+        return self.get_or_compute(
+            'features', key,
+            lambda: NatalFeatures(self.get_eight_char(birth_year, birth_month, birth_day, birth_hour, gender)),
+            persist=False
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'persist_dir': self.persist_dir
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_natal_cache():
+    """进程内共享的本命缓存（容量和落盘目录可用环境变量 NATAL_CACHE_SIZE / NATAL_CACHE_DIR 配置）"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = NatalAnalysisCache(
+                max_entries=int(os.environ.get('NATAL_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+                persist_dir=os.environ.get('NATAL_CACHE_DIR') or None
+            )
+        return _shared_cache
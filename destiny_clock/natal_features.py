@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+本命盘特征
+四柱干支、地支藏干、各柱十神、五行计数、格局、身强弱等只需从 EightChar 取一次，
+用神、专业计分、增强计分、增强分层等各计分器共用同一份，不再各自重复推导。
+"""
+
+GAN_WUXING = {
+    '甲': '木', '乙': '木', '丙': '火', '丁': '火', '戊': '土',
+    '己': '土', '庚': '金', '辛': '金', '壬': '水', '癸': '水'
+}
+ZHI_WUXING = {
+    '子': '水', '丑': '土', '寅': '木', '卯': '木', '辰': '土', '巳': '火',
+    '午': '火', '未': '土', '申': '金', '酉': '金', '戌': '土', '亥': '水'
+}
+
+# 年、月、日、时
+PILLARS = ('year', 'month', 'day', 'time')
+
+
+class NatalFeatures:
+    """一次性提取的本命盘特征
+
+    未在此列出的属性/方法（getYun、getLunar 等）转给原 EightChar，
+    因此可以直接替代 EightChar 传给各计分器。
+    """
+
+    def __init__(self, ba):
+        self.ba = ba
+        self.gans = {
+            'year': ba.getYearGan(), 'month': ba.getMonthGan(),
+            'day': ba.getDayGan(), 'time': ba.getTimeGan()
+        }
+        self.zhis = {
+            'year': ba.getYearZhi(), 'month': ba.getMonthZhi(),
+            'day': ba.getDayZhi(), 'time': ba.getTimeZhi()
+        }
+        self.hide_gans = {
+            'year': ba.getYearHideGan(), 'month': ba.getMonthHideGan(),
+            'day': ba.getDayHideGan(), 'time': ba.getTimeHideGan()
+        }
+        self.shishen_gan = {
+            'year': ba.getYearShiShenGan(), 'month': ba.getMonthShiShenGan(),
+            'day': ba.getDayShiShenGan(), 'time': ba.getTimeShiShenGan()
+        }
+        self.shishen_zhi = {
+            'year': ba.getYearShiShenZhi(), 'month': ba.getMonthShiShenZhi(),
+            'day': ba.getDayShiShenZhi(), 'time': ba.getTimeShiShenZhi()
+        }
+
+        self.day_master = self.gans['day']
+        self.day_wuxing = GAN_WUXING[self.day_master]
+        self.zhi_list = [self.zhis[pillar] for pillar in PILLARS]
+        # 年干、年支、月干、月支……时支
+        self.all_ganzhi = [gz for pillar in PILLARS for gz in (self.gans[pillar], self.zhis[pillar])]
+
+        self.wuxing_count = {'木': 0, '火': 0, '土': 0, '金': 0, '水': 0}
+        for pillar in PILLARS:
+            self.wuxing_count[GAN_WUXING[self.gans[pillar]]] += 1
+            self.wuxing_count[ZHI_WUXING[self.zhis[pillar]]] += 1
+
+        self._pattern = None
+        self._body_strength = None
+
+    def __getattr__(self, name):
+        if name == 'ba':
+            raise AttributeError(name)
+        return getattr(self.ba, name)
+
+    @property
+    def pattern(self):
+        """格局（首次访问时识别）"""
+        if self._pattern is None:
+            from enhanced_scoring_system import PatternDetector
+            self._pattern = PatternDetector().detect_bazi_pattern(self.ba)
+        return self._pattern
+
+    @property
+    def body_strength(self):
+        """身强弱 strong/weak/balanced（首次访问时判断）"""
+        if self._body_strength is None:
+            from enhanced_scoring_system import PatternDetector
+            self._body_strength = PatternDetector().detect_body_strength(self.ba)
+        return self._body_strength
+
+
+def natal_features(ba):
+    """EightChar → NatalFeatures（已是 NatalFeatures 时原样返回）"""
+    if isinstance(ba, NatalFeatures):
+        return ba
+    return NatalFeatures(ba)
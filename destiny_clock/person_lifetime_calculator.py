@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+通用个人一生计分计算器
+根据出生信息（日期、时辰、性别）和个人专属计分表推算大运，
+批量生成任意多人的一生每日分数，取代按人复制的计算脚本
+"""
+
+import sys
+import os
+import datetime
+import csv
+
+# 添加bazi_lib到Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
+sys.path.insert(0, bazi_lib_path)
+
+from lifetime_score_engine import SCORE_FIELDS, compute_lifetime_arrays, arrays_to_rows
+from daily_score_series import binary_path_for, rows_to_arrays, write_daily_series
+from dayun_service import get_dayun_timeline
+
+# CSV表头：只写这一行中文列名（不写英文字段行），与历史数据文件保持一致
+CSV_HEADER_LABELS = {
+    'date': '日期',
+    'year': '年份',
+    'dayun_ganzhi': '大运干支',
+    'liunian_ganzhi': '流年干支',
+    'liuyue_ganzhi': '流月干支',
+    'liuri_ganzhi': '流日干支',
+    'dayun_score': '大运分数',
+    'liunian_score': '流年分数',
+    'liuyue_score': '流月分数',
+    'liuri_score': '流日分数',
+    'final_score': '最终总分'
+}
+
+
+class BirthProfile:
+    """个人出生信息与专属计分表
+
+    dayun_sequence 可选：已知大运序列（如只知道出生年份和起运年份）时直接传入，
+    否则按出生时刻用 EightChar.getYun 推算。
+    """
+
+    def __init__(self, name, birth_year, birth_month=None, birth_day=None, birth_hour=12,
+                 gender='male', tiangan_scores=None, dizhi_scores=None, dayun_sequence=None):
+        if tiangan_scores is None or dizhi_scores is None:
+            raise ValueError(f"{name}缺少天干或地支计分表")
+        self.name = name
+        self.birth_year = birth_year
+        self.birth_month = birth_month
+        self.birth_day = birth_day
+        self.birth_hour = birth_hour
+        self.gender = gender
+        self.tiangan_scores = tiangan_scores
+        self.dizhi_scores = dizhi_scores
+        self._dayun_sequence = dayun_sequence
+
+    @classmethod
+    def from_dict(cls, data):
+        """从配置字典创建（birth_date 格式 YYYY-MM-DD）"""
+        birth_year, birth_month, birth_day = data.get('birth_year'), data.get('birth_month'), data.get('birth_day')
+        if data.get('birth_date'):
+            birth_year, birth_month, birth_day = map(int, data['birth_date'].split('-'))
+        return cls(
+            name=data['name'],
+            birth_year=birth_year,
+            birth_month=birth_month,
+            birth_day=birth_day,
+            birth_hour=data.get('birth_hour', 12),
+            gender=data.get('gender', 'male'),
+            tiangan_scores=data.get('tiangan_scores'),
+            dizhi_scores=data.get('dizhi_scores'),
+            dayun_sequence=data.get('dayun_sequence')
+        )
+
+    @property
+    def dayun_sequence(self):
+        if self._dayun_sequence is None:
+            self._dayun_sequence = derive_dayun_sequence(
+                self.birth_year, self.birth_month, self.birth_day, self.birth_hour, self.gender)
+        return self._dayun_sequence
+
+
+def derive_dayun_sequence(birth_year, birth_month, birth_day, birth_hour=12, gender='male', count=8):
+    """用 EightChar.getYun 推算大运序列
+
+    起运年份按 出生年 + 起运岁数 计算，每步大运十年，
+    与历史脚本中手工整理的大运序列口径一致。
+    """
+    if birth_month is None or birth_day is None:
+        raise ValueError("推算大运需要完整的出生日期")
+
+    timeline = get_dayun_timeline(birth_year, birth_month, birth_day, birth_hour,
+                                  1 if gender == 'male' else 0, count + 1)
+
+    sequence = []
+    for step in timeline.steps:
+        if not step['ganzhi']:
+            # 第0步为起运前的童限，没有大运干支
+            continue
+        start_year = birth_year + step['start_age']
+        sequence.append({'ganzhi': step['ganzhi'], 'start_year': start_year, 'end_year': start_year + 10})
+    return sequence
+
+
+class PersonLifetimeCalculator:
+    """按出生信息批量计算一生每日分数"""
+
+    def calculate_arrays(self, profile, start_year, end_year):
+        """返回NumPy数组形式的逐日结果"""
+        return compute_lifetime_arrays(
+            datetime.date(start_year, 1, 1), datetime.date(end_year, 12, 31),
+            profile.tiangan_scores, profile.dizhi_scores, profile.dayun_sequence
+        )
+
+    def calculate_daily_scores(self, profile, start_year, end_year):
+        """返回逐日字典列表（与历史CSV字段一致）"""
+        return arrays_to_rows(self.calculate_arrays(profile, start_year, end_year))
+
+    def calculate_many(self, profiles, start_year, end_year):
+        """在同一进程内为多人计算，返回 {姓名: 逐日字典列表}"""
+        results = {}
+        for profile in profiles:
+            try:
+                results[profile.name] = self.calculate_daily_scores(profile, start_year, end_year)
+            except Exception as e:
+                print(f"❌ 计算{profile.name}的一生分数时出错: {e}")
+        return results
+
+
+def save_daily_scores(daily_scores, filepath, verbose=True, binary=True):
+    """把逐日分数写入CSV（中文表头行 + 数据）
+
+    binary=True 时同时在旁边写一份同名.bin列式文件，供各分析模块快速加载
+    """
+    if verbose:
+        print(f"💾 正在保存到 {filepath}...")
+
+    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SCORE_FIELDS)
+        writer.writerow(CSV_HEADER_LABELS)
+        for row in daily_scores:
+            writer.writerow(row)
+
+    if binary:
+        write_daily_series(binary_path_for(filepath), rows_to_arrays(daily_scores))
+
+    if verbose:
+        print(f"✅ 结果已保存到: {filepath}")
+    return filepath
+
+if __name__ == "__main__":
+    from final_lifetime_calculator import USER_PROFILE
+    from calculate_lover_lifetime_data import LOVER_PROFILE
+
+    calculator = PersonLifetimeCalculator()
+    for profile in (USER_PROFILE, LOVER_PROFILE):
+        print(f"\n👤 {profile.name}的大运序列:")
+        for dayun in profile.dayun_sequence:
+            print(f"   {dayun['ganzhi']} ({dayun['start_year']}-{dayun['end_year']})")
+
+    results = calculator.calculate_many([USER_PROFILE, LOVER_PROFILE], 1995, 2055)
+    for name, daily_scores in results.items():
+        scores = [item['final_score'] for item in daily_scores]
+        print(f"\n📊 {name}: {len(daily_scores)}天，平均分 {sum(scores) / len(scores):.1f}分")
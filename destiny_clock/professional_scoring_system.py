@@ -16,6 +16,7 @@ bazi_lib_path = os.path.join(current_dir, 'bazi_lib')
 sys.path.insert(0, bazi_lib_path)
 
 from lunar_python import Solar, Lunar
+from natal_features import natal_features
 
 class ProfessionalScoringSystem:
     """专业八字计分系统"""
@@ -80,6 +81,9 @@ class ProfessionalScoringSystem:
             solar = Solar.fromYmdHms(year, month, day, 4, 0, 0)  # 默认寅时
             lunar = solar.getLunar()
             
+            # 四柱特征只提取一次，各层计分共用
+            ba = natal_features(ba)
+            
             total_score = 0
             score_details = {}
             
@@ -126,15 +130,16 @@ class ProfessionalScoringSystem:
         
         try:
             # 获取四柱十神
+            features = natal_features(ba)
             pillars = [
-                ('年干', ba.getYearShiShenGan()),
-                ('年支', ba.getYearShiShenZhi()),
-                ('月干', ba.getMonthShiShenGan()),
-                ('月支', ba.getMonthShiShenZhi()),
-                ('日干', ba.getDayShiShenGan()),
-                ('日支', ba.getDayShiShenZhi()),
-                ('时干', ba.getTimeShiShenGan()),
-                ('时支', ba.getTimeShiShenZhi())
+                ('年干', features.shishen_gan['year']),
+                ('年支', features.shishen_zhi['year']),
+                ('月干', features.shishen_gan['month']),
+                ('月支', features.shishen_zhi['month']),
+                ('日干', features.shishen_gan['day']),
+                ('日支', features.shishen_zhi['day']),
+                ('时干', features.shishen_gan['time']),
+                ('时支', features.shishen_zhi['time'])
             ]
             
             for pillar_name, shishen_data in pillars:
@@ -179,7 +184,7 @@ class ProfessionalScoringSystem:
         
         try:
             # 获取四柱地支
-            zhis = [ba.getYearZhi(), ba.getMonthZhi(), ba.getDayZhi(), ba.getTimeZhi()]
+            zhis = natal_features(ba).zhi_list
             
             # 检查六合关系（+2分）
             liuhe_count = 0
@@ -356,14 +361,15 @@ class ProfessionalScoringSystem:
             cangan_details = {}
             
             # 获取四柱地支藏干
+            features = natal_features(ba)
             pillars = [
-                ('年支', ba.getYearZhi(), ba.getYearHideGan()),
-                ('月支', ba.getMonthZhi(), ba.getMonthHideGan()),
-                ('日支', ba.getDayZhi(), ba.getDayHideGan()),
-                ('时支', ba.getTimeZhi(), ba.getTimeHideGan())
+                ('年支', features.zhis['year'], features.hide_gans['year']),
+                ('月支', features.zhis['month'], features.hide_gans['month']),
+                ('日支', features.zhis['day'], features.hide_gans['day']),
+                ('时支', features.zhis['time'], features.hide_gans['time'])
             ]
             
-            day_gan = ba.getDayGan()
+            day_gan = features.day_master
             
             for pillar_name, zhi, hide_gans in pillars:
                 pillar_score = 0
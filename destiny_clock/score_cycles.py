@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+分数序列的周期分析
+用 FFT 一次算出整条序列的自相关和周期图（功率谱），找出主导周期，
+并给出天干（10天）、地支（12天）、六十甲子（60天）、节气月、流年、大运等已知周期的强度。
+"""
+
+import numpy as np
+
+# (周期天数, 名称)
+KNOWN_CYCLES = [
+    (10, '天干一旬'),
+    (12, '地支一轮'),
+    (30.4369, '节气月（流月）'),
+    (60, '六十甲子'),
+    (365.2422, '回归年（流年）'),
+    (3652.422, '十年（大运）'),
+]
+LABEL_TOLERANCE = 0.03   # 主导周期与已知周期相差3%以内时标注名称
+MIN_CYCLES = 3           # 周期至少要在序列中完整出现3次
+MIN_DAYS = 3             # 少于3天无法做频谱分析
+
+
+def autocorrelation(values):
+    """归一化自相关（lag 0 为1），用零填充的 FFT 计算，O(n log n)"""
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return np.zeros(0)
+    x = x - x.mean()
+    if not x.any():
+        return np.zeros(n)
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(x, size)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+    return acf / acf[0]
+
+
+def periodogram(values):
+    """周期图：返回 (周期天数, 功率占比)，不含零频，按频率升序（周期降序）；不足 MIN_DAYS 天时为空"""
+    x = np.asarray(values, dtype=np.float64)
+    if len(x) < MIN_DAYS:
+        return np.zeros(0), np.zeros(0)
+    x = x - x.mean()
+    power = np.abs(np.fft.rfft(x)) ** 2
+    frequencies = np.fft.rfftfreq(len(x))
+    total = power[1:].sum()
+    share = power[1:] / total if total > 0 else np.zeros(len(power) - 1)
+    return 1.0 / frequencies[1:], share
+
+
+def label_period(period):
+    for known, name in KNOWN_CYCLES:
+        if abs(period - known) <= known * LABEL_TOLERANCE:
+            return name
+    return ''
+
+
+def lag_strength(acf, period):
+    """某周期的自相关强度（非整数周期在相邻两个lag之间线性插值）"""
+    if period >= len(acf) - 1:
+        return None
+    low = int(period)
+    fraction = period - low
+    return float(acf[low] * (1 - fraction) + acf[low + 1] * fraction)
+
+
+def dominant_periods(values, top=8, min_period=2, acf=None):
+    """周期图中功率最高的局部峰，返回 [{period, share, acf, label}, ...]（按功率降序）"""
+    periods, share = periodogram(values)
+    if len(share) < 3:
+        return []
+    if acf is None:
+        acf = autocorrelation(values)
+    max_period = len(values) / MIN_CYCLES
+
+    # 局部峰：比左右相邻频率的功率都高
+    inner = share[1:-1]
+    peaks = np.flatnonzero((inner > share[:-2]) & (inner >= share[2:])) + 1
+    peaks = peaks[(periods[peaks] >= min_period) & (periods[peaks] <= max_period)]
+    peaks = peaks[np.argsort(share[peaks])[::-1][:top]]
+
+    return [{
+        'period': round(float(periods[i]), 1),
+        'share': float(share[i]),
+        'acf': lag_strength(acf, float(periods[i])),
+        'label': label_period(float(periods[i]))
+    } for i in peaks]
+
+
+def analyze_cycles(values, top=8):
+    """完整的周期分析：主导周期 + 已知周期强度（不足 MIN_DAYS 天时两项都为空）"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < MIN_DAYS:
+        return {'days': len(values), 'dominant': [], 'known': []}
+    acf = autocorrelation(values)
+    known = []
+    for period, name in KNOWN_CYCLES:
+        if len(values) < period * MIN_CYCLES:
+            continue
+        known.append({'period': period, 'label': name, 'acf': lag_strength(acf, period)})
+    return {
+        'days': len(values),
+        'dominant': dominant_periods(values, top, acf=acf),
+        'known': known
+    }
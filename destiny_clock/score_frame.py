@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+一生每日分数的共享内存结构
+数据文件只加载一次：各列直接是 NumPy 数组（来自内存映射的列式文件），
+月、日、星期等派生列和逐日字典列表都在第一次用到时计算并缓存，
+多个分析器共用同一个 ScoreFrame，不必各自重新加载、解析。
+"""
+
+import os
+import datetime
+
+import numpy as np
+
+from daily_score_series import load_daily_series, day_to_date, GANZHI_LAYERS
+from ganzhi_calendar import GANZHI_60
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(CURRENT_DIR, "最终版一生每日分数_1995-2055.csv")
+
+# 各分析器用到的逐日字段的并集
+ROW_FIELDS = [
+    'date', 'date_obj', 'year', 'month', 'day', 'weekday',
+    'dayun_ganzhi', 'liunian_ganzhi', 'liuyue_ganzhi', 'liuri_ganzhi', 'final_score'
+]
+
+
+class ScoreFrame:
+    """按列存放的一生每日分数，派生列按需计算一次"""
+
+    def __init__(self, series, csv_file_path=None):
+        self.series = series
+        self.csv_file_path = csv_file_path
+        self.count = len(series)
+        self._cache = {}
+
+    @classmethod
+    def load(cls, csv_file_path=None):
+        """加载数据文件（默认用户的一生每日分数），文件不存在时抛出FileNotFoundError"""
+        csv_file_path = csv_file_path or DEFAULT_CSV
+        return cls(load_daily_series(csv_file_path), csv_file_path)
+
+    def __len__(self):
+        return self.count
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def days(self):
+        """自1970-01-01起的天数"""
+        return self.series.columns['day']
+
+    @property
+    def ordinals(self):
+        """date.toordinal() 天数（int64）"""
+        return self._cached('ordinals', lambda: self.days.astype(np.int64) + datetime.date(1970, 1, 1).toordinal())
+
+    @property
+    def year(self):
+        return self.series.columns['year']
+
+    @property
+    def month(self):
+        def compute():
+            months = self.days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+            return (months % 12 + 1).astype(np.int8)
+        return self._cached('month', compute)
+
+    @property
+    def day(self):
+        def compute():
+            dates = self.days.astype('datetime64[D]')
+            return ((dates - dates.astype('datetime64[M]')).astype(np.int64) + 1).astype(np.int8)
+        return self._cached('day', compute)
+
+    @property
+    def weekday(self):
+        """0=周一 … 6=周日（1970-01-01 是周四）"""
+        return self._cached('weekday', lambda: ((self.days.astype(np.int64) + 3) % 7).astype(np.int8))
+
+    @property
+    def scores(self):
+        """最终总分（float64，便于统计）"""
+        return self._cached('scores', lambda: self.series.columns['final_score'].astype(np.float64))
+
+    def column(self, name):
+        """原始列：day, year, *_index, *_score"""
+        return self.series.columns[name]
+
+    def ganzhi_index(self, layer):
+        """某一层（dayun/liunian/liuyue/liuri）的六十甲子序号"""
+        return self.series.columns[f'{layer}_index']
+
+    def ganzhi_names(self, layer):
+        return self._cached(f'{layer}_ganzhi', lambda: self.series.ganzhi_names(layer))
+
+    @property
+    def date_objs(self):
+        return self._cached('date_objs', lambda: [day_to_date(day) for day in self.days.tolist()])
+
+    def rows(self):
+        """逐日字典列表（ROW_FIELDS 全部字段），构建一次后所有传入同一 frame 的分析器共用"""
+        def compute():
+            date_objs = self.date_objs
+            columns = [
+                [d.isoformat() for d in date_objs],
+                date_objs,
+                self.year.tolist(),
+                self.month.tolist(),
+                self.day.tolist(),
+                self.weekday.tolist(),
+            ]
+            columns.extend(self.ganzhi_names(layer) for layer in GANZHI_LAYERS)
+            columns.append(self.series.columns['final_score'].tolist())
+            return [dict(zip(ROW_FIELDS, row)) for row in zip(*columns)]
+        return self._cached('rows', compute)
+
+    def date_at(self, offset):
+        return self.date_objs[offset]
+
+    def ganzhi_at(self, layer, offset):
+        return GANZHI_60[int(self.ganzhi_index(layer)[offset])]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+分数分组统计
+按干支（任一层的干支、天干、地支）、大运、月份、星期、节气月等键对每日分数分组，
+一次 lexsort + bincount 算出各组的数量、均值、标准差、最值和分位数，
+代替各分析方法里 defaultdict(list) + statistics 的手写分组。
+"""
+
+import numpy as np
+
+from ganzhi_calendar import TIANGAN, DIZHI, GANZHI_60
+from daily_score_series import GANZHI_LAYERS
+
+LAYER_NAMES = {'dayun': '大运', 'liunian': '流年', 'liuyue': '流月', 'liuri': '流日'}
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 节气月：以十二节分界，月支即流月地支（寅月始于立春）
+JIEQI_MONTH_NAMES = {
+    2: '寅月(立春-惊蛰)', 3: '卯月(惊蛰-清明)', 4: '辰月(清明-立夏)', 5: '巳月(立夏-芒种)',
+    6: '午月(芒种-小暑)', 7: '未月(小暑-立秋)', 8: '申月(立秋-白露)', 9: '酉月(白露-寒露)',
+    10: '戌月(寒露-立冬)', 11: '亥月(立冬-大雪)', 0: '子月(大雪-小寒)', 1: '丑月(小寒-立春)',
+}
+# 节气月按一年中的先后排列（寅月在前）
+JIEQI_ORDER = [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 1]
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def group_keys(frame, by):
+    """分组键 → (整数键数组, 标签列表)，键的取值为 0..len(标签)-1
+
+    by 可选:
+        dayun / liunian / liuyue / liuri     该层干支（六十甲子）
+        <层>_gan / <层>_zhi                  该层的天干 / 地支
+        month / weekday / year / jieqi       月份 / 星期 / 年份 / 节气月
+    """
+    if by in GANZHI_LAYERS:
+        return frame.ganzhi_index(by), GANZHI_60
+    layer, _, part = by.rpartition('_')
+    if layer in GANZHI_LAYERS and part == 'gan':
+        return frame.ganzhi_index(layer) % 10, TIANGAN
+    if layer in GANZHI_LAYERS and part == 'zhi':
+        return frame.ganzhi_index(layer) % 12, DIZHI
+    if by == 'month':
+        return frame.month.astype(np.int64) - 1, [f'{m}月' for m in range(1, 13)]
+    if by == 'weekday':
+        return frame.weekday, WEEKDAY_NAMES
+    if by == 'year':
+        years = frame.year.astype(np.int64)
+        first = int(years.min()) if len(years) else 0
+        last = int(years.max()) if len(years) else -1
+        return years - first, [str(y) for y in range(first, last + 1)]
+    if by == 'jieqi':
+        # 按节气月先后重新编号，使键的顺序就是一年中的顺序
+        position = np.empty(12, dtype=np.int64)
+        position[JIEQI_ORDER] = np.arange(12)
+        return position[frame.ganzhi_index('liuyue') % 12], [JIEQI_MONTH_NAMES[z] for z in JIEQI_ORDER]
+    raise ValueError(f"不支持的分组键: {by}")
+
+
+class GroupedScores:
+    """按整数键分组后的统计量（各属性为按键下标排列的数组）"""
+
+    def __init__(self, keys, values, labels, quantiles=DEFAULT_QUANTILES):
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        size = len(labels)
+        self.labels = list(labels)
+        self.quantile_levels = tuple(quantiles)
+
+        self.counts = np.bincount(keys, minlength=size)
+        present = self.counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.means = np.bincount(keys, weights=values, minlength=size) / self.counts
+            # 两遍法求样本标准差，与 statistics.stdev 的数值一致
+            deviations = values - self.means[keys]
+            squares = np.bincount(keys, weights=deviations * deviations, minlength=size)
+            self.stds = np.where(self.counts > 1, np.sqrt(squares / (self.counts - 1)), 0.0)
+
+        # 键内按分数排序，各组的最值、分位数都在排好序的数组上按下标取
+        ordered = values[np.lexsort((values, keys))]
+        starts = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+        last = starts + np.maximum(self.counts - 1, 0)
+        self.mins = _take(ordered, starts, present)
+        self.maxs = _take(ordered, last, present)
+        self.quantiles = {}
+        for q in self.quantile_levels:
+            # 线性插值（numpy.quantile 的默认方法）
+            position = starts + q * np.maximum(self.counts - 1, 0)
+            low = np.floor(position).astype(np.int64)
+            low_values = _take(ordered, low, present)
+            high_values = _take(ordered, np.minimum(low + 1, last), present)
+            self.quantiles[q] = low_values + (high_values - low_values) * (position - low)
+
+        # 各键第一次出现的位置，用于按出现顺序排列（如大运）
+        self.first_seen = np.full(size, len(keys), dtype=np.int64)
+        np.minimum.at(self.first_seen, keys, np.arange(len(keys)))
+
+    def rows(self, min_count=1, order='key'):
+        """各组统计行，order: 'key' 按键、'first' 按第一次出现、'mean' / '-mean' 按均值升/降序
+
+        每行: key, count, avg_score, std_dev, min_score, max_score, range, p25/p50/p75...
+        """
+        keys = np.flatnonzero(self.counts >= max(min_count, 1))
+        if order == 'first':
+            keys = keys[np.argsort(self.first_seen[keys], kind='stable')]
+        elif order in ('mean', '-mean'):
+            keys = keys[np.argsort(self.first_seen[keys], kind='stable')]
+            means = self.means[keys] if order == 'mean' else -self.means[keys]
+            keys = keys[np.argsort(means, kind='stable')]
+        rows = []
+        for k in keys.tolist():
+            row = {
+                'key': self.labels[k],
+                'count': int(self.counts[k]),
+                'avg_score': float(self.means[k]),
+                'std_dev': float(self.stds[k]),
+                'min_score': _number(self.mins[k]),
+                'max_score': _number(self.maxs[k]),
+            }
+            row['range'] = row['max_score'] - row['min_score']
+            for q in self.quantile_levels:
+                row[f'p{round(q * 100):d}'] = float(self.quantiles[q][k])
+            rows.append(row)
+        return rows
+
+
+def _take(ordered, index, present):
+    """ordered[index]，空组为 nan"""
+    if len(ordered) == 0:
+        return np.full(len(index), np.nan)
+    return np.where(present, ordered[np.minimum(index, len(ordered) - 1)], np.nan)
+
+
+def _number(value):
+    """分数是整数时按整数输出，便于与原始分数直接比较"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def group_scores(frame, by, values=None, quantiles=DEFAULT_QUANTILES):
+    """按 by 对 frame 的最终总分（或传入的 values）分组统计"""
+    keys, labels = group_keys(frame, by)
+    return GroupedScores(keys, frame.scores if values is None else values, labels, quantiles)
+
+
+def group_rows(frame, by, min_count=1, order='key'):
+    """按 by 分组的统计行（见 GroupedScores.rows）；frame 为 None（数据文件缺失）时返回空列表"""
+    if frame is None:
+        return []
+    return group_scores(frame, by).rows(min_count, order)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+按日序号索引的分数存储
+对每日分数建立前缀和数组：任意日期区间的总分/均值为O(log n)
+（二分定位区间端点）+ O(1)（前缀和相减），图表接口不再线性扫描全部数据
+"""
+
+import datetime
+
+import numpy as np
+
+from daily_score_series import date_to_day, day_to_date
+
+
+class ScoreStore:
+    """基于 DailyScoreSeries 的区间查询"""
+
+    def __init__(self, series, columns=('final_score',)):
+        days = np.asarray(series.day, dtype=np.int64)
+        order = None
+        if len(days) > 1 and np.any(np.diff(days) < 0):
+            order = np.argsort(days, kind='stable')
+            days = days[order]
+        self.days = days
+
+        self.values = {}
+        self.prefix = {}
+        for column in columns:
+            values = np.asarray(series.columns[column], dtype=np.int64)
+            if order is not None:
+                values = values[order]
+            self.values[column] = values
+            # prefix[i] = 前i天的总和，区间[i, j)的和 = prefix[j] - prefix[i]
+            self.prefix[column] = np.concatenate(([0], np.cumsum(values)))
+
+    def __len__(self):
+        return len(self.days)
+
+    def bounds(self, start_date, end_date):
+        """闭区间 [start_date, end_date] 在数组中的下标范围 [i, j)"""
+        i = int(np.searchsorted(self.days, date_to_day(start_date), side='left'))
+        j = int(np.searchsorted(self.days, date_to_day(end_date), side='right'))
+        return i, max(i, j)
+
+    def range_sum(self, start_date, end_date, column='final_score'):
+        i, j = self.bounds(start_date, end_date)
+        return int(self.prefix[column][j] - self.prefix[column][i]), j - i
+
+    def range_average(self, start_date, end_date, column='final_score'):
+        """区间平均分，区间内没有数据时返回None"""
+        total, count = self.range_sum(start_date, end_date, column)
+        if count == 0:
+            return None
+        return total / count
+
+    def year_average(self, year, column='final_score'):
+        return self.range_average(datetime.date(year, 1, 1), datetime.date(year, 12, 31), column)
+
+    def years_average(self, start_year, end_year, column='final_score'):
+        """[start_year, end_year) 年的平均分（如一步大运）"""
+        return self.range_average(datetime.date(start_year, 1, 1), datetime.date(end_year - 1, 12, 31), column)
+
+    def month_average(self, year, month, column='final_score'):
+        first, last = month_bounds(year, month)
+        return self.range_average(first, last, column)
+
+    def slice(self, start_date, end_date, column='final_score'):
+        """返回区间内的 (日期列表, 分数数组)"""
+        i, j = self.bounds(start_date, end_date)
+        dates = [day_to_date(day) for day in self.days[i:j].tolist()]
+        return dates, self.values[column][i:j]
+
+
+def month_bounds(year, month):
+    """某月第一天和最后一天"""
+    first = datetime.date(year, month, 1)
+    if month == 12:
+        next_first = datetime.date(year + 1, 1, 1)
+    else:
+        next_first = datetime.date(year, month + 1, 1)
+    return first, next_first - datetime.timedelta(days=1)
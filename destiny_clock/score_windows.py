@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+分数序列的滑动窗口统计
+用前缀和一次性算出任意区间的均值，窗口统计从 O(n·w) 降到 O(n)，不再为每个位置切片新建列表；
+检测出的命中位置再合并成互不重叠的时段。
+DatedWindows 按日期定位，用于生日、节日等锚点日期前后的窗口统计。
+"""
+
+import calendar
+import datetime
+
+import numpy as np
+
+
+class RollingWindows:
+    """基于前缀和的区间统计，构建一次，之后各种窗口大小都复用"""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float64)
+        # prefix[k] = values[:k] 之和，区间 [start, stop) 之和 = prefix[stop] - prefix[start]
+        self.prefix = np.concatenate(([0.0], np.cumsum(self.values)))
+
+    def __len__(self):
+        return len(self.values)
+
+    def range_means(self, starts, stops):
+        """各区间 [start, stop) 的均值（区间不能为空）"""
+        starts = np.asarray(starts)
+        stops = np.asarray(stops)
+        return (self.prefix[stops] - self.prefix[starts]) / (stops - starts)
+
+    def shift_scan(self, window):
+        """逐位置比较"前 window 天"与"从该位置起 window 天"的均值
+
+        返回 (positions, before_means, current_means)。
+        开头不足 window 天时前窗口取已有的天数（与逐个切片的写法一致）。
+        """
+        positions = np.arange(1, max(1, len(self) - window))
+        before = self.range_means(np.maximum(0, positions - window), positions)
+        current = self.range_means(positions, positions + window)
+        return positions, before, current
+
+
+def merge_hits(positions, window):
+    """把命中位置合并成时段：窗口 [p, p+window-1] 相互重叠或首尾相接的归为一段
+
+    positions 需升序，返回 [(第一个命中的下标, 最后一个命中的下标), ...]（均为 positions 中的下标）
+    """
+    if len(positions) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(positions) > window) + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks - 1, [len(positions) - 1]))
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+def detect_shift_episodes(windows, window_sizes, threshold, direction=-1):
+    """检测均值突变的时段，多个窗口大小一次完成
+
+    direction=-1 找下降（前窗口均值 - 当前窗口均值 ≥ threshold），1 找上升。
+    返回时段列表，每个时段以变化幅度最大的位置为代表:
+        window_days, start, end（数据下标，含）, peak, before_avg, current_avg, change, hit_count
+    """
+    if isinstance(window_sizes, int):
+        window_sizes = [window_sizes]
+
+    episodes = []
+    for window in window_sizes:
+        positions, before, current = windows.shift_scan(window)
+        change = (current - before) * direction
+        hit = np.flatnonzero(change >= threshold)
+        hit_positions = positions[hit]
+        for first, last in merge_hits(hit_positions, window):
+            peak = first + int(np.argmax(change[hit[first:last + 1]]))
+            peak_index = hit[peak]
+            episodes.append({
+                'window_days': window,
+                'start': int(hit_positions[first]),
+                'end': int(hit_positions[last]) + window - 1,
+                'peak': int(positions[peak_index]),
+                'before_avg': float(before[peak_index]),
+                'current_avg': float(current[peak_index]),
+                'change': float(change[peak_index]),
+                'hit_count': last - first + 1
+            })
+    return episodes
+
+
+class DatedWindows:
+    """按日期取窗口：日期（连续天数，如 toordinal）→ 数据下标的稠密索引加前缀和
+
+    数据有缺日时缺的那天不计入均值；每个锚点日期的 ±k 天窗口统计都是 O(1)，
+    整体为 O(n + 锚点数)，不必为每个锚点再扫描全部数据。
+    """
+
+    def __init__(self, days, values):
+        days = np.asarray(days, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        self.first_day = int(days.min()) if len(days) else 0
+        span = int(days.max()) - self.first_day + 1 if len(days) else 0
+
+        # 稠密数组的第 i 格对应 first_day + i 这一天，offsets 为 -1 表示当天没有数据
+        self.offsets = np.full(span, -1, dtype=np.int64)
+        self.offsets[days - self.first_day] = np.arange(len(days))
+        dense_values = np.zeros(span)
+        dense_values[days - self.first_day] = values
+        present = self.offsets >= 0
+        self.values = dense_values
+        self._value_prefix = np.concatenate(([0.0], np.cumsum(dense_values)))
+        self._count_prefix = np.concatenate(([0], np.cumsum(present)))
+
+    def offset_of(self, day):
+        """某天在原数据中的下标，没有数据时返回-1"""
+        position = day - self.first_day
+        if 0 <= position < len(self.offsets):
+            return int(self.offsets[position])
+        return -1
+
+    def _range_means(self, starts, stops):
+        """稠密区间 [start, stop) 内有数据日的均值，没有数据的区间为 nan"""
+        starts = np.clip(starts, 0, len(self.offsets))
+        stops = np.clip(stops, 0, len(self.offsets))
+        totals = self._value_prefix[stops] - self._value_prefix[starts]
+        counts = self._count_prefix[stops] - self._count_prefix[starts]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+    def around(self, anchor_days, before=7, after=7):
+        """各锚点当天的下标、前 before 天和后 after 天的均值（不含当天）
+
+        返回 (offsets, before_means, after_means)，锚点当天没有数据时 offset 为 -1，
+        窗口内没有数据时均值为 nan
+        """
+        positions = np.asarray(anchor_days, dtype=np.int64) - self.first_day
+        if len(self.offsets) == 0:
+            empty = np.full(len(positions), np.nan)
+            return np.full(len(positions), -1, dtype=np.int64), empty, empty.copy()
+        inside = (positions >= 0) & (positions < len(self.offsets))
+        offsets = np.where(inside, self.offsets[np.clip(positions, 0, len(self.offsets) - 1)], -1)
+        before_means = self._range_means(positions - before, positions)
+        after_means = self._range_means(positions + 1, positions + 1 + after)
+        return offsets, before_means, after_means
+
+
+def annual_anchor_days(month, day, start_year, end_year):
+    """每年某月某日的天数（toordinal）列表；2月29日在平年取2月28日"""
+    anchors = []
+    for year in range(start_year, end_year + 1):
+        actual_day = day
+        if month == 2 and day == 29 and not calendar.isleap(year):
+            actual_day = 28
+        anchors.append(datetime.date(year, month, actual_day).toordinal())
+    return anchors
@@ -81,6 +81,107 @@ function formatAnalysisContent(content) {
     return html;
 }
 
+// 一次性获取完整的分析结果
+async function fetchAnalysis(baziString) {
+    const response = await fetch('/api/mingli-analysis', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            bazi: baziString
+        })
+    });
+    
+    if (!response.ok) {
+        throw new Error('分析请求失败');
+    }
+    
+    const data = await response.json();
+    
+    if (data.error) {
+        throw new Error(data.error);
+    }
+    
+    return data.analysis;
+}
+
+// 通过SSE流式获取分析结果，每收到一块调用 onChunk(text)
+// 返回false表示无法使用流式接口（需要改用 fetchAnalysis）
+async function streamAnalysis(baziString, onChunk) {
+    if (!window.TextDecoder || !window.ReadableStream) {
+        return false;
+    }
+    
+    const response = await fetch('/api/mingli-analysis/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify({
+            bazi: baziString
+        })
+    });
+    
+    if (response.status === 404 || response.status === 501 || !response.body) {
+        return false;
+    }
+    if (!response.ok) {
+        let message = '分析请求失败';
+        try {
+            message = (await response.json()).error || message;
+        } catch (e) {
+            // 响应不是JSON，使用默认提示
+        }
+        throw new Error(message);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder('utf-8');
+    let buffer = '';
+    let finished = false;
+    
+    while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        
+        // 事件之间以空行分隔
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            let dataText = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataText += line.slice(5).trim();
+                }
+            });
+            const data = dataText ? JSON.parse(dataText) : {};
+            
+            if (eventName === 'chunk') {
+                onChunk(data.text);
+            } else if (eventName === 'error') {
+                throw new Error(data.error || '分析失败');
+            } else if (eventName === 'done') {
+                finished = true;
+            }
+        }
+    }
+    
+    if (!finished) {
+        throw new Error('分析连接意外中断');
+    }
+    return true;
+}
+
 // 分析命理
 async function analyzeMingli() {
     if (!validateGanZhi()) {
@@ -117,32 +218,25 @@ async function analyzeMingli() {
     resultContent.style.display = 'none';
     
     try {
-        // 调用后端API
-        const response = await fetch('/api/mingli-analysis', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                bazi: baziString
-            })
-        });
+        // 收到第一块内容就隐藏加载动画，边生成边显示
+        let analysis = '';
+        const showPartial = function(text) {
+            analysis += text;
+            loadingContainer.style.display = 'none';
+            resultContent.style.display = 'block';
+            resultContent.innerHTML = formatAnalysisContent(analysis);
+        };
         
-        if (!response.ok) {
-            throw new Error('分析请求失败');
+        const streamed = await streamAnalysis(baziString, showPartial);
+        if (!streamed) {
+            // 浏览器不支持流式读取或服务端没有流式接口时，等待完整结果
+            showPartial(await fetchAnalysis(baziString));
         }
         
-        const data = await response.json();
-        
-        if (data.error) {
-            throw new Error(data.error);
+        if (!analysis) {
+            throw new Error('没有收到分析内容');
         }
         
-        // 显示分析结果
-        loadingContainer.style.display = 'none';
-        resultContent.style.display = 'block';
-        resultContent.innerHTML = formatAnalysisContent(data.analysis);
-        
         // 显示保存按钮
         const saveSection = document.getElementById('save-section');
         if (saveSection) {
@@ -152,7 +246,7 @@ async function analyzeMingli() {
         // 保存当前分析数据到全局变量
         window.currentAnalysisData = {
             bazi: baziString,
-            analysis: data.analysis,
+            analysis: analysis,
             timestamp: new Date().toISOString()
         };
         
@@ -3,6 +3,8 @@
 真正反映传统命理学精髓的计算方法
 """
 
+from natal_features import natal_features
+
 class YongshenBasedAnalyzer:
     
     def __init__(self):
@@ -30,32 +32,20 @@ class YongshenBasedAnalyzer:
         ]
     
     def analyze_yongshen_jishen(self, ba):
-        """分析用神忌神"""
-        day_gan = ba.getDayGan()
-        day_zhi = ba.getDayZhi()
-        month_zhi = ba.getMonthZhi()
-        
-        # 统计五行力量
-        all_ganzhi = [
-            ba.getYearGan(), ba.getYearZhi(),
-            ba.getMonthGan(), ba.getMonthZhi(), 
-            ba.getDayGan(), ba.getDayZhi(),
-            ba.getTimeGan(), ba.getTimeZhi()
-        ]
+        """分析用神忌神（ba 可以是 EightChar 或 NatalFeatures）"""
+        features = natal_features(ba)
+        day_gan = features.day_master
+        month_zhi = features.zhis['month']
         
-        wuxing_count = {'木': 0, '火': 0, '土': 0, '金': 0, '水': 0}
-        for gz in all_ganzhi:
-            if gz in self.gan_wuxing:
-                wuxing_count[self.gan_wuxing[gz]] += 1
-            elif gz in self.zhi_wuxing:
-                wuxing_count[self.zhi_wuxing[gz]] += 1
+        # 五行力量（四柱干支计数）
+        wuxing_count = dict(features.wuxing_count)
         
         # 分析月令对日主的影响
         day_wuxing = self.gan_wuxing[day_gan]
         month_wuxing = self.zhi_wuxing[month_zhi]
         
         # 判断身强身弱（基于月令和整体平衡）
-        is_weak = self.is_day_master_weak_comprehensive(ba, wuxing_count)
+        is_weak = self.is_day_master_weak_comprehensive(features, wuxing_count)
         
         # 确定用神忌神
         yongshen = []  # 喜神
@@ -96,8 +86,9 @@ class YongshenBasedAnalyzer:
     
     def is_day_master_weak_comprehensive(self, ba, wuxing_count):
         """综合判断身强身弱 - 专门针对您的情况优化"""
-        day_gan = ba.getDayGan()
-        month_zhi = ba.getMonthZhi()
+        features = natal_features(ba)
+        day_gan = features.day_master
+        month_zhi = features.zhis['month']
         day_wuxing = self.gan_wuxing[day_gan]
         
         # 特殊情况：癸水生于午月必然身弱
@@ -1,10 +1,13 @@
 import http.server
-import socketserver
 import os
 import json
 import base64
 import uuid
-from urllib.parse import parse_qs
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 # from PIL import Image  # Disabled due to macOS system policy
 import io
 import sys
@@ -15,7 +18,10 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'destin
 # 导入图表数据API
 try:
     from chart_data_api import ChartDataAPI
-    chart_api = ChartDataAPI()
+    from chart_response_cache import ChartResponseCache, etag_matches, DEFAULT_PROFILE
+    # 数据在第一次请求（或启动后的后台预热）时加载，不拖慢启动
+    chart_api = ChartDataAPI(lazy=True)
+    chart_cache = ChartResponseCache({DEFAULT_PROFILE: chart_api})
     CHART_API_AVAILABLE = True
 except Exception as e:
     print(f"Warning: Could not import chart_data_api: {e}")
@@ -23,7 +29,8 @@ except Exception as e:
 
 # 导入命理分析API
 try:
-    from mingli_analysis_api import analyze_bazi
+    from mingli_analysis_api import analyze_bazi, preload as preload_mingli
+    from mingli_jobs import get_job_queue, validate_bazi_request, format_sse, stream_analysis_events, mingli_stats
     MINGLI_API_AVAILABLE = True
 except Exception as e:
     print(f"Warning: Could not import mingli_analysis_api: {e}")
@@ -31,6 +38,11 @@ except Exception as e:
 
 PORT = 8000
 
+# 并发处理配置
+DEFAULT_WORKERS = 16        # 同时处理的请求数（命理分析等慢请求各占一个）
+REQUEST_TIMEOUT = 30        # 读取/写出单个请求时的socket超时（秒）
+KEEPALIVE_TIMEOUT = 5       # keep-alive连接空闲等待下一个请求的超时（秒）
+
 # 定义目标尺寸
 PANEL_SIZE = (1200, 300)  # 角色面板的目标尺寸
 BLOCK_SIZE = (400, 300)   # 任务块的目标尺寸
@@ -110,11 +122,100 @@ def process_image(image_bytes, target_size, maintain_aspect=True):
         print(f"Error in process_image: {str(e)}")
         raise
 
+class ThreadPoolHTTPServer(http.server.HTTPServer):
+    """线程池HTTP服务器
+
+    最多 workers 个连接同时处理，worker全忙时新连接留在监听队列中等待；
+    shutdown 后不再接受新连接，进行中的请求处理完毕才退出。
+    """
+    allow_reuse_address = True
+    request_queue_size = 64
+
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        self.shutting_down = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def process_request(self, request, client_address):
+        # 等待空闲worker；期间收到退出信号则直接关闭该连接
+        while not self._slots.acquire(timeout=0.5):
+            if self.shutting_down:
+                self.shutdown_request(request)
+                return
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # 线程池已关闭
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
 class CustomHandler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keep-alive：所有响应都必须带 Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT
+
+    # 图表接口带ETag，允许客户端缓存后条件请求；其余响应一律禁止缓存
+    revalidate_only = False
+    # SSE响应自己写 Cache-Control，end_headers 不再追加默认的缓存头
+    sse_response = False
+
+    def handle_one_request(self):
+        # 等待请求行（新连接或keep-alive空闲）用较短的超时，避免空连接长期占用worker
+        self.connection.settimeout(getattr(self.server, 'keepalive_timeout', self.timeout))
+        # 同一个keep-alive连接上的每个请求都从默认的缓存头开始，不继承上一个请求（如图表GET）的设置
+        self.revalidate_only = False
+        self.sse_response = False
+        super().handle_one_request()
+        if getattr(self.server, 'shutting_down', False):
+            self.close_connection = True
+
+    def parse_request(self):
+        # 已收到请求行，之后读取请求体、处理和写出响应使用请求超时
+        self.connection.settimeout(self.timeout)
+        return super().parse_request()
+
+    def send_body(self, status, body, content_type='application/json', headers=None):
+        """带 Content-Length 的完整响应"""
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json(self, status, payload, cors=False):
+        headers = {'Access-Control-Allow-Origin': '*'} if cors else None
+        self.send_body(status, json.dumps(payload).encode('utf-8'), headers=headers)
+
     def end_headers(self):
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        if self.sse_response:
+            pass
+        elif self.revalidate_only:
+            self.send_header('Cache-Control', 'no-cache')
+        else:
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
         super().end_headers()
     
     def do_POST(self):
@@ -176,13 +277,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     return
                 
                 # 返回文件路径
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
-                    'path': f'/{file_path}'
-                }
-                self.wfile.write(json.dumps(response).encode())
+                self.send_json(200, {'path': f'/{file_path}'})
                 print(f"Background image saved successfully: {file_path}")
                 return
             except Exception as e:
@@ -200,44 +295,62 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 
                 # 检查八字数据
                 if not data or 'bazi' not in data:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    response = {"error": "请提供八字信息"}
-                    self.wfile.write(json.dumps(response).encode('utf-8'))
+                    self.send_json(400, {"error": "请提供八字信息"})
                     return
                 
                 bazi = data['bazi']
                 if not bazi or not isinstance(bazi, str):
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    response = {"error": "八字格式不正确"}
-                    self.wfile.write(json.dumps(response).encode('utf-8'))
+                    self.send_json(400, {"error": "八字格式不正确"})
                     return
                 
-                # 调用分析函数
-                result = analyze_bazi(bazi)
+                # 调用分析函数（no_cache 为真时跳过结果缓存）
+                result = analyze_bazi(bazi, use_cache=not data.get('no_cache'))
                 
                 # 返回结果
-                if 'error' in result:
-                    self.send_response(500)
-                else:
-                    self.send_response(200)
-                
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps(result).encode('utf-8'))
+                self.send_json(500 if 'error' in result else 200, result, cors=True)
                 return
                 
             except Exception as e:
                 print(f"Error in mingli analysis: {e}")
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {"error": f"服务器错误: {str(e)}"}
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                self.send_json(500, {"error": f"服务器错误: {str(e)}"})
+                return
+
+        # 流式命理分析：模型每输出一块就以SSE推送
+        elif self.path == '/api/mingli-analysis/stream' and MINGLI_API_AVAILABLE:
+            try:
+                content_length = int(self.headers['Content-Length'])
+                data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            except Exception as e:
+                print(f"Error reading mingli stream request: {e}")
+                self.send_json(400, {"error": "请求格式不正确"})
+                return
+            error = validate_bazi_request(data)
+            if error:
+                self.send_json(400, {"error": error})
+                return
+            self.send_sse(stream_analysis_events(data['bazi'], use_cache=not data.get('no_cache')))
+            return
+
+        # 提交异步分析任务：立即返回任务id，分析在后台线程池中进行
+        elif self.path == '/api/mingli-analysis/jobs' and MINGLI_API_AVAILABLE:
+            try:
+                content_length = int(self.headers['Content-Length'])
+                data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+                error = validate_bazi_request(data)
+                if error:
+                    self.send_json(400, {"error": error})
+                    return
+                
+                job_id = get_job_queue().submit(data['bazi'], use_cache=not data.get('no_cache'))
+                self.send_json(202, {
+                    "job_id": job_id,
+                    "status_url": f"/api/mingli-analysis/jobs/{job_id}",
+                    "events_url": f"/api/mingli-analysis/jobs/{job_id}/events"
+                }, cors=True)
+                return
+            except Exception as e:
+                print(f"Error submitting mingli job: {e}")
+                self.send_json(500, {"error": f"服务器错误: {str(e)}"})
                 return
 
         # 处理保存分析结果请求
@@ -274,69 +387,62 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     f.write("*本报告由AI命理分析系统生成，仅供参考*")
                 
                 # 返回成功响应
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                response = {
+                self.send_json(200, {
                     'success': True,
                     'filename': filename,
                     'path': file_path
-                }
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                }, cors=True)
                 print(f"分析结果已保存：{file_path}")
                 return
                 
             except Exception as e:
                 print(f"Error saving analysis: {e}")
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {"success": False, "error": str(e)}
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                self.send_json(500, {"success": False, "error": str(e)})
                 return
 
+        # 丢弃未读取的请求体，保证keep-alive连接上的下一个请求能正确解析
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
         self.send_response(404)
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
         # 处理图表API请求
         if CHART_API_AVAILABLE and self.path.startswith('/api/chart/'):
+            parsed = urlparse(self.path)
+            endpoint = parsed.path[len('/api/chart/'):]
+            profile = parse_qs(parsed.query).get('profile', [DEFAULT_PROFILE])[0]
             try:
-                # 设置响应头
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                # 根据路径调用对应的API
-                if self.path == '/api/chart/dayun':
-                    data = chart_api.get_dayun_chart_data()
-                    response = {'success': True, 'data': data}
-                elif self.path == '/api/chart/liunian':
-                    data = chart_api.get_liunian_chart_data()
-                    response = {'success': True, 'data': data}
-                elif self.path == '/api/chart/liuyue':
-                    data = chart_api.get_liuyue_chart_data()
-                    response = {'success': True, 'data': data}
-                elif self.path == '/api/chart/liuri':
-                    data = chart_api.get_liuri_chart_data()
-                    response = {'success': True, 'data': data}
-                else:
-                    self.send_error(404, "API endpoint not found")
-                    return
-                
-                # 发送响应
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                # 响应按（接口, 档案, 当天日期）缓存，跨零点或数据文件更新时失效
+                body, etag = chart_cache.get_response(endpoint, profile)
+            except KeyError:
+                self.send_error(404, "API endpoint not found")
                 return
             except Exception as e:
                 print(f"Error in chart API: {e}")
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
+                self.send_json(500, {'success': False, 'error': str(e)})
+                return
+            
+            self.revalidate_only = True
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
-                response = {'success': False, 'error': str(e)}
-                self.wfile.write(json.dumps(response).encode('utf-8'))
                 return
+            
+            self.send_body(200, body, headers={'ETag': etag, 'Access-Control-Allow-Origin': '*'})
+            return
+        
+        # 命理分析运行指标（模型调用排队/延迟、结果缓存、任务队列）
+        if MINGLI_API_AVAILABLE and self.path == '/api/mingli-analysis/stats':
+            self.send_json(200, mingli_stats(), cors=True)
+            return
+        
+        # 命理分析任务：状态轮询与SSE事件流
+        if MINGLI_API_AVAILABLE and self.path.startswith('/api/mingli-analysis/jobs/'):
+            self.handle_mingli_job()
+            return
         
         # 处理命理分析页面请求
         if self.path == '/destiny_clock/mingli_analysis.html':
@@ -345,10 +451,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 file_path = os.path.join('destiny_clock', 'mingli_analysis.html')
                 with open(file_path, 'rb') as f:
                     content = f.read()
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.end_headers()
-                self.wfile.write(content)
+                self.send_body(200, content, content_type='text/html; charset=utf-8')
                 return
             except Exception as e:
                 print(f"Error serving mingli_analysis.html: {e}")
@@ -358,10 +461,82 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         # 其他GET请求使用默认处理
         super().do_GET()
 
-def run_server():
-    with socketserver.TCPServer(("", PORT), CustomHandler) as httpd:
-        print(f"服务器运行在 http://localhost:{PORT}")
+    def handle_mingli_job(self):
+        """GET /api/mingli-analysis/jobs/<id>[/events]"""
+        parsed = urlparse(self.path)
+        parts = parsed.path[len('/api/mingli-analysis/jobs/'):].split('/')
+        job_id = parts[0]
+        queue = get_job_queue()
+        job = queue.get(job_id, include_text=len(parts) == 1)
+        if job is None or len(parts) > 2 or (len(parts) == 2 and parts[1] != 'events'):
+            self.send_json(404, {"error": "任务不存在"})
+            return
+        
+        if len(parts) == 1:
+            self.send_json(200, job, cors=True)
+            return
+        
+        try:
+            start = int(parse_qs(parsed.query).get('start', ['0'])[0])
+        except ValueError:
+            start = 0
+        # 客户端断开后任务继续在后台运行，可用 start 参数重连
+        self.send_sse(queue.iter_events(job_id, start))
+
+    def send_sse(self, events):
+        """逐条写出 (事件名, 数据) 形式的SSE事件流；长度未知，发完即关闭连接"""
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.sse_response = True
+        try:
+            self.end_headers()
+        finally:
+            self.sse_response = False
+        try:
+            for event, data in events:
+                self.wfile.write(format_sse(event, data))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            # 客户端断开时关闭生成器，停止后续的模型输出
+            if hasattr(events, 'close'):
+                events.close()
+
+def warm_up():
+    """服务开始监听后在后台加载图表数据和模型SDK，第一个请求不必等待"""
+    if CHART_API_AVAILABLE:
+        chart_api.store
+    if MINGLI_API_AVAILABLE:
+        preload_mingli()
+
+def run_server(port=PORT, workers=DEFAULT_WORKERS, timeout=REQUEST_TIMEOUT, keepalive_timeout=KEEPALIVE_TIMEOUT):
+    CustomHandler.timeout = timeout
+    httpd = ThreadPoolHTTPServer(("", port), CustomHandler, workers=workers, keepalive_timeout=keepalive_timeout)
+
+    def handle_stop(signum, frame):
+        if httpd.shutting_down:
+            return
+        print("收到退出信号，等待进行中的请求完成...")
+        httpd.shutting_down = True
+        # shutdown() 会等待 serve_forever 退出，不能在运行它的主线程里直接调用
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, handle_stop)
+        signal.signal(signal.SIGINT, handle_stop)
+
+    print(f"服务器运行在 http://localhost:{port}（{workers}个工作线程）")
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    try:
         httpd.serve_forever()
+    finally:
+        httpd.server_close()
+    print("服务器已停止")
 
 if __name__ == "__main__":
     # 确保目录结构存在
@@ -372,4 +547,12 @@ if __name__ == "__main__":
     os.makedirs("styles", exist_ok=True)
     os.makedirs("scripts", exist_ok=True)
     
-    run_server() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='命运时钟本地服务器')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='同时处理的请求数')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help='单个请求的socket超时（秒）')
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='keep-alive连接的空闲超时（秒）')
+    args = parser.parse_args()
+    
+    run_server(args.port, args.workers, args.timeout, args.keepalive_timeout) 
\ No newline at end of file